@@ -18,6 +18,126 @@
 Adafruit_MCP4728 mcp;
 Adafruit_MCP4728 mcp2;
 
+// Binary frame protocol (see protocol.py for the layout)
+#define FRAME_SYNC 0xA5
+#define FRAME_SIZE 14   // Switch code 3 ("hold") decodes to 2, which leaves the pins unchanged
+#define FRAME_SIZE_STAMPED 18
+#define FLAG_ECHO_BYTE 11     // Bit 7 of byte 11 (bit 13 of the digital word): frame carries a host timestamp
+#define FLAG_ECHO_MASK 0x80
+#define FAILSAFE_SYNC 0xA6    // Failsafe values frame: 12 int16 values and a CRC-16, in either protocol
+#define FAILSAFE_FRAME_SIZE 27
+
+// Sketch-to-host frames
+#define DEVICE_SYNC 0x5A
+#define MSG_ECHO 0x01
+#define ENABLE_ECHO 1   // Echo stamped frames back after the DAC write, for latency measurement
+#define MSG_TELEMETRY 0x02
+#define TELEMETRY_INTERVAL_MS 100   // Report counters, loop time and DAC codes this often; 0 turns it off
+
+byte frameBuf[FAILSAFE_FRAME_SIZE];
+byte frameLen = 0;
+bool binaryMode = false;  // Latched after the first valid binary frame
+
+// Text lines are collected without blocking, so the failsafe check keeps running
+#define LINE_MAX 96
+char lineBuf[LINE_MAX];
+byte lineLen = 0;
+bool lineOverflow = false;  // The current line did not fit; it is dropped as a bad line
+
+// Failsafe: with no valid frame for FAILSAFE_TIMEOUT_MS the outputs go to
+// failsafeValues, and stay there until the next valid frame. The host sends
+// a keepalive frame well inside this window (KEYFRAME_INTERVAL in serial_link.py).
+#define FAILSAFE_TIMEOUT_MS 250
+// x, y, z, c, leftpaddle, rightpaddle, left_pot, right_pot, swE, swB, swC, swF.
+// The host replaces these with its mode's FAILSAFE_VALUES (FAILSAFE_SYNC frames);
+// until then: z at -1000 (throttle cut in fly mode, unused by the car modes),
+// car throttle/brake (x) and the other axes and pots centred, paddles released,
+// switches neutral.
+int failsafeValues[12] = {0, 0, -1000, 0, 0, 0, 0, 0, 0, 0, 0, 0};
+unsigned long lastFrameMs = 0;
+bool failsafe = false;
+
+// Telemetry counters (see MSG_TELEMETRY in protocol.py); they wrap
+unsigned long framesApplied = 0;
+uint16_t crcErrors = 0;
+uint16_t badLines = 0;
+byte failsafeTrips = 0;
+// loop() pass times since the last report
+unsigned long loopStartUs = 0;
+unsigned long loopSumUs = 0;
+unsigned int loopCount = 0;
+unsigned long loopMaxUs = 0;
+unsigned long lastTelemetryMs = 0;
+
+// CRC-16/CCITT (poly 0x1021, init 0xFFFF) for host frames: line noise that
+// happens to start with the sync byte passes CRC-8 once in 256 tries, often
+// enough to hold off the failsafe and drive random values to the DACs.
+uint16_t crc16(const byte *data, byte len) {
+  uint16_t crc = 0xFFFF;
+  for (byte i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (byte bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+byte crc8(const byte *data, byte len) {
+  byte crc = 0;
+  for (byte i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (byte bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void writeUint32(byte *p, unsigned long v) {
+  p[0] = v;
+  p[1] = v >> 8;
+  p[2] = v >> 16;
+  p[3] = v >> 24;
+}
+
+void writeUint16(byte *p, uint16_t v) {
+  p[0] = v;
+  p[1] = v >> 8;
+}
+
+void sendDeviceFrame(byte type, const byte *payload, byte len) {
+  byte out[3 + 32 + 1];
+  out[0] = DEVICE_SYNC;
+  out[1] = type;
+  out[2] = len;
+  memcpy(out + 3, payload, len);
+  out[3 + len] = crc8(out + 1, len + 2);
+  Serial.write(out, len + 4);
+}
+
+// Last codes written to each DAC (setup() starts every channel at 0)
+uint16_t lastDac1[4] = {0, 0, 0, 0};
+uint16_t lastDac2[4] = {0, 0, 0, 0};
+
+// Update all four channels of one MCP4728 with a single fast-write
+// transaction (address + 8 bytes, VREF and gain keep their setup() values),
+// and skip the I2C bus entirely when none of the codes changed.
+void writeDac(Adafruit_MCP4728 &dac, uint16_t *last, uint16_t a, uint16_t b, uint16_t c, uint16_t d) {
+  if (a == last[0] && b == last[1] && c == last[2] && d == last[3]) {
+    return;
+  }
+  dac.fastWrite(a, b, c, d);
+  last[0] = a;
+  last[1] = b;
+  last[2] = c;
+  last[3] = d;
+}
+
+int readInt16(const byte *p) {
+  return (int16_t)(p[0] | (p[1] << 8));
+}
+
 void setup() {
   // Start serial communication
   Serial.begin(115200);
@@ -66,107 +186,267 @@ void setup() {
   pinMode(8, OUTPUT);  // rightpaddle - Launch Button
 
   Serial.println("MCP4728 initialized");
+
+  // Neutral outputs until the host sends its first frame
+  enterFailsafe();
+  loopStartUs = micros();
 }
 
-void loop() {
-  // Check if data is available to read
-  if (Serial.available() > 0) {
-    // Read the serial input
-    String input = Serial.readStringUntil('\n');
-
-    // Split the input string by commas
-    int commaIndex1 = input.indexOf(',');
-    int commaIndex2 = input.indexOf(',', commaIndex1 + 1);
-    int commaIndex3 = input.indexOf(',', commaIndex2 + 1);
-    int commaIndex4 = input.indexOf(',', commaIndex3 + 1);
-    int commaIndex5 = input.indexOf(',', commaIndex4 + 1);
-    int commaIndex6 = input.indexOf(',', commaIndex5 + 1);
-    int commaIndex7 = input.indexOf(',', commaIndex6 + 1);
-    int commaIndex8 = input.indexOf(',', commaIndex7 + 1);
-    int commaIndex9 = input.indexOf(',', commaIndex8 + 1);
-    int commaIndex10 = input.indexOf(',', commaIndex9 + 1);
-    int commaIndex11 = input.indexOf(',', commaIndex10 + 1);
-
-    int xAxis = input.substring(0, commaIndex1).toInt();
-    int yAxis = input.substring(commaIndex1 + 1, commaIndex2).toInt();
-    int zAxis = input.substring(commaIndex2 + 1, commaIndex3).toInt();
-    int cAxis = input.substring(commaIndex3 + 1, commaIndex4).toInt();
-    int leftpaddle = input.substring(commaIndex4 + 1, commaIndex5).toInt();
-    int rightpaddle = input.substring(commaIndex5 + 1, commaIndex6).toInt();
-    int left_pot = input.substring(commaIndex6 + 1, commaIndex7).toInt();
-    int right_pot = input.substring(commaIndex7 + 1).toInt();
-    int swE_position = input.substring(commaIndex8 + 1, commaIndex9).toInt();
-    int swB_position = input.substring(commaIndex9 + 1, commaIndex10).toInt();
-    int swC_position = input.substring(commaIndex10 + 1, commaIndex11).toInt();
-    int swF_position = input.substring(commaIndex11 + 1).toInt();
-
-    // Map the axis values (-1000 to 1000) to DAC output values (0 to 4095)
-    int xDacValue = map(xAxis, -1000, 1000, 0, 4095);
-    int yDacValue = map(yAxis, -1000, 1000, 0, 4095);
-    int zDacValue = map(zAxis, 1000, -1000, 0, 4095);
-    int cDacValue = map(cAxis, -1000, 1000, 0, 4095);
-    int leftDacValue = map(left_pot, -1000, 1000, 0, 4095);
-    int rightDacValue = map(right_pot, -1000, 1000, 0, 4095);
-
-    // Set the DAC output values for channels A, B, C, and D
-    mcp.setChannelValue(MCP4728_CHANNEL_A, xDacValue, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-    mcp.setChannelValue(MCP4728_CHANNEL_B, yDacValue, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-    mcp.setChannelValue(MCP4728_CHANNEL_C, zDacValue, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-    mcp.setChannelValue(MCP4728_CHANNEL_D, cDacValue, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-    mcp2.setChannelValue(MCP4728_CHANNEL_A, rightDacValue, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-    mcp2.setChannelValue(MCP4728_CHANNEL_B, leftDacValue, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-    mcp2.setChannelValue(MCP4728_CHANNEL_C, 0, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-    mcp2.setChannelValue(MCP4728_CHANNEL_D, 0, MCP4728_VREF_VDD, MCP4728_GAIN_1X);
-
-    // Handle switches (swE, swB, swC, swF) and paddles
-    if (swE_position == 1) {
+void applyOutputs(int xAxis, int yAxis, int zAxis, int cAxis,
+                  int leftpaddle, int rightpaddle, int left_pot, int right_pot,
+                  int swE_position, int swB_position, int swC_position, int swF_position) {
+  // Map the axis values (-1000 to 1000) to DAC output values (0 to 4095)
+  int xDacValue = map(xAxis, -1000, 1000, 0, 4095);
+  int yDacValue = map(yAxis, -1000, 1000, 0, 4095);
+  int zDacValue = map(zAxis, 1000, -1000, 0, 4095);
+  int cDacValue = map(cAxis, -1000, 1000, 0, 4095);
+  int leftDacValue = map(left_pot, -1000, 1000, 0, 4095);
+  int rightDacValue = map(right_pot, -1000, 1000, 0, 4095);
+
+  // Set the DAC output values for channels A, B, C, and D
+  writeDac(mcp, lastDac1, xDacValue, yDacValue, zDacValue, cDacValue);
+  writeDac(mcp2, lastDac2, rightDacValue, leftDacValue, 0, 0);
+
+  // Handle switches (swE, swB, swC, swF) and paddles
+  if (swE_position == 1) {
     digitalWrite(14, HIGH); // UP
     digitalWrite(15, LOW);
-} else if (swE_position == 0) {  // Explicitly check for neutral (0)
+  } else if (swE_position == 0) {  // Explicitly check for neutral (0)
     digitalWrite(14, HIGH);  // NEUTRAL state
     digitalWrite(15, HIGH);
-} else if (swE_position == -1) {
+  } else if (swE_position == -1) {
     digitalWrite(14, LOW);
     digitalWrite(15, HIGH); // DOWN
+  }
 
-}
-    if (swB_position == 1) {
+  if (swB_position == 1) {
     digitalWrite(10, LOW); // UP
     digitalWrite(16, HIGH);
-} else if (swB_position == 0) {  // Explicitly check for neutral (0)
+  } else if (swB_position == 0) {  // Explicitly check for neutral (0)
     digitalWrite(10, HIGH);  // NEUTRAL state
     digitalWrite(16, HIGH);
-} else if (swB_position == -1) {
+  } else if (swB_position == -1) {
     digitalWrite(10, HIGH);
     digitalWrite(16, LOW); // DOWN
+  }
 
-}
-    if (swF_position == 1) {
+  if (swF_position == 1) {
     digitalWrite(7, LOW); // UP
     digitalWrite(6, HIGH);
-} else if (swF_position == 0) {  // Explicitly check for neutral (0)
+  } else if (swF_position == 0) {  // Explicitly check for neutral (0)
     digitalWrite(7, HIGH);  // NEUTRAL state
     digitalWrite(6, HIGH);
-} else if (swF_position == -1) {
+  } else if (swF_position == -1) {
     digitalWrite(7, HIGH);
     digitalWrite(6, LOW); // DOWN
+  }
 
-}
-
-    if (swC_position == 1) {
+  if (swC_position == 1) {
     digitalWrite(4, LOW); // UP
     digitalWrite(5, HIGH);
-} else if (swC_position == 0) {  // Explicitly check for neutral (0)
+  } else if (swC_position == 0) {  // Explicitly check for neutral (0)
     digitalWrite(4, HIGH);  // NEUTRAL state
     digitalWrite(5, HIGH);
-} else if (swC_position == -1) {
+  } else if (swC_position == -1) {
     digitalWrite(4, HIGH);
     digitalWrite(5, LOW); // DOWN
+  }
 
+  // Handle momentary switches (paddles)
+  digitalWrite(21, (leftpaddle == 1) ? LOW : HIGH); // left paddle - Air brake
+  digitalWrite(8, (rightpaddle == 1) ? LOW : HIGH);  // rightpaddle - Launch button
 }
 
-    // Handle momentary switches (paddles)
-    digitalWrite(21, (leftpaddle == 1) ? LOW : HIGH); // left paddle - Air brake
-    digitalWrite(8, (rightpaddle == 1) ? LOW : HIGH);  // rightpaddle - Launch button
+void enterFailsafe() {
+  failsafe = true;
+  applyOutputs(failsafeValues[0], failsafeValues[1], failsafeValues[2], failsafeValues[3],
+               failsafeValues[4], failsafeValues[5], failsafeValues[6], failsafeValues[7],
+               failsafeValues[8], failsafeValues[9], failsafeValues[10], failsafeValues[11]);
+}
+
+void frameReceived() {
+  lastFrameMs = millis();
+  failsafe = false;
+  framesApplied++;
+}
+
+void sendTelemetry() {
+  byte t[30];
+  writeUint32(t, framesApplied);
+  writeUint16(t + 4, crcErrors);
+  writeUint16(t + 6, badLines);
+  unsigned long meanUs = loopCount ? loopSumUs / loopCount : 0;
+  writeUint16(t + 8, meanUs > 65535 ? 65535 : meanUs);
+  writeUint16(t + 10, loopMaxUs > 65535 ? 65535 : loopMaxUs);
+  t[12] = failsafeTrips;
+  t[13] = failsafe ? 1 : 0;
+  for (byte i = 0; i < 4; i++) {
+    writeUint16(t + 14 + 2 * i, lastDac1[i]);
+    writeUint16(t + 22 + 2 * i, lastDac2[i]);
+  }
+  // Skip a report rather than block the loop when the host is not reading
+  if (Serial.availableForWrite() >= (int)sizeof(t) + 4) {
+    sendDeviceFrame(MSG_TELEMETRY, t, sizeof(t));
+  }
+  loopSumUs = 0;
+  loopCount = 0;
+  loopMaxUs = 0;
+}
+
+void handleTextLine(const String &input) {
+  // Split the input string by commas
+  int commaIndex1 = input.indexOf(',');
+  int commaIndex2 = input.indexOf(',', commaIndex1 + 1);
+  int commaIndex3 = input.indexOf(',', commaIndex2 + 1);
+  int commaIndex4 = input.indexOf(',', commaIndex3 + 1);
+  int commaIndex5 = input.indexOf(',', commaIndex4 + 1);
+  int commaIndex6 = input.indexOf(',', commaIndex5 + 1);
+  int commaIndex7 = input.indexOf(',', commaIndex6 + 1);
+  int commaIndex8 = input.indexOf(',', commaIndex7 + 1);
+  int commaIndex9 = input.indexOf(',', commaIndex8 + 1);
+  int commaIndex10 = input.indexOf(',', commaIndex9 + 1);
+  int commaIndex11 = input.indexOf(',', commaIndex10 + 1);
+  if (commaIndex7 < 0) {
+    badLines++;
+    return;  // Fewer than 8 values: not a frame (noise or a cut-off line)
+  }
+
+  int xAxis = input.substring(0, commaIndex1).toInt();
+  int yAxis = input.substring(commaIndex1 + 1, commaIndex2).toInt();
+  int zAxis = input.substring(commaIndex2 + 1, commaIndex3).toInt();
+  int cAxis = input.substring(commaIndex3 + 1, commaIndex4).toInt();
+  int leftpaddle = input.substring(commaIndex4 + 1, commaIndex5).toInt();
+  int rightpaddle = input.substring(commaIndex5 + 1, commaIndex6).toInt();
+  int left_pot = input.substring(commaIndex6 + 1, commaIndex7).toInt();
+  int right_pot = input.substring(commaIndex7 + 1).toInt();
+  int swE_position = input.substring(commaIndex8 + 1, commaIndex9).toInt();
+  int swB_position = input.substring(commaIndex9 + 1, commaIndex10).toInt();
+  int swC_position = input.substring(commaIndex10 + 1, commaIndex11).toInt();
+  int swF_position = input.substring(commaIndex11 + 1).toInt();
+
+  applyOutputs(xAxis, yAxis, zAxis, cAxis, leftpaddle, rightpaddle,
+               left_pot, right_pot, swE_position, swB_position, swC_position, swF_position);
+  frameReceived();
+}
+
+void consumeFrameBytes(byte n) {
+  memmove(frameBuf, frameBuf + n, frameLen - n);
+  frameLen -= n;
+}
+
+int readAnalog(byte bit) {
+  // 11-bit field (value + 1024) starting at this bit of the channel word (frame bytes 2-11)
+  const byte *p = frameBuf + 2 + (bit >> 3);
+  unsigned long v = ((unsigned long)p[0] | ((unsigned long)p[1] << 8) | ((unsigned long)p[2] << 16)) >> (bit & 7);
+  return (int)(v & 0x7FF) - 1024;
+}
+
+void applyBinaryFrame(byte len) {
+  // The digital word starts at bit 66 of the channel word: bit 2 of byte 10
+  unsigned int digital = (frameBuf[10] | (frameBuf[11] << 8)) >> 2;
+  applyOutputs(readAnalog(0), readAnalog(11), readAnalog(22), readAnalog(33),
+               digital & 1, (digital >> 1) & 1,
+               readAnalog(44), readAnalog(55),
+               ((digital >> 2) & 0x3) - 1, ((digital >> 4) & 0x3) - 1,
+               ((digital >> 6) & 0x3) - 1, ((digital >> 8) & 0x3) - 1);
+  frameReceived();
+
+  if (ENABLE_ECHO && len == FRAME_SIZE_STAMPED) {
+    // seq, host timestamp as received, micros() right after the DAC write
+    byte echo[9];
+    echo[0] = frameBuf[1];
+    memcpy(echo + 1, frameBuf + 12, 4);
+    writeUint32(echo + 5, micros());
+    sendDeviceFrame(MSG_ECHO, echo, sizeof(echo));
+  }
+}
+
+bool isSync(byte b) {
+  return b == FRAME_SYNC || b == FAILSAFE_SYNC;
+}
+
+void applyFailsafeFrame() {
+  // New failsafe values; does not count as a frame for the watchdog
+  for (byte i = 0; i < 12; i++) {
+    failsafeValues[i] = readInt16(frameBuf + 1 + 2 * i);
+  }
+  if (failsafe) {
+    enterFailsafe();
+  }
+}
+
+void processFrameBuffer() {
+  while (frameLen > 0) {
+    byte len;
+    if (frameBuf[0] == FAILSAFE_SYNC) {
+      len = FAILSAFE_FRAME_SIZE;
+    } else {
+      // The frame length is known once the echo flag (byte 11) is in
+      if (frameLen < FLAG_ECHO_BYTE + 1) return;
+      len = (frameBuf[FLAG_ECHO_BYTE] & FLAG_ECHO_MASK) ? FRAME_SIZE_STAMPED : FRAME_SIZE;
+    }
+    if (frameLen < len) return;
+    if (crc16(frameBuf + 1, len - 3) == (frameBuf[len - 2] | (frameBuf[len - 1] << 8))) {
+      if (frameBuf[0] == FAILSAFE_SYNC) {
+        applyFailsafeFrame();  // Text hosts send these too, so they do not latch binaryMode
+      } else {
+        binaryMode = true;
+        applyBinaryFrame(len);
+      }
+      consumeFrameBytes(len);
+    } else {
+      // Bad frame: resync on the next sync byte inside the buffer, if any
+      crcErrors++;
+      byte next = 1;
+      while (next < frameLen && !isSync(frameBuf[next])) next++;
+      consumeFrameBytes(next);
+    }
+  }
+}
+
+void loop() {
+  unsigned long nowUs = micros();
+  unsigned long loopUs = nowUs - loopStartUs;
+  loopStartUs = nowUs;
+  loopSumUs += loopUs;
+  loopCount++;
+  if (loopUs > loopMaxUs) loopMaxUs = loopUs;
+
+  // Check if data is available to read
+  while (Serial.available() > 0) {
+    if (frameLen == 0 && !binaryMode && (lineLen > 0 || !isSync(Serial.peek()))) {
+      char c = Serial.read();
+      if (c == '\n') {
+        lineBuf[lineLen] = '\0';
+        if (lineOverflow) {
+          badLines++;
+        } else {
+          handleTextLine(String(lineBuf));
+        }
+        lineLen = 0;
+        lineOverflow = false;
+      } else if (lineLen < LINE_MAX - 1) {
+        lineBuf[lineLen++] = c;
+      } else {
+        lineOverflow = true;
+      }
+      continue;
+    }
+    byte b = Serial.read();
+    if (frameLen == 0 && !isSync(b)) {
+      continue;  // Skip noise until the next sync byte
+    }
+    frameBuf[frameLen++] = b;
+    processFrameBuffer();
+  }
+
+  if (!failsafe && millis() - lastFrameMs > FAILSAFE_TIMEOUT_MS) {
+    failsafeTrips++;
+    enterFailsafe();
+  }
+
+  if (TELEMETRY_INTERVAL_MS && millis() - lastTelemetryMs >= TELEMETRY_INTERVAL_MS) {
+    lastTelemetryMs = millis();
+    sendTelemetry();
   }
 }
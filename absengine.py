@@ -0,0 +1,209 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# ABS pulse engine with its own phase, plus a headless benchmark of how far
+# the output's pulse edges land from where they should be:
+#
+#   python absengine.py --rate 100 --frequency 20 --duty 0.75 --seconds 5
+
+import argparse
+import math
+import time
+from bisect import bisect_right
+
+from curves import PEDAL_TRAVEL
+from scheduler import LoopScheduler
+
+EDGE_EPSILON = 1e-6        # Phase slack, so an update made at an edge lands on its far side
+
+def duty_table(points, travel=PEDAL_TRAVEL):
+    """
+    Precompute the applied fraction of each pulse for every brake travel
+    0..travel from [(travel, duty), ...], linearly interpolated and held
+    flat past the end points. A duty of 1.0 means no ABS at that travel.
+    """
+    xs = [float(p[0]) for p in points]
+    ys = [float(p[1]) for p in points]
+    table = []
+    for v in range(travel + 1):
+        if v <= xs[0]:
+            table.append(ys[0])
+        elif v >= xs[-1]:
+            table.append(ys[-1])
+        else:
+            i = bisect_right(xs, v) - 1
+            table.append(ys[i] + (ys[i + 1] - ys[i]) * (v - xs[i]) / (xs[i + 1] - xs[i]))
+    return table
+
+def step_curve(threshold, duty):
+    """Duty curve of the classic hard threshold: no ABS below it, duty at and above it."""
+    return ((threshold - 1, 1.0), (threshold, duty))
+
+class AbsEngine:
+    """
+    ABS pulse timing from a phase accumulator advanced by the loop's own
+    monotonic timestamps. The phase starts at 0 (brake applied) when ABS
+    engages, so pulses are the same on every run whatever the wall clock
+    says. next_edge() gives the exact time of the next pulse edge, for
+    loops that send an extra frame there instead of waiting for a tick.
+    """
+
+    def __init__(self, frequency, duty_points, enabled=True):
+        self.frequency = frequency
+        self.duty = duty_table(duty_points)
+        self.enabled = enabled
+        self.active = False
+        self.applied = True
+        self.phase = 0.0
+        self.current_duty = 1.0
+        self.last = None
+        self.engagements = 0
+        self.edges = 0
+
+    def update(self, now, brake):
+        """
+        Advance to now for a brake travel of brake (0..PEDAL_TRAVEL); returns
+        True while the brake may be applied, False in the release part.
+        """
+        duty = self.duty[0 if brake <= 0 else PEDAL_TRAVEL if brake >= PEDAL_TRAVEL else brake]
+        if not self.enabled or duty >= 1.0:
+            self.active = False
+            self.applied = True
+            self.last = now
+            return True
+        if not self.active:
+            self.active = True
+            self.phase = 0.0
+            self.engagements += 1
+        else:
+            phase = self.phase + (now - self.last) * self.frequency
+            if phase >= 1.0 - EDGE_EPSILON:
+                phase -= math.floor(phase + EDGE_EPSILON)
+            self.phase = phase
+        self.last = now
+        self.current_duty = duty
+        applied = self.phase < duty - EDGE_EPSILON
+        if applied != self.applied:
+            self.edges += 1
+            self.applied = applied
+        return applied
+
+    def next_edge(self):
+        """Clock time of the next pulse edge at the current duty, or None when ABS is idle."""
+        if not self.active:
+            return None
+        target = self.current_duty if self.applied else 1.0
+        return self.last + (target - self.phase) / self.frequency
+
+# -----------------------------------------------------------------------------
+# Edge-error benchmark
+# -----------------------------------------------------------------------------
+
+class SimClock:
+    """Simulated clock whose sleep() advances time exactly, for jitter-free runs."""
+
+    def __init__(self, start=0.0):
+        self.t = start
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += seconds
+
+def edge_errors(transitions, origin, frequency, duty):
+    """
+    Lateness of each observed (time, applied) transition against the ideal
+    pulse grid starting at origin: apply edges at k/f, release edges at (k + duty)/f.
+    """
+    errors = []
+    for t, applied in transitions:
+        offset = 0.0 if applied else duty
+        k = math.floor((t - origin) * frequency - offset + 0.5)
+        errors.append(t - (origin + (k + offset) / frequency))
+    return errors
+
+def run_benchmark(method, rate_hz, seconds, frequency, duty, realtime=False, epoch=1.7e9):
+    """
+    Hold full brake for seconds with the loop at rate_hz and return the edge
+    errors in seconds. method is "legacy" (now % period on a wall-clock
+    sized timestamp, tick-only), "ticks" (engine, tick-only) or "edges"
+    (engine plus an extra update at each edge).
+    """
+    if realtime:
+        clock, sleep = time.perf_counter, time.sleep
+    else:
+        sim = SimClock()
+        clock, sleep = sim, sim.sleep
+    scheduler = LoopScheduler(rate_hz, clock=clock, sleep=sleep, spin_margin=0.0005 if realtime else 0.0)
+    engine = AbsEngine(frequency, ((0, duty),))
+    period = 1.0 / frequency
+    transitions = []
+    state = None
+    origin = None
+    start = None
+
+    def observe(now):
+        nonlocal state
+        if method == "legacy":
+            wall = now + epoch
+            applied = (wall % period) < duty * period
+            at = wall
+        else:
+            applied = engine.update(now, PEDAL_TRAVEL)
+            at = now
+        if state is not None and applied != state:
+            transitions.append((at, applied))
+        state = applied
+
+    while True:
+        now = scheduler.wait()
+        if start is None:
+            start = now
+            origin = 0.0 if method == "legacy" else now
+        if now - start >= seconds:
+            break
+        observe(now)
+        if method == "edges":
+            edge = engine.next_edge()
+            if edge is not None and edge < scheduler.deadline:
+                observe(scheduler.sleep_until(edge))
+    return edge_errors(transitions, origin, frequency, duty)
+
+def format_errors(method, errors):
+    if not errors:
+        return f"{method:<7} no edges"
+    ordered = sorted(abs(e) for e in errors)
+    last = len(ordered) - 1
+    p50 = ordered[last // 2]
+    p99 = ordered[min(last, int(round(0.99 * last)))]
+    return (f"{method:<7} {len(errors):6} edges  mean {sum(ordered) / len(ordered) * 1e6:9.1f} us  "
+            f"p50 {p50 * 1e6:9.1f} us  p99 {p99 * 1e6:9.1f} us  max {ordered[-1] * 1e6:9.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ABS pulse-edge timing error headless.")
+    parser.add_argument("--rate", type=float, default=100, help="Loop tick rate in Hz")
+    parser.add_argument("--frequency", type=float, default=20, help="ABS pulses per second")
+    parser.add_argument("--duty", type=float, default=0.75, help="Applied fraction of each pulse")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--realtime", action="store_true",
+                        help="Run on the real clock with sleeps (includes scheduler jitter)")
+    args = parser.parse_args()
+
+    clock = "real clock" if args.realtime else "simulated clock"
+    print(f"{args.frequency:g} Hz pulses at {args.duty:g} duty, {args.rate:g} Hz loop, {clock}")
+    for method in ("legacy", "ticks", "edges"):
+        errors = run_benchmark(method, args.rate, args.seconds, args.frequency, args.duty, args.realtime)
+        print(format_errors(method, errors))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# Microbenchmarks of the per-frame code in ns per call, checked against
+# stored baselines:
+#
+#   python bench.py --save          record baselines for this machine
+#   python bench.py                 compare; exits 1 if a case got slower than the tolerance
+#   python bench.py --only encode   cases whose name contains "encode"
+#
+# Each timing run of a case is paired with a run of a fixed calibration loop,
+# and cases are compared as their median ratio to it, so a busy or throttled
+# machine does not show up as a regression. A case over the tolerance is
+# measured again CONFIRM_RUNS times and only fails when every run is over it.
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+
+from curves import PEDAL_TRAVEL, ResponseCurves, mix_pedals
+from filters import Ema, FilterChain, Median
+from harness import virtual_joysticks
+from mapping import compile_profile, load_profile
+from modes import MODES, load_mode, make_processor
+from powertrain import Powertrain
+from protocol import BinaryEncoder, TextEncoder
+from ratecontrol import RateController
+from serial_link import FrameSender
+
+# -------------------------------
+# Benchmark Config
+# -------------------------------
+BASELINE_PATH = "bench_baseline.json"
+TOLERANCE     = 0.25     # Fraction slower than the baseline, relative to the calibration loop, that still passes
+REPEATS       = 25       # Timing runs per case, each followed by a calibration run; the medians count
+RUN_TIME      = 0.025    # Seconds per timing run
+CONFIRM_RUNS  = 2        # Extra measurements a case over the tolerance needs to fail in too
+SAMPLES       = 1024     # Precomputed inputs each case cycles through
+
+def _cycle(items):
+    return itertools.cycle(items).__next__
+
+def _clock(step):
+    """A tick clock for stateful cases: each call is one tick later."""
+    t = [0.0]
+    def now():
+        t[0] += step
+        return t[0]
+    return now
+
+def _mode_inputs(mode, rng):
+    module = load_mode(mode)
+    return [tuple(rng.randint(-1000, 1000) for _ in module.INPUTS) for _ in range(SAMPLES)]
+
+def case_read(mode):
+    def setup(rng):
+        module = load_mode(mode)
+        profile = load_profile(module.PROFILE)
+        joysticks = virtual_joysticks(profile)
+        for js in joysticks.values():
+            js.axes[:] = [rng.uniform(-1, 1) for _ in js.axes]
+        inputs = compile_profile(profile, joysticks, module.INPUTS)
+        return inputs.read
+    return setup
+
+def case_step(mode):
+    def setup(rng):
+        module = load_mode(mode)
+        processor = make_processor(module, load_profile(module.PROFILE))
+        step = processor.step
+        values = _cycle(_mode_inputs(mode, rng))
+        now = _clock(1.0 / module.LOOP_RATE_HZ)
+        return lambda: step(values(), now())
+    return setup
+
+def setup_curve(rng):
+    curve = ResponseCurves({"throttle": {"deadzone": 0.03, "expo": 0.3}}).throttle
+    travel = _cycle([rng.randint(0, PEDAL_TRAVEL) for _ in range(SAMPLES)])
+    return lambda: curve.map(travel())
+
+def setup_mix(rng):
+    curves = ResponseCurves()
+    pedals = curves.pedals
+    axes = _cycle([(rng.randint(-1000, 1000), rng.randint(-1000, 1000)) for _ in range(SAMPLES)])
+    def run():
+        y, z = axes()
+        return mix_pedals(*pedals(y, z))
+    return run
+
+def setup_braking(rng):
+    module = load_mode("abs")
+    processor = make_processor(module, load_profile(module.PROFILE))
+    braking = processor.apply_braking
+    # Mostly braking, some hard enough for ABS, some throttle and handbrake
+    samples = []
+    for _ in range(SAMPLES):
+        brk = rng.randint(0, PEDAL_TRAVEL)
+        combined = -brk // 2 if rng.random() < 0.8 else rng.randint(0, 1000)
+        samples.append((combined, brk, 1000 if rng.random() < 0.95 else rng.randint(-1000, 500)))
+    inputs = _cycle(samples)
+    now = _clock(1.0 / module.LOOP_RATE_HZ)
+    def run():
+        combined, brk, handbrake = inputs()
+        return braking(now(), 0.01, combined, brk, handbrake)
+    return run
+
+def setup_powertrain(rng):
+    module = load_mode("paddleshift")
+    pt = Powertrain(module.GEAR_RATIOS, module.SHIFT_TIMES, module.RAMP_SHAPE,
+                    shift_cut=0.05, blip_time=0.08, blip_level=300)
+    # Throttle held with a paddle press every 50 ticks, up through the gears and back down
+    samples = []
+    for i in range(SAMPLES):
+        up = (i // 50) % 12 < 6 and i % 50 == 0
+        down = (i // 50) % 12 >= 6 and i % 50 == 0
+        thr = rng.randint(1200, PEDAL_TRAVEL)
+        samples.append((mix_pedals(thr, 0), thr, 0, down, up))
+    inputs = _cycle(samples)
+    now = _clock(1.0 / module.LOOP_RATE_HZ)
+    return lambda: pt.update(now(), *inputs())
+
+def setup_filters(rng):
+    chain = FilterChain([Median(5), Ema(8.0)])
+    values = _cycle([rng.randint(-1000, 1000) for _ in range(SAMPLES)])
+    return lambda: chain.step(values(), 0.01)
+
+def _frames(rng):
+    return [tuple(rng.randint(-1000, 1000) for _ in range(4)) + (rng.randint(0, 1), rng.randint(0, 1))
+            + tuple(rng.randint(-1000, 1000) for _ in range(2)) + tuple(rng.randint(-1, 1) for _ in range(4))
+            for _ in range(SAMPLES)]
+
+def setup_encode(encoder):
+    def setup(rng):
+        encode = encoder().encode
+        frames = _cycle(_frames(rng))
+        return lambda: encode(frames())
+    return setup
+
+def setup_send(rng):
+    sender = FrameSender(lambda frame: None, BinaryEncoder(), changes_only=True, deadband=2)
+    # A slowly moving stick: most frames fall inside the deadband
+    base = _frames(rng)[0]
+    frames = _cycle([tuple(v + rng.randint(-3, 3) for v in base) for _ in range(SAMPLES)])
+    now = _clock(0.005)
+    return lambda: sender.send(frames(), now())
+
+def setup_send_rated(rng):
+    # Ticks faster than a 57600 baud line carries text frames, so the limit is holding frames back
+    sender = FrameSender(lambda frame: None, TextEncoder(), changes_only=True,
+                         rate=RateController(57600, lambda: 0))
+    frames = _cycle(_frames(rng))
+    now = _clock(0.002)
+    return lambda: sender.send(frames(), now())
+
+def setup_calibration(rng):
+    # Plain interpreter work of the same kind as the cases: calls, tuple
+    # unpacking, arithmetic and comparisons. Never change it, or saved
+    # baselines stop being comparable.
+    values = _cycle([(rng.randint(-1000, 1000), rng.randint(-1000, 1000)) for _ in range(SAMPLES)])
+    def run():
+        a, b = values()
+        return min(1000, max(-1000, (a * 3 + b) >> 2))
+    return run
+
+CASES = dict(
+    [(f"read.{mode}", case_read(mode)) for mode in MODES]
+    + [
+        ("curve.throttle", setup_curve),
+        ("mix.pedals", setup_mix),
+        ("abs.braking", setup_braking),
+        ("powertrain.update", setup_powertrain),
+        ("filters.median_ema", setup_filters),
+        ("encode.text", setup_encode(TextEncoder)),
+        ("encode.binary", setup_encode(BinaryEncoder)),
+        ("send.changes_only", setup_send),
+        ("send.rate_limited", setup_send_rated),
+    ]
+    + [(f"step.{mode}", case_step(mode)) for mode in MODES]
+)
+
+def _timer(setup, seed):
+    timer = timeit.Timer(setup(random.Random(seed)))
+    number, elapsed = timer.autorange()
+    return timer, max(1, int(number * RUN_TIME / elapsed))
+
+def measure(setup, seed=0):
+    """
+    REPEATS runs of about RUN_TIME of the case, each followed by one of the
+    calibration loop. Returns the median ns per call and the median ratio
+    of case run to calibration run.
+    """
+    timer, number = _timer(setup, seed)
+    cal_timer, cal_number = _timer(setup_calibration, seed)
+    times = []
+    ratios = []
+    for _ in range(REPEATS):
+        t = timer.timeit(number) / number
+        ratios.append(t / (cal_timer.timeit(cal_number) / cal_number))
+        times.append(t)
+    return statistics.median(times) * 1e9, statistics.median(ratios)
+
+def machine():
+    return f"{platform.python_implementation()} {platform.python_version()} {platform.machine()} {platform.node()}"
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the per-frame code against stored baselines.")
+    parser.add_argument("--only", help="Run only cases whose name contains this text")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baselines")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Fraction slower than the baseline that still passes")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    if baseline and "ratios" not in baseline:
+        print(f"{args.baseline} predates calibrated baselines; run with --save to record new ones.")
+        baseline = None
+    stored = baseline["ratios"] if baseline else {}
+    if baseline and baseline.get("machine") != machine():
+        print(f"Baselines were recorded on {baseline.get('machine')}, not this machine; expect noise.")
+
+    def report(name, ns, ratio, note=""):
+        line = f"{name:<22} {ns:10.1f} ns  x{ratio:7.3f} cal"
+        if name in stored:
+            change = ratio / stored[name] - 1
+            line += f"   baseline x{stored[name]:7.3f}  {change * 100:+6.1f}%"
+            if change > args.tolerance:
+                line += note or "  over tolerance"
+        print(line)
+        return name in stored and ratio / stored[name] - 1 > args.tolerance
+
+    results = {}
+    suspects = []
+    for name, setup in CASES.items():
+        if args.only and args.only not in name:
+            continue
+        ns, ratio = measure(setup)
+        results[name] = (ns, ratio)
+        if report(name, ns, ratio):
+            suspects.append(name)
+
+    # A slow run is often the machine, not the code: only a repeatable slowdown fails
+    regressions = []
+    if suspects and not args.save:
+        print(f"Measuring {len(suspects)} case(s) again to confirm:")
+        for name in suspects:
+            for attempt in range(CONFIRM_RUNS):
+                confirmed = report(name, *measure(CASES[name]), note="  REGRESSION" if attempt == CONFIRM_RUNS - 1 else "")
+                if not confirmed:
+                    break
+            if confirmed:
+                regressions.append(name)
+
+    if args.save:
+        ratios = dict(stored, **{name: ratio for name, (_, ratio) in results.items()})
+        ns = dict(baseline["ns"] if baseline else {}, **{name: ns for name, (ns, _) in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine(), "ratios": ratios, "ns": ns}, f, indent=2)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%} "
+              f"in {CONFIRM_RUNS + 1} runs: {', '.join(regressions)}")
+        sys.exit(1)
+    elif not baseline:
+        print(f"No baselines in {args.baseline}; run with --save to record them.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import math
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the batch path (apply_array, trace tuning)
+    np = None
+
+# -----------------------------------------------------------------------------
+# Response curves (the optional "curves" section of a profile)
+#
+#   "curves": {
+#     "steering": {"deadzone": 0.02, "expo": 0.3},
+#     "throttle": {"deadzone": 0.03, "saturation": 0.97},
+#     "brake":    {"points": [[0, 0], [0.5, 0.3], [1, 1]]}
+#   }
+#
+#   deadzone    fraction of travel (from centre, or from rest for pedals) read as 0
+#   saturation  fraction of travel that already gives full output
+#   expo        0..1 blend towards a cubic response, softer around the start
+#   points      [[in, out], ...] on 0..1, joined by a monotone cubic spline
+#
+# Steering shapes the x_axis (-1000..1000) symmetrically about the centre;
+# throttle and brake shape pedal travel (0..2000) in the combine step.
+# -----------------------------------------------------------------------------
+
+AXIS_SCALE = 1000
+PEDAL_TRAVEL = 2 * AXIS_SCALE
+CURVE_RANGES = {
+    "steering": (-AXIS_SCALE, AXIS_SCALE),
+    "throttle": (0, PEDAL_TRAVEL),
+    "brake":    (0, PEDAL_TRAVEL),
+}
+CURVE_INPUTS = {"steering": "x_axis", "throttle": "y_axis", "brake": "z_axis"}
+CURVE_KEYS = ("deadzone", "expo", "points", "saturation")
+
+def validate_curves(curves, profile_name="?"):
+    """Check a profile's "curves" section; raises ValueError on the first problem."""
+    if not isinstance(curves, dict):
+        raise ValueError(f"Profile {profile_name}: curves must be a table of curve settings")
+    for name, spec in curves.items():
+        where = f"Profile {profile_name}: curve {name!r}"
+        if name not in CURVE_RANGES:
+            raise ValueError(f"{where} is unknown (expected one of {', '.join(CURVE_RANGES)})")
+        unknown = set(spec) - set(CURVE_KEYS)
+        if unknown:
+            raise ValueError(f"{where} has unknown settings: {', '.join(sorted(unknown))}")
+        deadzone = spec.get("deadzone", 0.0)
+        saturation = spec.get("saturation", 1.0)
+        if not 0.0 <= deadzone < saturation <= 1.0:
+            raise ValueError(f"{where} needs 0 <= deadzone < saturation <= 1")
+        if not 0.0 <= spec.get("expo", 0.0) <= 1.0:
+            raise ValueError(f"{where} needs 0 <= expo <= 1")
+        points = spec.get("points")
+        if points is not None:
+            if len(points) < 2 or any(len(p) != 2 for p in points):
+                raise ValueError(f"{where} needs at least two [in, out] points")
+            xs = [p[0] for p in points]
+            if any(b <= a for a, b in zip(xs, xs[1:])):
+                raise ValueError(f"{where} points must have increasing inputs")
+            if any(not (0.0 <= v <= 1.0) for p in points for v in p):
+                raise ValueError(f"{where} points must lie within 0..1")
+
+def monotone_spline(points):
+    """Fritsch-Carlson monotone cubic through [[x, y], ...]; returns f(x)."""
+    xs = [float(p[0]) for p in points]
+    ys = [float(p[1]) for p in points]
+    n = len(xs)
+    slopes = [(ys[i + 1] - ys[i]) / (xs[i + 1] - xs[i]) for i in range(n - 1)]
+    tangents = [slopes[0]]
+    for i in range(1, n - 1):
+        a, b = slopes[i - 1], slopes[i]
+        tangents.append(0.0 if a * b <= 0 else (a + b) / 2)
+    tangents.append(slopes[-1])
+    for i, d in enumerate(slopes):
+        if d == 0:
+            tangents[i] = tangents[i + 1] = 0.0
+            continue
+        a, b = tangents[i] / d, tangents[i + 1] / d
+        s = a * a + b * b
+        if s > 9:
+            k = 3 / math.sqrt(s)
+            tangents[i], tangents[i + 1] = k * a * d, k * b * d
+
+    def spline(x):
+        if x <= xs[0]:
+            return ys[0]
+        if x >= xs[-1]:
+            return ys[-1]
+        i = min(bisect_right(xs, x) - 1, n - 2)
+        h = xs[i + 1] - xs[i]
+        t = (x - xs[i]) / h
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * ys[i] + (t3 - 2 * t2 + t) * h * tangents[i]
+                + (3 * t2 - 2 * t3) * ys[i + 1] + (t3 - t2) * h * tangents[i + 1])
+
+    return spline
+
+class Curve:
+    """
+    A response curve precomputed once into a lookup table over every integer
+    input from lo to hi, so shaping a value per frame is a single index.
+    A range with lo < 0 is treated as centred (symmetric about 0, lo == -hi).
+    """
+
+    def __init__(self, lo, hi, deadzone=0.0, expo=0.0, points=None, saturation=1.0):
+        self.lo = lo
+        self.hi = hi
+        self.deadzone = deadzone
+        self.expo = expo
+        self.saturation = saturation
+        self.spline = monotone_spline(points) if points else None
+        self.table = [self._level(v) for v in range(lo, hi + 1)]
+        self.identity = self.table == list(range(lo, hi + 1))
+        self._array = None
+
+    def shape(self, t):
+        """Shape a travel fraction 0..1 into an output fraction 0..1."""
+        if t <= self.deadzone:
+            return 0.0
+        t = min(1.0, (t - self.deadzone) / (self.saturation - self.deadzone))
+        if self.expo:
+            t = (1 - self.expo) * t + self.expo * t * t * t
+        if self.spline:
+            t = min(1.0, max(0.0, self.spline(t)))
+        return t
+
+    def _level(self, value):
+        if self.lo < 0:
+            out = round(self.shape(abs(value) / self.hi) * self.hi)
+            return -out if value < 0 else out
+        span = self.hi - self.lo
+        return self.lo + round(self.shape((value - self.lo) / span) * span)
+
+    def map(self, value):
+        """Shaped output for one integer input; inputs outside lo..hi are clamped."""
+        if value <= self.lo:
+            return self.table[0]
+        if value >= self.hi:
+            return self.table[-1]
+        return self.table[value - self.lo]
+
+    def apply_array(self, values):
+        """Batch path: shape a whole numpy array of integer inputs at once."""
+        if np is None:
+            raise RuntimeError("apply_array() needs numpy")
+        if self._array is None:
+            self._array = np.asarray(self.table, dtype=np.int16)
+        index = np.clip(np.asarray(values, dtype=np.int32), self.lo, self.hi) - self.lo
+        return self._array[index]
+
+class ResponseCurves:
+    """
+    The steering, throttle and brake curves of one profile. Curves the
+    profile does not set are the identity, so the output is unchanged.
+    """
+
+    def __init__(self, curves=None):
+        curves = curves or {}
+        validate_curves(curves)
+        self.steering = Curve(*CURVE_RANGES["steering"], **curves.get("steering", {}))
+        self.throttle = Curve(*CURVE_RANGES["throttle"], **curves.get("throttle", {}))
+        self.brake = Curve(*CURVE_RANGES["brake"], **curves.get("brake", {}))
+
+    def pedals(self, y_axis, z_axis):
+        """Shaped (throttle, brake) travel, 0..PEDAL_TRAVEL, from the raw pedal axes (AXIS_SCALE at rest)."""
+        return self.throttle.map(AXIS_SCALE - y_axis), self.brake.map(AXIS_SCALE - z_axis)
+
+    def items(self):
+        return (("steering", self.steering), ("throttle", self.throttle), ("brake", self.brake))
+
+def mix_pedals(thr, brk):
+    """Combined output -1000..1000 from pedal travel: the larger pedal wins, brake negative."""
+    return int((thr if thr > brk else -brk) / 2)
+
+def trace_inputs(trace, profile):
+    """
+    Rebuild the quantized x/y/z axis reads from a recorded trace as numpy
+    arrays, exactly as MappingPlan.read() would have produced them, and turn
+    them into curve inputs: steering position and throttle/brake pedal travel.
+    """
+    records = trace.as_array()
+    roles = {dev["role"] for dev in trace.devices}
+    by_name = {ch["name"]: ch for ch in profile["channels"]}
+    inputs = {}
+    for curve, name in CURVE_INPUTS.items():
+        ch = by_name.get(name)
+        raw = np.full(len(records), ch.get("default", 0) if ch else 0, dtype=np.int32)
+        if ch and ch["type"] == "axis" and ch["device"] in roles:
+            axes = records[f"{ch['device']}_axes"]
+            if ch["index"] < axes.shape[1]:
+                scale = ch.get("scale", AXIS_SCALE)
+                if ch.get("invert"):
+                    scale = -scale
+                raw = np.trunc(axes[:, ch["index"]].astype(np.float64) * scale).astype(np.int32)
+        inputs[curve] = raw if curve == "steering" else AXIS_SCALE - raw
+    return records["t"], inputs
+
+def main():
+    from mapping import load_profile
+    from recorder import TraceFile
+
+    parser = argparse.ArgumentParser(description="Apply response curves to a recorded trace for offline tuning.")
+    parser.add_argument("trace", help="Trace file written with RECORD_PATH")
+    parser.add_argument("--profile", required=True, help="Profile the trace was recorded with")
+    parser.add_argument("--curves", help="JSON file with a curves table to try instead of the profile's")
+    parser.add_argument("--csv", help="Write t and each curve's input and output to this CSV file")
+    args = parser.parse_args()
+    if np is None:
+        raise SystemExit("Trace tuning needs numpy")
+
+    profile = load_profile(args.profile)
+    spec = profile.get("curves")
+    if args.curves:
+        with open(args.curves) as f:
+            spec = json.load(f)
+    curves = ResponseCurves(spec)
+
+    trace = TraceFile(args.trace)
+    t, inputs = trace_inputs(trace, profile)
+    outputs = {name: curve.apply_array(inputs[name]) for name, curve in curves.items()}
+    print(f"{len(t)} records")
+    for name, curve in curves.items():
+        lo, hi = CURVE_RANGES[name]
+        dead = np.count_nonzero(outputs[name] == (0 if lo < 0 else lo))
+        full = np.count_nonzero(np.abs(outputs[name]) >= hi)
+        n = max(len(t), 1)
+        print(f"  {name:<8} {'identity' if curve.identity else 'shaped':<8} "
+              f"mean |in| {np.abs(inputs[name]).mean() if len(t) else 0:7.1f}  "
+              f"mean |out| {np.abs(outputs[name]).mean() if len(t) else 0:7.1f}  "
+              f"{dead * 100 / n:5.1f}% at rest  {full * 100 / n:5.1f}% at full")
+    if args.csv:
+        names = [name for name, _ in curves.items()]
+        with open(args.csv, "w") as f:
+            f.write("t," + ",".join(f"{n}_in,{n}_out" for n in names) + "\n")
+            for i in range(len(t)):
+                f.write(f"{t[i]:.6f}," + ",".join(f"{inputs[n][i]},{outputs[n][i]}" for n in names) + "\n")
+    trace.close()
+
+if __name__ == "__main__":
+    main()
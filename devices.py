@@ -0,0 +1,414 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+
+import pygame
+import serial
+import serial.tools.list_ports
+
+# -------------------------------
+# Device Discovery Config
+# -------------------------------
+DEVICE_CACHE       = os.path.join(os.path.expanduser("~"), ".rcsim_devices.json")
+RECONNECT_INTERVAL = 0.25   # Seconds between checks for a lost port or a changed set of joysticks
+
+def init_joysticks():
+    """
+    Initialize only what joystick input needs, instead of pygame.init()
+    (which also opens audio, fonts, etc.): the joystick module, plus the
+    display module because pygame's event queue lives there. No window is opened.
+    """
+    pygame.display.init()
+    pygame.joystick.init()
+
+# -----------------------------------------------------------------------------
+# Serial ports
+#
+#   A port spec is a device name ("COM5", "/dev/ttyACM0"), "VID:PID" in hex
+#   ("2341:8036"), "serial=<serial number>" or "name=<pattern>" matched
+#   against the port's description, product and manufacturer.
+# -----------------------------------------------------------------------------
+
+def port_identity(port):
+    return {"device": port.device, "vid": port.vid, "pid": port.pid,
+            "serial": port.serial_number, "description": port.description}
+
+def match_port(spec, ports):
+    """First port matching spec, or None."""
+    spec = spec.strip()
+    if spec.startswith("serial="):
+        want = spec[len("serial="):]
+        return next((p for p in ports if p.serial_number == want), None)
+    if spec.startswith("name="):
+        pattern = spec[len("name="):].lower()
+        for p in ports:
+            fields = (p.description, getattr(p, "product", None), getattr(p, "manufacturer", None))
+            if any(f and fnmatch.fnmatch(f.lower(), pattern) for f in fields):
+                return p
+        return None
+    m = re.fullmatch(r"([0-9a-fA-F]{4}):([0-9a-fA-F]{4})", spec)
+    if m:
+        vid, pid = int(m.group(1), 16), int(m.group(2), 16)
+        return next((p for p in ports if p.vid == vid and p.pid == pid), None)
+    return next((p for p in ports if p.device == spec), None)
+
+def find_port(identity, ports):
+    """
+    The port a stored identity refers to now: by serial number when the
+    device has one, else by VID/PID (preferring the same device name),
+    else by device name. The device name may change across replugs.
+    """
+    if identity.get("serial"):
+        return next((p for p in ports if p.serial_number == identity["serial"]
+                     and p.vid == identity.get("vid")), None)
+    if identity.get("vid") is not None:
+        candidates = [p for p in ports if p.vid == identity["vid"] and p.pid == identity.get("pid")]
+        same = [p for p in candidates if p.device == identity.get("device")]
+        return (same or candidates or [None])[0]
+    return next((p for p in ports if p.device == identity.get("device")), None)
+
+def prompt_serial_port(ports):
+    if not ports:
+        print("No serial ports found. Make sure your Arduino is plugged in.")
+        return None
+    print("Available serial ports:")
+    for i, port in enumerate(ports):
+        print(f"{i}: {port.device} — {port.description}")
+    idx = int(input("Select the Arduino port index: "))
+    return ports[idx]
+
+# -----------------------------------------------------------------------------
+# Joysticks
+#
+#   A joystick spec is a name pattern ("*G29*"), "guid=<guid>" or "#<index>".
+# -----------------------------------------------------------------------------
+
+def joystick_guid(js):
+    return js.get_guid() if hasattr(js, "get_guid") else ""
+
+class JoystickFinder:
+    """
+    Opens joysticks by index only when they are looked at, so resolving a
+    cached mapping touches just the devices it names.
+    """
+
+    def __init__(self):
+        self.count = pygame.joystick.get_count()
+        self.opened = {}
+
+    def get(self, index):
+        js = self.opened.get(index)
+        if js is None:
+            js = pygame.joystick.Joystick(index)
+            js.init()
+            self.opened[index] = js
+        return js
+
+    def identity(self, index):
+        js = self.get(index)
+        return {"name": js.get_name(), "guid": joystick_guid(js), "index": index}
+
+    def match(self, spec, taken=()):
+        """Index of the first free joystick matching spec, or None."""
+        if spec.startswith("#"):
+            index = int(spec[1:])
+            return index if index < self.count and index not in taken else None
+        for index in range(self.count):
+            if index in taken:
+                continue
+            js = self.get(index)
+            if spec.startswith("guid="):
+                if joystick_guid(js) == spec[len("guid="):]:
+                    return index
+            elif fnmatch.fnmatch(js.get_name().lower(), spec.lower()):
+                return index
+        return None
+
+    def find(self, identity, taken=()):
+        """Index of the joystick a stored identity refers to; its old index is tried first."""
+        def same(index):
+            js = self.get(index)
+            return js.get_name() == identity["name"] and joystick_guid(js) == identity.get("guid", "")
+        old = identity.get("index")
+        if old is not None and old < self.count and old not in taken and same(old):
+            return old
+        return next((i for i in range(self.count) if i not in taken and same(i)), None)
+
+def select_joysticks(profile, finder=None, devices=None):
+    """
+    Prompt for one joystick per device role in the profile (or just the given devices).
+    Returns {role: joystick index or None}, or None if too few joysticks are connected.
+    """
+    finder = finder or JoystickFinder()
+    count = finder.count
+    required = sum(1 for dev in profile["devices"] if not dev.get("optional"))
+    if count < required:
+        print(f"Found {count} joystick(s), the {profile['name']} profile needs {required}. "
+              "Make sure your controllers are connected.")
+        return None
+
+    print("Available joysticks:")
+    for i in range(count):
+        print(f"{i}: {finder.get(i).get_name()}")
+
+    selected = {}
+    for dev in devices if devices is not None else profile["devices"]:
+        if dev.get("optional") and not input(dev["ask"]).lower().startswith('y'):
+            selected[dev["role"]] = None
+            continue
+        selected[dev["role"]] = int(input(dev["prompt"]))
+    return selected
+
+# -----------------------------------------------------------------------------
+# Startup
+# -----------------------------------------------------------------------------
+
+def startup_args(description=None):
+    """Command-line device selection shared by the scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--port", help="Serial port: device name, VID:PID (hex), serial=NUMBER or name=PATTERN")
+    parser.add_argument("--joystick", action="append", default=[], metavar="ROLE=SPEC",
+                        help="Joystick for a profile role: name pattern, guid=GUID or #index (repeatable)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the device cache")
+    parser.add_argument("--list", action="store_true", help="List serial ports and joysticks, then exit")
+    args = parser.parse_args()
+    specs = {}
+    for item in args.joystick:
+        role, _, spec = item.partition("=")
+        if not spec:
+            parser.error(f"--joystick needs ROLE=SPEC, got {item!r}")
+        specs[role] = spec
+    args.joystick = specs
+    return args
+
+def list_devices():
+    """Print what a port or joystick spec can match against."""
+    print("Serial ports:")
+    for p in serial.tools.list_ports.comports():
+        ids = f"{p.vid:04x}:{p.pid:04x}" if p.vid is not None else "-"
+        print(f"  {p.device}  {ids}  serial={p.serial_number or '-'}  {p.description}")
+    init_joysticks()
+    finder = JoystickFinder()
+    print("Joysticks:")
+    for i in range(finder.count):
+        ident = finder.identity(i)
+        print(f"  #{i}  {ident['name']}  guid={ident['guid'] or '-'}")
+
+class DeviceSession:
+    """
+    The serial port and joysticks for one profile. start() resolves them
+    from explicit specs, then the device cache, and only prompts for what
+    is still missing. check() is called from the loop to reopen a lost
+    serial port and re-resolve joysticks after one was unplugged or
+    plugged back in, without restarting; reconnect times are recorded.
+    """
+
+    def __init__(self, profile, baud, port_spec="", joystick_specs=None,
+                 use_cache=True, cache_path=None, clock=time.perf_counter):
+        self.profile = profile
+        self.baud = baud
+        self.port_spec = port_spec
+        self.joystick_specs = joystick_specs or {}
+        self.use_cache = use_cache
+        self.cache_path = cache_path or DEVICE_CACHE
+        self.clock = clock
+        self.interactive = sys.stdin.isatty()
+        self.ser = None
+        self.port = None               # identity of the open port
+        self.joysticks = None          # {role: joystick or None}
+        self.identities = {}           # {role: joystick identity or None}
+        self.joystick_count = 0
+        self.next_check = 0.0
+        self.lost_at = None
+        self.reconnects = []           # seconds from failure to reopened port
+        self.rebinds = []              # seconds to re-resolve joysticks
+
+    def _load_cache(self):
+        if not self.use_cache:
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if not self.use_cache:
+            return
+        cache = self._load_cache()
+        cache[self.profile.get("name", "?")] = {"port": self.port, "joysticks": self.identities}
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            print(f"Could not write the device cache {self.cache_path}: {e}")
+
+    def start(self):
+        """Resolve and open every device; returns False if the script cannot run."""
+        started = self.clock()
+        init_joysticks()
+        cached = self._load_cache().get(self.profile.get("name", "?"), {})
+
+        ports = serial.tools.list_ports.comports()
+        port = None
+        if self.port_spec:
+            port = match_port(self.port_spec, ports)
+            if port is None:
+                print(f"No serial port matches {self.port_spec!r}.")
+                return False
+        elif cached.get("port"):
+            port = find_port(cached["port"], ports)
+        if port is None:
+            if not self.interactive:
+                print("No serial port given and none cached; set SERIAL_PORT or use --port.")
+                return False
+            port = prompt_serial_port(ports)
+            if port is None:
+                return False
+        try:
+            self.ser = serial.Serial(port.device, self.baud, timeout=1)
+            print(f"Opened serial on {port.device}")
+        except Exception as e:
+            print(f"Failed to open {port.device}: {e}")
+            return False
+        self.port = port_identity(port)
+
+        indices = self._resolve_joysticks(cached.get("joysticks", {}))
+        if indices is None:
+            return False
+        self._save_cache()
+        print(f"Devices ready in {(self.clock() - started) * 1000:.0f} ms")
+        return True
+
+    def _resolve_joysticks(self, cached):
+        finder = JoystickFinder()
+        self.joystick_count = finder.count
+        indices = {}
+        taken = set()
+        missing = []
+        for dev in self.profile["devices"]:
+            role = dev["role"]
+            spec = self.joystick_specs.get(role)
+            if spec:
+                index = finder.match(spec, taken)
+                if index is None:
+                    print(f"No joystick matches {spec!r} for {role}.")
+                    return None
+            elif role in cached:
+                if cached[role] is None:
+                    indices[role] = None     # Optional device declined last time
+                    continue
+                index = finder.find(cached[role], taken)
+            else:
+                index = None
+            if index is None:
+                if dev.get("optional") and not self.interactive:
+                    indices[role] = None
+                else:
+                    missing.append(dev)
+                continue
+            indices[role] = index
+            taken.add(index)
+        if missing:
+            if not self.interactive:
+                roles = ", ".join(dev["role"] for dev in missing)
+                print(f"No joystick given or cached for {roles}; set JOYSTICKS or use --joystick.")
+                return None
+            picked = select_joysticks(self.profile, finder, missing)
+            if picked is None:
+                return None
+            indices.update(picked)
+        roles = [dev["role"] for dev in self.profile["devices"]]
+        self.joysticks = {role: finder.get(indices[role]) if indices[role] is not None else None for role in roles}
+        self.identities = {role: finder.identity(indices[role]) if indices[role] is not None else None for role in roles}
+        return indices
+
+    def due(self, now):
+        return now >= self.next_check
+
+    def check(self, now, link):
+        """
+        Reopen the serial port if writes started failing, and re-resolve the
+        joysticks if the number connected changed. Returns True when the
+        joysticks changed, so the caller recompiles its profile.
+        """
+        self.next_check = now + RECONNECT_INTERVAL
+        if link.writer.failed_at is not None:
+            self._reconnect_serial(link)
+        if pygame.joystick.get_count() == self.joystick_count:
+            return False
+        return self._rebind_joysticks()
+
+    def _reconnect_serial(self, link):
+        if self.lost_at is None:
+            self.lost_at = link.writer.failed_at
+            print(f"\nSerial link to {self.port['device']} lost; reconnecting...")
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+        port = find_port(self.port, serial.tools.list_ports.comports())
+        if port is None:
+            return
+        try:
+            ser = serial.Serial(port.device, self.baud, timeout=1)
+        except Exception:
+            return
+        self.ser = ser
+        self.port = port_identity(port)
+        link.reopen(ser)
+        took = self.clock() - self.lost_at
+        self.reconnects.append(took)
+        self.lost_at = None
+        print(f"Reconnected to {port.device} in {took:.2f} s")
+
+    def _rebind_joysticks(self):
+        started = self.clock()
+        finder = JoystickFinder()
+        self.joystick_count = finder.count
+        taken = set()
+        joysticks = {}
+        missing = []
+        for role, identity in self.identities.items():
+            index = finder.find(identity, taken) if identity else None
+            if identity and index is None:
+                missing.append(role)
+            if index is not None:
+                taken.add(index)
+            joysticks[role] = finder.get(index) if index is not None else None
+        self.joysticks = joysticks
+        took = self.clock() - started
+        self.rebinds.append(took)
+        if missing:
+            print(f"\nJoystick for {', '.join(missing)} disconnected; its inputs read as defaults")
+        else:
+            print(f"\nJoysticks re-resolved in {took * 1000:.1f} ms")
+        return True
+
+    def summary(self):
+        if not self.reconnects and not self.rebinds:
+            return ""
+        parts = []
+        if self.reconnects:
+            parts.append(f"{len(self.reconnects)} serial reconnect(s), "
+                         f"worst {max(self.reconnects):.2f} s")
+        if self.rebinds:
+            parts.append(f"{len(self.rebinds)} joystick rebind(s), "
+                         f"worst {max(self.rebinds) * 1000:.1f} ms")
+        return "; ".join(parts)
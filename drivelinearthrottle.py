@@ -1,102 +1,183 @@
-
-# -----------------------------------------------------------------------------
-# Project Name: Racing Simulator-RC Controller
-# Author: bitsbits [https://www.youtube.com/@bits-bits]
-# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
-#
-# You are free to use, modify, and share this code for non-commercial purposes,
-# provided you credit the original author. Commercial use of this code or any
-# derivatives is not permitted without explicit permission.
-#
-# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
-# -----------------------------------------------------------------------------
-
-import pygame
-import serial
-import serial.tools.list_ports
-
-def select_serial_port():
-    ports = list(serial.tools.list_ports.comports())
-    if not ports:
-        print("No serial ports found. Make sure your Arduino is plugged in.")
-        return None
-    print("Available serial ports:")
-    for i, port in enumerate(ports):
-        print(f"{i}: {port.device} — {port.description}")
-    idx = int(input("Select the Arduino port index: "))
-    return ports[idx].device
-
-def main():
-    # Serial‑port selection by index
-    serial_port = select_serial_port()
-    if not serial_port:
-        return
-    try:
-        ser = serial.Serial(serial_port, 57600, timeout=1)
-        print(f"Opened serial on {serial_port}")
-    except Exception as e:
-        print(f"Failed to open {serial_port}: {e}")
-        return
-
-    # Initialize Pygame & detect joysticks
-    pygame.init()
-    joystick_count = pygame.joystick.get_count()
-    if joystick_count == 0:
-        print("No joysticks found.")
-        return
-
-    print("Available joysticks:")
-    for i in range(joystick_count):
-        js = pygame.joystick.Joystick(i)
-        js.init()
-        print(f"{i}: {js.get_name()}")
-
-    primary_index = int(input("Select joystick index for driving controls: "))
-    primary = pygame.joystick.Joystick(primary_index)
-    primary.init()
-
-    use_secondary = input("Use a second joystick for extra controls? (y/n): ").lower().startswith('y')
-    if use_secondary:
-        secondary_index = int(input("Select joystick index for additional controls: "))
-        secondary = pygame.joystick.Joystick(secondary_index)
-        secondary.init()
-    else:
-        secondary = None
-
-    print("Running... Ctrl+C to quit.")
-    while True:
-        pygame.event.pump()
-
-        # Primary axes/buttons
-        x_axis = int(primary.get_axis(0) * 1000) if primary.get_numaxes() > 0 else 0
-        y_axis = int(primary.get_axis(1) * 1000) if primary.get_numaxes() > 1 else 0
-        z_axis = int(primary.get_axis(2) * 1000) if primary.get_numaxes() > 2 else 0
-        leftpaddle  = int(primary.get_button(0)) if primary.get_numbuttons() > 0 else 0
-        rightpaddle = int(primary.get_button(1)) if primary.get_numbuttons() > 1 else 0
-
-        # Secondary for pots & switches
-        if secondary:
-            left_pot  = int(secondary.get_axis(0) * 1000) if secondary.get_numaxes() > 0 else 0
-            right_pot = int(secondary.get_axis(1) * 1000) if secondary.get_numaxes() > 1 else 0
-            # buttons 0/1 → switch E, 2/3 → B, 4/5 → C, 6/7 → F
-            swE =  1 if secondary.get_button(0) else (-1 if secondary.get_button(1) else 0)
-            swB =  1 if secondary.get_button(2) else (-1 if secondary.get_button(3) else 0)
-            swC =  1 if secondary.get_button(4) else (-1 if secondary.get_button(5) else 0)
-            swF =  1 if secondary.get_button(6) else (-1 if secondary.get_button(7) else 0)
-        else:
-            left_pot = right_pot = 0
-            swE = swB = swC = swF = 0
-
-        # Combine throttle/brake
-        neutral = 1000
-        thr = neutral - y_axis
-        brk = neutral - z_axis
-        combined = int((thr if thr>brk else -brk) / 2)
-
-        # Build & send
-        msg = f"{combined},{x_axis},0,0,{leftpaddle},{rightpaddle},{left_pot},{right_pot},{swE},{swB},{swC},{swF}\n"
-        print(msg.strip())
-        ser.write(msg.encode())
-
-if __name__ == "__main__":
-    main()
+
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import pygame
+
+from curves import ResponseCurves, mix_pedals
+from devices import DeviceSession, list_devices, startup_args
+from filters import InputFilters
+from joyevents import EventInput
+from mapping import compile_profile, load_profile
+from profiler import StageProfiler
+from recorder import TraceRecorder
+from scheduler import LoopScheduler
+from serial_link import SerialLink
+from status import StatusDisplay
+
+# -------------------------------
+# Loop Rate Config
+# -------------------------------
+LOOP_RATE_HZ = 100      # Control-loop tick rate; keep under the link's frame capacity
+LOOP_POLICY  = "skip"   # "skip" drops missed ticks, "catchup" runs them back-to-back
+INPUT_MODE   = "poll"   # "poll" reads every input each tick, "events" wakes on joystick input
+QUIET        = False    # Print nothing while running (no status line)
+
+# -------------------------------
+# Profiling Config
+# -------------------------------
+PROFILE_STAGES   = False   # Time every loop stage from the start (switch while running: see profiler.py)
+PROFILE_SNAPSHOT = ""      # Write stage timings to this JSON file instead of printing summaries
+
+# -------------------------------
+# Input Profile Config
+# -------------------------------
+PROFILE = "drive"       # Profile name in profiles/, or a path to a JSON/TOML profile
+INPUTS  = ("x_axis", "y_axis", "z_axis", "leftpaddle", "rightpaddle",
+           "left_pot", "right_pot", "swE", "swB", "swC", "swF")
+RECORD_PATH = ""        # Record raw inputs and output channels each tick to this trace file
+
+# -------------------------------
+# Device Selection Config
+# -------------------------------
+SERIAL_PORT      = ""     # Port to open without asking: device name, "VID:PID", "serial=..." or "name=<pattern>"
+JOYSTICKS        = {}     # Role -> joystick without asking: name pattern, "guid=..." or "#index"
+USE_DEVICE_CACHE = True   # Reuse the devices last picked for this profile when they are still connected
+
+# -------------------------------
+# Serial Protocol Config
+# -------------------------------
+PROTOCOL          = "text"   # "text" CSV lines, or "binary" packed frames (needs the updated sketch)
+SEND_CHANGES_ONLY = True     # Skip frames identical to the last one sent, apart from keyframes
+CHANNEL_DEADBAND  = 0        # Change threshold per channel: one int, or a tuple with one per channel
+ADAPTIVE_RATE     = True     # Hold frames back to what the baud rate carries, axes and paddles first (see ratecontrol.py)
+MEASURE_LATENCY   = False    # Ask the sketch to echo frames and report round-trip latency (binary only)
+LATENCY_EXPORT    = ""       # On exit, write latency samples to this .csv (or .prom for Prometheus text)
+READ_TELEMETRY    = True     # Show the sketch's reports (frames, errors, loop time) on the status line
+TELEMETRY_EXPORT  = ""       # On exit, write the sketch's reports to this .csv (or .prom for Prometheus text)
+FAILSAFE_VALUES   = (0,) * 12  # Outputs when the link drops: throttle/brake (x) and steering centred
+
+ACCEPTS_CURVES = True   # FrameProcessor takes the profile's response curves (see modes.make_processor)
+
+class FrameProcessor:
+    """Per-tick processing for the drive script: profile inputs to output channels."""
+
+    def __init__(self, curves=None):
+        self.curves = curves if curves is not None else ResponseCurves()
+
+    def step(self, values, now):
+        (x_axis, y_axis, z_axis, leftpaddle, rightpaddle,
+         left_pot, right_pot, swE, swB, swC, swF) = values
+        curves = self.curves
+        x_axis = curves.steering.map(x_axis)
+
+        # Combine throttle/brake (pedal travel through the response curves)
+        thr, brk = curves.pedals(y_axis, z_axis)
+        combined = mix_pedals(thr, brk)
+
+        return (combined, x_axis, 0, 0, leftpaddle, rightpaddle,
+                left_pot, right_pot, swE, swB, swC, swF)
+
+    def status(self):
+        return ""
+
+def main():
+    args = startup_args("Drive an RC car from a wheel and pedals.")
+    if args.list:
+        list_devices()
+        return
+
+    # Open the serial port & pick joysticks for the profile's devices:
+    # given specs first, then the device cache, and only then ask
+    profile = load_profile(PROFILE)
+    session = DeviceSession(profile, 57600, args.port or SERIAL_PORT, {**JOYSTICKS, **args.joystick},
+                            USE_DEVICE_CACHE and not args.no_cache)
+    if not session.start():
+        return
+    joysticks = session.joysticks
+    events = None
+    if INPUT_MODE == "events":
+        events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+        joysticks = events.states
+    inputs = compile_profile(profile, joysticks, INPUTS)
+    filters = InputFilters(profile.get("filters"), INPUTS)
+    recorder = TraceRecorder(RECORD_PATH, joysticks) if RECORD_PATH else None
+
+    processor = FrameProcessor(ResponseCurves(profile.get("curves")))
+
+    print("Running... Ctrl+C to quit.")
+    link = SerialLink(session.ser, PROTOCOL, SEND_CHANGES_ONLY, CHANNEL_DEADBAND, MEASURE_LATENCY,
+                      READ_TELEMETRY, ADAPTIVE_RATE, FAILSAFE_VALUES)
+    scheduler = LoopScheduler(LOOP_RATE_HZ, LOOP_POLICY)
+    hud = StatusDisplay(scheduler, link.writer, quiet=QUIET, telemetry=link.telemetry, rate=link.rate)
+    prof = StageProfiler(PROFILE_STAGES, PROFILE_SNAPSHOT)
+    link.writer.profiler = prof
+    try:
+        while True:
+            if events:
+                events.wait(link.sender.keyframe_interval)
+                now = scheduler.tick()
+                t = start = prof.begin()
+            else:
+                now = scheduler.wait()
+                t = start = prof.begin()
+                pygame.event.pump()
+                t = prof.lap("pump", t)
+
+            if session.due(now) and session.check(now, link):
+                # A joystick came or went: bind the profile to what is connected now
+                joysticks = session.joysticks
+                if events:
+                    events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+                    joysticks = events.states
+                inputs = compile_profile(profile, joysticks, INPUTS)
+                if recorder:
+                    recorder.rebind(joysticks)
+            t = prof.lap("devices", t)
+
+            values = inputs.read()
+            t = prof.lap("read", t)
+            if filters:
+                filters.apply(values, now)
+                t = prof.lap("filters", t)
+            channels = processor.step(values, now)
+            t = prof.lap("process", t)
+            if recorder:
+                recorder.record(now, channels)
+                t = prof.lap("record", t)
+            link.send(channels, now)
+            t = prof.lap("send", t)
+            if hud.due(now):
+                hud.show(now, channels, processor.status())
+                prof.lap("status", t)
+            prof.lap("tick", start)
+            if prof.due(now):
+                prof.poll(now)
+    except KeyboardInterrupt:
+        hud.close()
+        print(scheduler.summary())
+        if prof.stages:
+            print(prof.summary())
+    finally:
+        link.close()
+        if recorder:
+            recorder.close()
+    print(link.summary())
+    if session.summary():
+        print(session.summary())
+    if link.latency and LATENCY_EXPORT:
+        link.latency.export(LATENCY_EXPORT)
+    if link.telemetry and TELEMETRY_EXPORT:
+        link.telemetry.export(TELEMETRY_EXPORT)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# Failsafe reaction benchmark: a host loop sends changes-only frames over a
+# simulated serial line into the sketch emulator, and a fault is injected at
+# a random moment of each trial. Reports how long the sketch took to reach
+# its failsafe outputs, and any failsafe that tripped while the link was fine:
+#
+#   python failsafe.py --protocol binary --baud 57600 --trials 200
+
+import argparse
+import random
+from collections import deque
+
+from protocol import make_encoder
+from serial_link import KEYFRAME_INTERVAL, FrameSender
+from sketchmodel import FAILSAFE_TIMEOUT_MS, LINE_MAX, SketchEmulator
+
+# stall: the host loop stops sending (bytes already on the wire still arrive)
+# unplug: the line goes quiet mid-stream, possibly inside a frame
+# noise: the line carries random bytes instead of frames
+FAULTS = ("stall", "unplug", "noise")
+
+SKETCH_LOOP = 0.0005     # Seconds per loop() pass on the Arduino, including a DAC write
+WARMUP      = 0.3        # Seconds of normal running before the fault window
+
+def run_trial(fault, protocol, rate_hz, baud, keepalive, timeout_ms, rng, jitter=0.002):
+    """
+    One trial with idle inputs, so only keepalives are sent: the longest
+    gaps the watchdog sees. Host ticks run up to jitter s late. Returns
+    (seconds from the fault to the failsafe or None if it never tripped,
+    failsafe trips before the fault).
+    """
+    byte_time = 10.0 / baud
+    period = 1.0 / rate_hz
+    fault_at = WARMUP + rng.random() * 0.5
+    end = fault_at + 2 * timeout_ms / 1000 + 0.05
+    sketch = SketchEmulator(echo=False, failsafe_timeout_ms=timeout_ms)
+    wire = deque()
+    wire_free = 0.0
+    host_now = 0.0
+
+    def write(frame):
+        nonlocal wire_free
+        t = max(wire_free, host_now)
+        for b in bytes(frame):
+            t += byte_time
+            wire.append((t, b))
+        wire_free = t
+
+    sender = FrameSender(write, make_encoder(protocol), changes_only=True, keyframe_interval=keepalive)
+    channels = (0,) * 12
+    host_next = 0.0
+    noise_from = fault_at
+    false_trips = 0
+    t = 0.0
+    while t < end:
+        t += SKETCH_LOOP
+        while host_next <= t:
+            if not (fault == "stall" and host_next >= fault_at):
+                host_now = host_next + rng.random() * jitter
+                sender.send(channels, host_now)
+            host_next += period
+        data = bytearray()
+        while wire and wire[0][0] <= t:
+            at, b = wire.popleft()
+            if fault == "stall" or at <= fault_at:
+                data.append(b)
+        if fault == "noise" and t > fault_at:
+            count = int((t - noise_from) / byte_time)
+            data += bytes(rng.randrange(256) for _ in range(count))
+            noise_from += count * byte_time
+        if data:
+            sketch.feed(data, t)
+        if sketch.poll(t):
+            if t < fault_at:
+                false_trips += 1
+            else:
+                return t - fault_at, false_trips
+    return None, false_trips
+
+def run_benchmark(fault, protocol, trials, rate_hz, baud, keepalive, timeout_ms, seed=0):
+    rng = random.Random(seed)
+    reactions = []
+    never = 0
+    false_trips = 0
+    for _ in range(trials):
+        reaction, trips = run_trial(fault, protocol, rate_hz, baud, keepalive, timeout_ms, rng)
+        false_trips += trips
+        if reaction is None:
+            never += 1
+        else:
+            reactions.append(reaction)
+    return reactions, never, false_trips
+
+def format_reactions(fault, protocol, reactions, never, false_trips):
+    head = f"{fault:<7} {protocol:<6}"
+    if not reactions:
+        return f"{head} never tripped in {never} trials, {false_trips} false trips"
+    return (f"{head} min {min(reactions) * 1000:6.1f} ms  mean {sum(reactions) / len(reactions) * 1000:6.1f} ms  "
+            f"max {max(reactions) * 1000:6.1f} ms  never {never}  false trips {false_trips}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the sketch's failsafe reaction time on simulated faults.")
+    parser.add_argument("--protocol", default="all", choices=["all", "text", "binary"])
+    parser.add_argument("--fault", default="all", choices=("all",) + FAULTS)
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=100, help="Host loop tick rate in Hz")
+    parser.add_argument("--baud", type=int, default=57600)
+    parser.add_argument("--keepalive", type=float, default=KEYFRAME_INTERVAL,
+                        help="Seconds between keepalive frames while output is unchanged")
+    parser.add_argument("--timeout-ms", type=int, default=FAILSAFE_TIMEOUT_MS, help="Sketch failsafe window")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    protocols = ["text", "binary"] if args.protocol == "all" else [args.protocol]
+    faults = FAULTS if args.fault == "all" else (args.fault,)
+    # The last frame may finish arriving just after the fault; add millis() granularity and one loop() pass
+    bound = args.timeout_ms + 1 + LINE_MAX * 10000 / args.baud + SKETCH_LOOP * 1000
+    print(f"{args.timeout_ms} ms failsafe window, {args.keepalive * 1000:.0f} ms keepalive, "
+          f"{args.rate:g} Hz host loop, {args.baud} baud; expected worst case about {bound:.0f} ms")
+    failed = False
+    for fault in faults:
+        for protocol in protocols:
+            reactions, never, false_trips = run_benchmark(
+                fault, protocol, args.trials, args.rate, args.baud, args.keepalive, args.timeout_ms, args.seed)
+            print(format_reactions(fault, protocol, reactions, never, false_trips))
+            failed |= bool(never or false_trips or (reactions and max(reactions) * 1000 > bound))
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
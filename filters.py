@@ -0,0 +1,241 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import math
+import time
+
+# -----------------------------------------------------------------------------
+# Input filters (the optional "filters" section of a profile)
+#
+#   "filters": {
+#     "left_pot":  [{"type": "median", "size": 5}, {"type": "ema", "cutoff": 8}],
+#     "right_pot": [{"type": "one_euro", "min_cutoff": 1.0, "beta": 0.01}],
+#     "x_axis":    [{"type": "slew", "rise": 8000, "fall": 8000}]
+#   }
+#
+#   ema       {"cutoff": Hz}                          first-order low-pass
+#   one_euro  {"min_cutoff": Hz, "beta", "d_cutoff"}  low-pass that opens up with speed
+#   slew      {"rise": units/s, "fall": units/s}      rate limit, either may be omitted
+#   median    {"size": N}                             median of the last N reads
+#
+# Stages run in list order on the channel's value, once per tick.
+# -----------------------------------------------------------------------------
+
+def _alpha(cutoff, dt):
+    """Smoothing factor of a first-order low-pass at cutoff Hz over dt seconds."""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return dt / (dt + tau)
+
+class Ema:
+    """Exponential moving average with a cutoff frequency, so it holds across tick rates."""
+    __slots__ = ("cutoff", "value")
+
+    def __init__(self, cutoff):
+        self.cutoff = cutoff
+        self.value = None
+
+    def step(self, x, dt):
+        if self.value is None:
+            self.value = x
+        elif dt > 0:
+            self.value += _alpha(self.cutoff, dt) * (x - self.value)
+        return self.value
+
+    def reset(self, value=None):
+        self.value = value
+
+class OneEuro:
+    """One-euro filter: heavy smoothing at rest, little lag when the input moves fast."""
+    __slots__ = ("min_cutoff", "beta", "d_cutoff", "value", "slope")
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = None
+        self.slope = 0.0
+
+    def step(self, x, dt):
+        if self.value is None:
+            self.value = x
+            return x
+        if dt <= 0:
+            return self.value
+        self.slope += _alpha(self.d_cutoff, dt) * ((x - self.value) / dt - self.slope)
+        cutoff = self.min_cutoff + self.beta * abs(self.slope)
+        self.value += _alpha(cutoff, dt) * (x - self.value)
+        return self.value
+
+    def reset(self, value=None):
+        self.value = value
+        self.slope = 0.0
+
+class SlewLimit:
+    """Limit how fast the output may rise or fall, in units per second (None = unlimited)."""
+    __slots__ = ("rise", "fall", "value")
+
+    def __init__(self, rise=None, fall=None):
+        self.rise = rise
+        self.fall = fall
+        self.value = None
+
+    def step(self, x, dt):
+        value = self.value
+        if value is None:
+            self.value = x
+            return x
+        if x > value and self.rise is not None:
+            x = min(x, value + self.rise * dt)
+        elif x < value and self.fall is not None:
+            x = max(x, value - self.fall * dt)
+        self.value = x
+        return x
+
+    def reset(self, value=None):
+        self.value = value
+
+class Median:
+    """Median of the last N reads; knocks out single-tick spikes from noisy pots."""
+    __slots__ = ("window", "ordered", "pos", "filled")
+
+    def __init__(self, size=3):
+        self.window = [0] * size
+        self.ordered = [0] * size
+        self.pos = 0
+        self.filled = 0
+
+    def step(self, x, dt):
+        window = self.window
+        window[self.pos] = x
+        self.pos = (self.pos + 1) % len(window)
+        if self.filled < len(window):
+            self.filled += 1
+            if self.filled < len(window):
+                return x
+        ordered = self.ordered
+        ordered[:] = window
+        ordered.sort()
+        return ordered[len(ordered) // 2]
+
+    def reset(self, value=None):
+        self.pos = 0
+        if value is None:
+            self.filled = 0
+        else:
+            # Start out holding value, so a spike on the next read is knocked out too
+            self.window[:] = [value] * len(self.window)
+            self.filled = len(self.window)
+
+FILTER_TYPES = {
+    "ema": (Ema, ("cutoff",)),
+    "one_euro": (OneEuro, ("min_cutoff", "beta", "d_cutoff")),
+    "slew": (SlewLimit, ("rise", "fall")),
+    "median": (Median, ("size",)),
+}
+
+def validate_filters(filters, channels, profile_name="?"):
+    """Check a profile's "filters" section; raises ValueError on the first problem."""
+    if not isinstance(filters, dict):
+        raise ValueError(f"Profile {profile_name}: filters must be a table of channel stage lists")
+    for cname, stages in filters.items():
+        where = f"Profile {profile_name}: filters for {cname!r}"
+        if cname not in channels:
+            raise ValueError(f"Profile {profile_name}: filters set for unknown channel {cname!r}")
+        if not isinstance(stages, list):
+            raise ValueError(f"{where} must be a list of stages")
+        for spec in stages:
+            kind = spec.get("type")
+            if kind not in FILTER_TYPES:
+                raise ValueError(f"{where}: unknown filter type {kind!r}")
+            unknown = set(spec) - {"type"} - set(FILTER_TYPES[kind][1])
+            if unknown:
+                raise ValueError(f"{where}: {kind} has unknown settings: {', '.join(sorted(unknown))}")
+            if kind == "ema" and not spec.get("cutoff", 0) > 0:
+                raise ValueError(f"{where}: ema needs a positive cutoff")
+            if kind == "median" and not (isinstance(spec.get("size"), int) and spec["size"] >= 1):
+                raise ValueError(f"{where}: median needs an integer size >= 1")
+            if kind == "one_euro" and not (spec.get("min_cutoff", 1.0) > 0 and spec.get("d_cutoff", 1.0) > 0):
+                raise ValueError(f"{where}: one_euro cutoffs must be positive")
+
+def make_stage(spec):
+    cls, params = FILTER_TYPES[spec["type"]]
+    return cls(**{k: spec[k] for k in params if k in spec})
+
+class FilterChain:
+    """
+    Filter stages run in order on one value. With timed set, each stage's
+    perf_counter_ns cost is added up per stage.
+    """
+    __slots__ = ("stages", "timed", "cost_ns", "calls")
+
+    def __init__(self, stages, timed=False):
+        self.stages = tuple(stages)
+        self.timed = timed
+        self.cost_ns = [0] * len(self.stages)
+        self.calls = 0
+
+    def step(self, x, dt):
+        if self.timed:
+            return self._step_timed(x, dt)
+        for stage in self.stages:
+            x = stage.step(x, dt)
+        return x
+
+    def _step_timed(self, x, dt):
+        clock = time.perf_counter_ns
+        cost = self.cost_ns
+        for i, stage in enumerate(self.stages):
+            t0 = clock()
+            x = stage.step(x, dt)
+            cost[i] += clock() - t0
+        self.calls += 1
+        return x
+
+    def reset(self, value=None):
+        for stage in self.stages:
+            stage.reset(value)
+
+    def costs(self):
+        """(stage name, mean ns per call) for every stage, once timed calls were made."""
+        calls = max(self.calls, 1)
+        return [(type(stage).__name__, ns / calls) for stage, ns in zip(self.stages, self.cost_ns)]
+
+class InputFilters:
+    """
+    The profile's per-channel filter chains, applied in place to the values
+    list a MappingPlan returns; channels without filters are not touched.
+    """
+
+    def __init__(self, filters, names, timed=False):
+        filters = filters or {}
+        self.chains = tuple(
+            (slot, name, FilterChain([make_stage(s) for s in filters[name]], timed))
+            for slot, name in enumerate(names) if filters.get(name)
+        )
+        self.last = None
+
+    def __bool__(self):
+        return bool(self.chains)
+
+    def apply(self, values, now):
+        dt = now - self.last if self.last is not None else 0.0
+        self.last = now
+        for slot, _, chain in self.chains:
+            values[slot] = int(round(chain.step(values[slot], dt)))
+        return values
+
+    def summary(self):
+        parts = []
+        for _, name, chain in self.chains:
+            stages = ", ".join(f"{stage} {ns / 1000:.2f} us" for stage, ns in chain.costs())
+            parts.append(f"{name}: {stages}")
+        return "filters " + "; ".join(parts) if parts else "no filters"
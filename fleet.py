@@ -0,0 +1,239 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# Drive several vehicles from one process: the joysticks are read once per
+# wake-up and each vehicle gets its own profile, tick rate and serial link.
+#
+#   python fleet.py fleet.json
+
+import argparse
+import json
+
+import pygame
+import serial
+import serial.tools.list_ports
+
+from devices import JoystickFinder, init_joysticks, match_port
+from filters import InputFilters
+from mapping import compile_profile, load_profile
+from modes import BAUD_RATES, load_mode, make_processor
+from scheduler import LoopScheduler
+from serial_link import SerialLink
+from status import StatusDisplay
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: JSON fleet files only
+    tomllib = None
+
+# -----------------------------------------------------------------------------
+# Fleet file format (JSON or TOML)
+#
+#   vehicles  list of:
+#     {"name", "mode": "drive" | "fly" | "abs" | "paddleshift",
+#      "port": device name, "VID:PID", "serial=..." or "name=<pattern>",
+#      "devices": {role: joystick index, name pattern, "guid=..." or null},
+#      "profile"=mode's PROFILE, "rate"=mode's LOOP_RATE_HZ, "baud"=mode's baud,
+#      "protocol"=mode's PROTOCOL, "changes_only", "deadband", "measure_latency"=false,
+#      "telemetry"=true, "adaptive_rate"=mode's ADAPTIVE_RATE,
+#      "failsafe"=mode's FAILSAFE_VALUES}
+# -----------------------------------------------------------------------------
+
+# -------------------------------
+# Fleet Config
+# -------------------------------
+STALE_AFTER = 1.0      # Seconds without a completed write before a link is reported stale
+
+def load_fleet(path):
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML fleet files need Python 3.11 or newer")
+        with open(path, "rb") as f:
+            fleet = tomllib.load(f)
+    else:
+        with open(path) as f:
+            fleet = json.load(f)
+    names = set()
+    for spec in fleet.get("vehicles", []):
+        for key in ("name", "mode", "port", "devices"):
+            if key not in spec:
+                raise ValueError(f"Fleet vehicle {spec.get('name', '?')!r} needs {key!r}")
+        if spec["name"] in names:
+            raise ValueError(f"Duplicate fleet vehicle {spec['name']!r}")
+        names.add(spec["name"])
+    if not names:
+        raise ValueError(f"{path} lists no vehicles")
+    return fleet
+
+class Vehicle:
+    """
+    One vehicle of the fleet: its profile compiled against the shared
+    joysticks, its processing and its own SerialLink (and writer thread),
+    stepped at its own rate.
+    """
+
+    def __init__(self, spec, joysticks, ser):
+        self.name = spec["name"]
+        module = load_mode(spec["mode"])
+        profile = load_profile(spec.get("profile", module.PROFILE))
+        devices = {}
+        for dev in profile["devices"]:
+            wanted = spec["devices"].get(dev["role"])
+            if wanted is None and not dev.get("optional"):
+                raise ValueError(f"Vehicle {self.name}: no joystick for {dev['role']!r}")
+            devices[dev["role"]] = joysticks.get(wanted) if wanted is not None else None
+        self.inputs = compile_profile(profile, devices, module.INPUTS)
+        self.filters = InputFilters(profile.get("filters"), module.INPUTS)
+        self.processor = make_processor(module, profile)
+        self.link = SerialLink(
+            ser,
+            spec.get("protocol", module.PROTOCOL),
+            spec.get("changes_only", module.SEND_CHANGES_ONLY),
+            spec.get("deadband", module.CHANNEL_DEADBAND),
+            spec.get("measure_latency", False),
+            spec.get("telemetry", True),
+            spec.get("adaptive_rate", module.ADAPTIVE_RATE),
+            spec.get("failsafe", module.FAILSAFE_VALUES),
+        )
+        self.rate_hz = spec.get("rate", module.LOOP_RATE_HZ)
+        self.period = 1.0 / self.rate_hz
+        self.next_due = None
+        self.ticks = 0
+        self.missed = 0
+        self.last_check = None
+        self.last_frames = 0
+        self.last_bytes = 0
+        self.last_errors = 0
+        self.last_ticks = 0
+
+    def step(self, now):
+        values = self.inputs.read()
+        if self.filters:
+            self.filters.apply(values, now)
+        channels = self.processor.step(values, now)
+        self.link.send(channels, now)
+        self.ticks += 1
+        self.next_due += self.period
+        if self.next_due <= now:
+            # Drop whole periods we are behind by, as the skip policy does
+            behind = int((now - self.next_due) / self.period) + 1
+            self.missed += behind
+            self.next_due += behind * self.period
+
+    def health(self, now):
+        """(tick Hz, frames/s, bytes/s, state) since the previous call."""
+        writer = self.link.writer
+        frames, written, errors = writer.written, writer.bytes_written, writer.errors
+        if self.last_check is None:
+            hz = fps = bps = 0.0
+        else:
+            dt = now - self.last_check
+            hz = (self.ticks - self.last_ticks) / dt
+            fps = (frames - self.last_frames) / dt
+            bps = (written - self.last_bytes) / dt
+        if errors > self.last_errors:
+            state = "error"
+        elif writer.last_write is None or now - writer.last_write > STALE_AFTER:
+            state = "stale"
+        else:
+            state = "ok"
+        self.last_check = now
+        self.last_ticks = self.ticks
+        self.last_frames = frames
+        self.last_bytes = written
+        self.last_errors = errors
+        return hz, fps, bps, state
+
+    def summary(self):
+        lines = [f"{self.name}: {self.ticks} ticks at {self.rate_hz} Hz, {self.missed} missed"]
+        return "\n  ".join(lines + self.link.summary().splitlines())
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive several vehicles from one process.")
+    parser.add_argument("fleet", help="JSON/TOML fleet file")
+    parser.add_argument("--quiet", action="store_true", help="No status line while running")
+    args = parser.parse_args()
+    fleet = load_fleet(args.fleet)
+
+    init_joysticks()
+    finder = JoystickFinder()
+    joysticks = {}
+    taken = set()
+    for spec in fleet["vehicles"]:
+        for role, js_spec in spec["devices"].items():
+            if js_spec is None or js_spec in joysticks:
+                continue
+            # Each joystick goes to one spec, as DeviceSession gives each role its own
+            index = finder.match(f"#{js_spec}" if isinstance(js_spec, int) else js_spec, taken)
+            if index is None:
+                print(f"{spec['name']}: no free joystick matches {js_spec!r} for {role} ({finder.count} found).")
+                return
+            taken.add(index)
+            joysticks[js_spec] = finder.get(index)
+            print(f"{index}: {joysticks[js_spec].get_name()}")
+
+    ports = serial.tools.list_ports.comports()
+    vehicles = []
+    try:
+        for spec in fleet["vehicles"]:
+            baud = spec.get("baud", BAUD_RATES[spec["mode"]])
+            port = match_port(spec["port"], ports)
+            device = port.device if port else spec["port"]
+            try:
+                ser = serial.Serial(device, baud, timeout=1)
+            except Exception as e:
+                print(f"{spec['name']}: failed to open {spec['port']}: {e}")
+                continue
+            print(f"{spec['name']}: {spec['mode']} on {device} at {baud} baud")
+            try:
+                vehicles.append(Vehicle(spec, joysticks, ser))
+            except Exception:
+                ser.close()
+                raise
+        if not vehicles:
+            return
+
+        # One wake-up per due vehicle; vehicles due at the same time share the input read
+        scheduler = LoopScheduler(max(v.rate_hz for v in vehicles))
+        hud = StatusDisplay(quiet=args.quiet)
+        start = scheduler.clock()
+        for v in vehicles:
+            v.next_due = start
+        print("Running... Ctrl+C to quit.")
+        try:
+            while True:
+                scheduler.sleep_until(min(v.next_due for v in vehicles))
+                now = scheduler.tick()
+                pygame.event.pump()
+                for v in vehicles:
+                    if now >= v.next_due:
+                        v.step(now)
+                if hud.due(now):
+                    parts = []
+                    for v in vehicles:
+                        hz, fps, bps, state = v.health(now)
+                        part = f"{v.name} {hz:.0f} Hz {fps:.0f} f/s {bps / 1000:.1f} kB/s {state}"
+                        if v.link.telemetry:
+                            part += f" {v.link.telemetry.status(now)}"
+                        parts.append(part)
+                    hud.write_line(" | ".join(parts), now)
+        except KeyboardInterrupt:
+            hud.close()
+            print(f"{scheduler.ticks} wake-ups for {sum(v.ticks for v in vehicles)} vehicle ticks")
+    finally:
+        for v in vehicles:
+            v.link.close()
+    for v in vehicles:
+        print(v.summary())
+
+if __name__ == "__main__":
+    main()
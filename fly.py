@@ -1,139 +1,177 @@
-
-# -----------------------------------------------------------------------------
-# Project Name: Racing Simulator-RC Controller
-# Author: bitsbits [https://www.youtube.com/@bits-bits]
-# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
-#
-# You are free to use, modify, and share this code for non-commercial purposes,
-# provided you credit the original author. Commercial use of this code or any
-# derivatives is not permitted without explicit permission.
-#
-# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
-# -----------------------------------------------------------------------------
-
-import pygame
-import serial
-import serial.tools.list_ports
-
-def select_serial_port():
-    ports = list(serial.tools.list_ports.comports())
-    if not ports:
-        print("No serial ports found. Make sure your Arduino is plugged in.")
-        return None
-    print("Available serial ports:")
-    for i, p in enumerate(ports):
-        print(f"{i}: {p.device} — {p.description}")
-    idx = int(input("Select the Arduino port index: "))
-    return ports[idx].device
-
-def main():
-    # Serial‑port selection by index
-    serial_port = select_serial_port()
-    if not serial_port:
-        return
-    try:
-        ser = serial.Serial(serial_port, 115200, timeout=1)
-        print(f"Opened serial connection on {serial_port}")
-    except Exception as e:
-        print(f"Could not open serial connection on {serial_port}: {e}")
-        return
-
-    # Initialize Pygame and check for joystick devices
-    pygame.init()
-    joystick_count = pygame.joystick.get_count()
-    if joystick_count < 3:
-        print("Less than 3 joystick devices found. Make sure your flight stick, throttle controls, and rudder are connected.")
-        return
-
-    print("Available joysticks:")
-    for i in range(joystick_count):
-        js = pygame.joystick.Joystick(i)
-        js.init()
-        print(f"{i}: {js.get_name()}")
-
-    # Prompt user to select the joysticks for the three roles:
-    flight_index   = int(input("Select index for flight stick (roll & pitch): "))
-    throttle_index = int(input("Select index for throttle controls: "))
-    rudder_index   = int(input("Select index for rudder (yaw): "))
-
-    flight_stick   = pygame.joystick.Joystick(flight_index);   flight_stick.init()
-    throttle_stick = pygame.joystick.Joystick(throttle_index); throttle_stick.init()
-    rudder_stick   = pygame.joystick.Joystick(rudder_index);   rudder_stick.init()
-
-    print("Starting joystick loop. Press Ctrl+C to exit.")
-
-    while True:
-        pygame.event.pump()
-
-        # Flight stick inputs
-        try:
-            x_axis = int(flight_stick.get_axis(0) * 1000)      # Roll
-        except:
-            x_axis = 0
-        try:
-            y_axis = int(flight_stick.get_axis(1) * -1000)     # Pitch inverted
-        except:
-            y_axis = 0
-        try:
-            rightpaddle = int(flight_stick.get_button(19))     # Launch button
-        except:
-            rightpaddle = 0
-
-        # Throttle stick inputs
-        try:
-            z_axis = int(throttle_stick.get_axis(3) * -1000)   # Throttle inverted
-        except:
-            z_axis = 0
-        try:
-            left_pot = int(throttle_stick.get_axis(6) * 1000)
-        except:
-            left_pot = 0
-        try:
-            right_pot = int(throttle_stick.get_axis(7) * -1000)
-        except:
-            right_pot = 0
-
-        # Switch positions (E, B, C, F)
-        swE_position = (-1 if throttle_stick.get_button(87)
-                        else 0 if throttle_stick.get_button(86)
-                        else 1 if throttle_stick.get_button(85)
-                        else -1)
-        swB_position = (-1 if throttle_stick.get_button(90)
-                        else 0 if throttle_stick.get_button(89)
-                        else 1 if throttle_stick.get_button(88)
-                        else -1)
-        swC_position = (-1 if throttle_stick.get_button(94)
-                        else 0 if throttle_stick.get_button(93)
-                        else 1 if throttle_stick.get_button(92)
-                        else -1)
-        swF_position = (-1 if throttle_stick.get_button(78)
-                        else 0 if throttle_stick.get_button(77)
-                        else 1 if throttle_stick.get_button(76)
-                        else -1)
-
-        # Air brake (invert original logic)
-        try:
-            leftpaddle = int(throttle_stick.get_button(18))
-        except:
-            leftpaddle = 0
-        leftpaddle = 0 if leftpaddle == 1 else 1
-
-        # Rudder stick input
-        try:
-            c_axis = int(rudder_stick.get_axis(0) * 1000)
-        except:
-            c_axis = 0
-
-        # Compose and send the message:
-        # x_axis, y_axis, z_axis, c_axis, leftpaddle, rightpaddle,
-        # left_pot, right_pot, swE, swB, swC, swF
-        msg = (
-            f"{x_axis},{y_axis},{z_axis},{c_axis},"
-            f"{leftpaddle},{rightpaddle},{left_pot},{right_pot},"
-            f"{swE_position},{swB_position},{swC_position},{swF_position}\n"
-        )
-        print(msg.strip())
-        ser.write(msg.encode())
-
-if __name__ == "__main__":
-    main()
+
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import pygame
+
+from devices import DeviceSession, list_devices, startup_args
+from filters import InputFilters
+from joyevents import EventInput
+from mapping import compile_profile, load_profile
+from profiler import StageProfiler
+from recorder import TraceRecorder
+from scheduler import LoopScheduler
+from serial_link import SerialLink
+from status import StatusDisplay
+
+# -------------------------------
+# Loop Rate Config
+# -------------------------------
+LOOP_RATE_HZ = 200      # Control-loop tick rate; keep under the link's frame capacity
+LOOP_POLICY  = "skip"   # "skip" drops missed ticks, "catchup" runs them back-to-back
+INPUT_MODE   = "poll"   # "poll" reads every input each tick, "events" wakes on joystick input
+QUIET        = False    # Print nothing while running (no status line)
+
+# -------------------------------
+# Profiling Config
+# -------------------------------
+PROFILE_STAGES   = False   # Time every loop stage from the start (switch while running: see profiler.py)
+PROFILE_SNAPSHOT = ""      # Write stage timings to this JSON file instead of printing summaries
+
+# -------------------------------
+# Input Profile Config
+# -------------------------------
+PROFILE = "fly"         # Profile name in profiles/, or a path to a JSON/TOML profile
+INPUTS  = ("x_axis", "y_axis", "z_axis", "c_axis", "leftpaddle", "rightpaddle",
+           "left_pot", "right_pot", "swE", "swB", "swC", "swF")
+RECORD_PATH = ""        # Record raw inputs and output channels each tick to this trace file
+
+# -------------------------------
+# Device Selection Config
+# -------------------------------
+SERIAL_PORT      = ""     # Port to open without asking: device name, "VID:PID", "serial=..." or "name=<pattern>"
+JOYSTICKS        = {}     # Role -> joystick without asking: name pattern, "guid=..." or "#index"
+USE_DEVICE_CACHE = True   # Reuse the devices last picked for this profile when they are still connected
+
+# -------------------------------
+# Serial Protocol Config
+# -------------------------------
+PROTOCOL          = "text"   # "text" CSV lines, or "binary" packed frames (needs the updated sketch)
+SEND_CHANGES_ONLY = True     # Skip frames identical to the last one sent, apart from keyframes
+CHANNEL_DEADBAND  = 0        # Change threshold per channel: one int, or a tuple with one per channel
+ADAPTIVE_RATE     = True     # Hold frames back to what the baud rate carries, axes and paddles first (see ratecontrol.py)
+MEASURE_LATENCY   = False    # Ask the sketch to echo frames and report round-trip latency (binary only)
+LATENCY_EXPORT    = ""       # On exit, write latency samples to this .csv (or .prom for Prometheus text)
+READ_TELEMETRY    = True     # Show the sketch's reports (frames, errors, loop time) on the status line
+TELEMETRY_EXPORT  = ""       # On exit, write the sketch's reports to this .csv (or .prom for Prometheus text)
+FAILSAFE_VALUES   = (0, 0, -1000, 0, 0, 0, 0, 0, 0, 0, 0, 0)  # Outputs when the link drops: throttle (z) cut, everything else centred
+
+class FrameProcessor:
+    """Per-tick processing for the fly script: profile inputs to output channels."""
+
+    def step(self, values, now):
+        (x_axis, y_axis, z_axis, c_axis, leftpaddle, rightpaddle,
+         left_pot, right_pot, swE_position, swB_position,
+         swC_position, swF_position) = values
+
+        # Output order:
+        # x_axis, y_axis, z_axis, c_axis, leftpaddle, rightpaddle,
+        # left_pot, right_pot, swE, swB, swC, swF
+        return (x_axis, y_axis, z_axis, c_axis,
+                leftpaddle, rightpaddle, left_pot, right_pot,
+                swE_position, swB_position, swC_position, swF_position)
+
+    def status(self):
+        return ""
+
+def main():
+    args = startup_args("Fly an RC model from a joystick.")
+    if args.list:
+        list_devices()
+        return
+
+    # Open the serial port & pick joysticks for the profile's devices:
+    # given specs first, then the device cache, and only then ask
+    profile = load_profile(PROFILE)
+    session = DeviceSession(profile, 115200, args.port or SERIAL_PORT, {**JOYSTICKS, **args.joystick},
+                            USE_DEVICE_CACHE and not args.no_cache)
+    if not session.start():
+        return
+    joysticks = session.joysticks
+    events = None
+    if INPUT_MODE == "events":
+        events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+        joysticks = events.states
+    inputs = compile_profile(profile, joysticks, INPUTS)
+    filters = InputFilters(profile.get("filters"), INPUTS)
+    recorder = TraceRecorder(RECORD_PATH, joysticks) if RECORD_PATH else None
+
+    processor = FrameProcessor()
+
+    print("Starting joystick loop. Press Ctrl+C to exit.")
+
+    link = SerialLink(session.ser, PROTOCOL, SEND_CHANGES_ONLY, CHANNEL_DEADBAND, MEASURE_LATENCY,
+                      READ_TELEMETRY, ADAPTIVE_RATE, FAILSAFE_VALUES)
+    scheduler = LoopScheduler(LOOP_RATE_HZ, LOOP_POLICY)
+    hud = StatusDisplay(scheduler, link.writer, quiet=QUIET, telemetry=link.telemetry, rate=link.rate)
+    prof = StageProfiler(PROFILE_STAGES, PROFILE_SNAPSHOT)
+    link.writer.profiler = prof
+    try:
+        while True:
+            if events:
+                events.wait(link.sender.keyframe_interval)
+                now = scheduler.tick()
+                t = start = prof.begin()
+            else:
+                now = scheduler.wait()
+                t = start = prof.begin()
+                pygame.event.pump()
+                t = prof.lap("pump", t)
+
+            if session.due(now) and session.check(now, link):
+                # A joystick came or went: bind the profile to what is connected now
+                joysticks = session.joysticks
+                if events:
+                    events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+                    joysticks = events.states
+                inputs = compile_profile(profile, joysticks, INPUTS)
+                if recorder:
+                    recorder.rebind(joysticks)
+            t = prof.lap("devices", t)
+
+            values = inputs.read()
+            t = prof.lap("read", t)
+            if filters:
+                filters.apply(values, now)
+                t = prof.lap("filters", t)
+            channels = processor.step(values, now)
+            t = prof.lap("process", t)
+            if recorder:
+                recorder.record(now, channels)
+                t = prof.lap("record", t)
+            link.send(channels, now)
+            t = prof.lap("send", t)
+            if hud.due(now):
+                hud.show(now, channels, processor.status())
+                prof.lap("status", t)
+            prof.lap("tick", start)
+            if prof.due(now):
+                prof.poll(now)
+    except KeyboardInterrupt:
+        hud.close()
+        print(scheduler.summary())
+        if prof.stages:
+            print(prof.summary())
+    finally:
+        link.close()
+        if recorder:
+            recorder.close()
+    print(link.summary())
+    if session.summary():
+        print(session.summary())
+    if link.latency and LATENCY_EXPORT:
+        link.latency.export(LATENCY_EXPORT)
+    if link.telemetry and TELEMETRY_EXPORT:
+        link.telemetry.export(TELEMETRY_EXPORT)
+
+if __name__ == "__main__":
+    main()
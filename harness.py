@@ -0,0 +1,229 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# Headless replay and load test: drive a script's per-tick processing from
+# synthetic or recorded joystick traces, faster than real time, into the
+# sketch emulator. No joystick, Arduino or display needed.
+#
+#   python harness.py --mode all --ticks 100000 --protocol binary
+
+import argparse
+import json
+import math
+import random
+import time
+
+from filters import FilterChain, InputFilters
+from mapping import compile_profile, load_profile
+from modes import MODES, load_mode, make_processor
+from profiler import StageProfiler
+from protocol import make_encoder
+from recorder import MAGIC, TraceFile
+from serial_link import FrameSender
+from sketchmodel import LoopbackSerial, SketchEmulator
+
+class VirtualJoystick:
+    """Stand-in for pygame.joystick.Joystick whose state is set by a trace."""
+
+    def __init__(self, name, num_axes, num_buttons):
+        self.name = name
+        self.axes = [0.0] * num_axes
+        self.buttons = [0] * num_buttons
+
+    def get_name(self):
+        return self.name
+
+    def get_numaxes(self):
+        return len(self.axes)
+
+    def get_numbuttons(self):
+        return len(self.buttons)
+
+    def get_axis(self, index):
+        return self.axes[index]
+
+    def get_button(self, index):
+        return self.buttons[index]
+
+def virtual_joysticks(profile):
+    """One VirtualJoystick per device role, just big enough for the profile."""
+    sizes = {dev["role"]: [0, 0] for dev in profile["devices"]}
+    for ch in profile["channels"]:
+        if ch["type"] == "axis":
+            sizes[ch["device"]][0] = max(sizes[ch["device"]][0], ch["index"] + 1)
+        elif ch["type"] == "button":
+            sizes[ch["device"]][1] = max(sizes[ch["device"]][1], ch["index"] + 1)
+        elif ch["type"] == "switch":
+            top = max(b for b, _ in ch["positions"])
+            sizes[ch["device"]][1] = max(sizes[ch["device"]][1], top + 1)
+    return {role: VirtualJoystick(f"virtual {role}", a, b) for role, (a, b) in sizes.items()}
+
+def synthetic_trace(joysticks, ticks, rate_hz, seed=0):
+    """
+    Yield (t, joysticks) for every tick, with each axis on its own slow sine
+    sweep and buttons toggling now and then. The joysticks are updated in place.
+    """
+    rng = random.Random(seed)
+    freqs = {role: [rng.uniform(0.1, 2.0) for _ in js.axes] for role, js in joysticks.items()}
+    for tick in range(ticks):
+        t = tick / rate_hz
+        for role, js in joysticks.items():
+            for i, f in enumerate(freqs[role]):
+                js.axes[i] = math.sin(2 * math.pi * f * t)
+            if js.buttons and rng.random() < 0.02:
+                b = rng.randrange(len(js.buttons))
+                js.buttons[b] ^= 1
+        yield t, joysticks
+
+def json_trace(path, joysticks):
+    """
+    Yield (t, joysticks) from a JSON-lines trace with one object per tick:
+    {"t": seconds, "devices": {role: {"axes": [...], "buttons": [...]}}}
+    """
+    with open(path) as f:
+        for line in f:
+            sample = json.loads(line)
+            for role, state in sample["devices"].items():
+                js = joysticks.get(role)
+                if js is None:
+                    continue
+                axes, buttons = state.get("axes", ()), state.get("buttons", ())
+                js.axes[:len(axes)] = axes[:len(js.axes)]
+                js.buttons[:len(buttons)] = buttons[:len(js.buttons)]
+            yield sample["t"], joysticks
+
+def run_mode(mode, ticks=10000, rate_hz=500, protocol="binary", changes_only=False,
+             trace_path=None, seed=0, batched_dac=True, filter_costs=False, stages=False):
+    """Run one mode headless and return a dict of throughput and correctness figures."""
+    module = load_mode(mode)
+    profile = load_profile(module.PROFILE)
+    joysticks = virtual_joysticks(profile)
+    inputs = compile_profile(profile, joysticks, module.INPUTS)
+    filters = InputFilters(profile.get("filters"), module.INPUTS, timed=filter_costs)
+    processor = make_processor(module, profile)
+    # Filter chains inside the processor (e.g. ABS brake smoothing)
+    chains = [(name, chain) for name, chain in vars(processor).items() if isinstance(chain, FilterChain)]
+    for _, chain in chains:
+        chain.timed = filter_costs
+    sketch = SketchEmulator(echo=False, batched_dac=batched_dac)
+    port = LoopbackSerial(sketch)
+    # Frames are handed to the sketch after the timed section, so the
+    # per-frame figures cover only the host side.
+    pending = []
+    sender = FrameSender(pending.append, make_encoder(protocol), changes_only)
+    prof = StageProfiler(stages, control_path="")
+
+    if trace_path:
+        with open(trace_path, "rb") as f:
+            recorded = f.read(len(MAGIC)) == MAGIC
+        trace = TraceFile(trace_path).replay(joysticks) if recorded else json_trace(trace_path, joysticks)
+    else:
+        trace = synthetic_trace(joysticks, ticks, rate_hz, seed)
+
+    busy_ns = 0
+    count = 0
+    mismatches = 0
+    sim_time = 0.0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for now, _ in trace:
+        t0 = time.perf_counter_ns()
+        t = prof.begin()
+        values = inputs.read()
+        t = prof.lap("read", t)
+        if filters:
+            filters.apply(values, now)
+            t = prof.lap("filters", t)
+        channels = processor.step(values, now)
+        t = prof.lap("process", t)
+        sent = sender.send(channels, now)
+        prof.lap("send", t)
+        busy_ns += time.perf_counter_ns() - t0
+        count += 1
+        sim_time = now
+        if sent:
+            port.write(pending.pop())
+            # The sketch's own parse of what it received must match what was sent
+            # (paddle-shift's 9th channel is the gear and is not checked).
+            checked = 8 if len(channels) < 12 else 12
+            if sketch.inputs[:checked] != tuple(channels[:checked]):
+                mismatches += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "mode": mode,
+        "protocol": protocol,
+        "ticks": count,
+        "frames": sender.sent,
+        "bytes": port.bytes_written,
+        "sim_seconds": sim_time,
+        "wall_seconds": wall,
+        "speedup": sim_time / wall if wall else 0.0,
+        "frames_per_sec": count / wall if wall else 0.0,
+        "us_per_frame": busy_ns / count / 1000 if count else 0.0,
+        "cpu_us_per_tick": cpu / count * 1e6 if count else 0.0,
+        "mismatches": mismatches,
+        "crc_errors": sketch.crc_errors,
+        "i2c_bytes_per_frame": sketch.dac_bus.bytes_per_frame(),
+        "i2c_us_per_frame": sketch.dac_bus.bus_time_us(),
+        "filter_costs": [filters.summary()] + [
+            f"{name}: " + ", ".join(f"{stage} {ns / 1000:.2f} us" for stage, ns in chain.costs())
+            for name, chain in chains
+        ],
+        "stages": prof.summary(),
+    }
+
+def format_result(r):
+    return (
+        f"{r['mode']:<12} {r['protocol']:<6} {r['ticks']:>8} ticks  {r['frames']:>8} frames  "
+        f"{r['bytes'] / max(r['frames'], 1):5.1f} B/frame  {r['frames_per_sec']:>9.0f} ticks/s  "
+        f"{r['speedup']:>7.1f}x real time  {r['us_per_frame']:6.2f} us/frame  "
+        f"{r['cpu_us_per_tick']:6.2f} cpu us/tick  {r['i2c_bytes_per_frame']:5.1f} I2C B/frame "
+        f"({r['i2c_us_per_frame']:5.1f} us)  {r['mismatches']} mismatches"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless replay and load test for the controller scripts.")
+    parser.add_argument("--mode", default="all", choices=["all"] + list(MODES))
+    parser.add_argument("--ticks", type=int, default=10000)
+    parser.add_argument("--rate", type=float, default=500, help="Simulated tick rate in Hz")
+    parser.add_argument("--protocol", default="binary", choices=["text", "binary"])
+    parser.add_argument("--changes-only", action="store_true", help="Suppress unchanged frames")
+    parser.add_argument("--trace", help="Recorded trace (RECORD_PATH) or JSON-lines trace to replay instead of synthetic input")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--filter-costs", action="store_true",
+                        help="Time every filter stage and print its mean cost per tick")
+    parser.add_argument("--stages", action="store_true",
+                        help="Time each stage of the tick and print its distribution")
+    parser.add_argument("--per-channel-dac", action="store_true",
+                        help="Model the old one-transaction-per-channel DAC writes in the sketch")
+    args = parser.parse_args()
+
+    modes = list(MODES) if args.mode == "all" else [args.mode]
+    failed = False
+    for mode in modes:
+        result = run_mode(mode, args.ticks, args.rate, args.protocol, args.changes_only,
+                          args.trace, args.seed, not args.per_channel_dac, args.filter_costs, args.stages)
+        print(format_result(result))
+        if args.filter_costs:
+            for line in result["filter_costs"]:
+                print(f"    {line}")
+        if args.stages:
+            for line in result["stages"].splitlines():
+                print(f"    {line}")
+        failed |= bool(result["mismatches"] or result["crc_errors"])
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
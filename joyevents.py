@@ -0,0 +1,122 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import time
+from array import array
+
+import pygame
+
+INPUT_EVENTS = (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP)
+
+class JoystickState:
+    """
+    Array-backed copy of one joystick's axes and buttons, kept current from
+    pygame events. It has the same getters as pygame.joystick.Joystick, so a
+    profile compiles against it exactly as against the real device.
+    """
+
+    def __init__(self, js):
+        self.name = js.get_name()
+        self.axes = array("d", (js.get_axis(i) for i in range(js.get_numaxes())))
+        self.buttons = array("B", (js.get_button(i) for i in range(js.get_numbuttons())))
+
+    def get_name(self):
+        return self.name
+
+    def get_numaxes(self):
+        return len(self.axes)
+
+    def get_numbuttons(self):
+        return len(self.buttons)
+
+    def get_axis(self, index):
+        return self.axes[index]
+
+    def get_button(self, index):
+        return self.buttons[index]
+
+class EventInput:
+    """
+    Event-driven replacement for pygame.event.pump() plus polling. Joystick
+    events update the JoystickState arrays and mark the changed inputs dirty;
+    wait() sleeps in pygame.event.wait until input arrives or the timeout
+    (e.g. the keyframe interval) passes, so an idle loop uses no CPU and a
+    frame can go out as soon as the stick moves. min_interval caps the wake
+    rate so a burst of events is coalesced into one frame.
+    """
+
+    def __init__(self, joysticks, min_interval=0.0, clock=time.perf_counter):
+        self.states = {}
+        self.by_instance = {}
+        for role, js in joysticks.items():
+            if js is None:
+                self.states[role] = None
+                continue
+            state = JoystickState(js)
+            self.states[role] = state
+            self.by_instance[js.get_instance_id()] = state
+        self.min_interval = min_interval
+        self.clock = clock
+        self.last_wake = 0.0
+        self.dirty = set()
+        self.events = 0
+        # set_allowed(None) would allow everything: block all types, then allow ours
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(INPUT_EVENTS) + [pygame.QUIT])
+
+    def _apply(self, event):
+        state = self.by_instance.get(event.instance_id)
+        if state is None:
+            return False
+        self.events += 1
+        if event.type == pygame.JOYAXISMOTION:
+            if state.axes[event.axis] == event.value:
+                return False
+            state.axes[event.axis] = event.value
+            self.dirty.add((event.instance_id, "axis", event.axis))
+        else:
+            value = 1 if event.type == pygame.JOYBUTTONDOWN else 0
+            if state.buttons[event.button] == value:
+                return False
+            state.buttons[event.button] = value
+            self.dirty.add((event.instance_id, "button", event.button))
+        return True
+
+    def drain(self):
+        """Apply every queued joystick event; returns True if an input changed."""
+        changed = False
+        for event in pygame.event.get(INPUT_EVENTS):
+            changed |= self._apply(event)
+        return changed
+
+    def wait(self, timeout):
+        """
+        Block until a mapped input changes or timeout seconds have passed
+        since the previous wake. Returns True if any input changed; the
+        dirty set says which.
+        """
+        self.dirty.clear()
+        now = self.clock()
+        earliest = self.last_wake + self.min_interval
+        if now < earliest:
+            time.sleep(earliest - now)
+        changed = self.drain()
+        deadline = self.last_wake + timeout
+        while not changed:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            event = pygame.event.wait(max(1, int(remaining * 1000)))
+            if event.type in INPUT_EVENTS:
+                changed = self._apply(event) | self.drain()
+        self.last_wake = self.clock()
+        return changed
@@ -0,0 +1,114 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import threading
+import time
+from collections import deque
+
+from protocol import ECHO_BODY, FLAG_ECHO_BYTE, FLAG_ECHO_MASK, FRAME_SIZE_STAMPED, to_micros
+
+# -------------------------------
+# Latency Collector Config
+# -------------------------------
+SAMPLE_WINDOW = 10000      # Most recent echoes kept for percentiles and export
+
+class LatencyCollector:
+    """
+    Round-trip latency from the tick that read the inputs to the echo the
+    sketch sends right after its DAC write. The echo carries the host
+    timestamp back, so no per-frame bookkeeping is needed on the host.
+    Frames still in flight count as lost until their echo arrives.
+    """
+
+    def __init__(self, window=SAMPLE_WINDOW, clock=time.perf_counter):
+        self.clock = clock
+        self.samples = deque(maxlen=window)   # (seq, host_us, device_us, rtt_us)
+        self.requested = 0
+        self.received = 0
+        self.jitter_us = 0.0
+        self.last_rtt = None
+        self.lock = threading.Lock()
+
+    def on_write(self, frame):
+        """SerialWriter hook: count frames that asked for an echo."""
+        if len(frame) == FRAME_SIZE_STAMPED and frame[FLAG_ECHO_BYTE] & FLAG_ECHO_MASK:
+            self.requested += 1
+
+    def on_echo(self, payload, received_at=None):
+        """Reader hook for MSG_ECHO frames."""
+        if received_at is None:
+            received_at = self.clock()
+        seq, host_us, device_us = ECHO_BODY.unpack(payload)
+        rtt = (to_micros(received_at) - host_us) & 0xFFFFFFFF
+        with self.lock:
+            self.received += 1
+            self.samples.append((seq, host_us, device_us, rtt))
+            if self.last_rtt is not None:
+                # RFC 3550 style smoothed jitter
+                self.jitter_us += (abs(rtt - self.last_rtt) - self.jitter_us) / 16
+            self.last_rtt = rtt
+
+    def loss(self):
+        if not self.requested:
+            return 0.0
+        return max(0.0, 1.0 - self.received / self.requested)
+
+    def percentiles(self, points=(50, 95, 99)):
+        with self.lock:
+            rtts = sorted(s[3] for s in self.samples)
+        if not rtts:
+            return {p: 0 for p in points}
+        last = len(rtts) - 1
+        return {p: rtts[min(last, int(round(p / 100.0 * last)))] for p in points}
+
+    def summary(self):
+        pct = self.percentiles()
+        return (
+            f"round-trip p50 {pct[50] / 1000:.2f} ms, p95 {pct[95] / 1000:.2f} ms, "
+            f"p99 {pct[99] / 1000:.2f} ms, jitter {self.jitter_us / 1000:.2f} ms, "
+            f"{self.received}/{self.requested} echoed ({self.loss() * 100:.1f}% lost)"
+        )
+
+    def prometheus_text(self, prefix="rcsim_latency"):
+        pct = self.percentiles()
+        lines = [
+            f"# HELP {prefix}_roundtrip_seconds Input tick to sketch echo after the DAC write.",
+            f"# TYPE {prefix}_roundtrip_seconds summary",
+        ]
+        for p, rtt in pct.items():
+            lines.append(f'{prefix}_roundtrip_seconds{{quantile="{p / 100:g}"}} {rtt / 1e6:.6f}')
+        lines += [
+            f"{prefix}_roundtrip_seconds_count {self.received}",
+            f"# TYPE {prefix}_jitter_seconds gauge",
+            f"{prefix}_jitter_seconds {self.jitter_us / 1e6:.6f}",
+            f"# TYPE {prefix}_echo_requested_total counter",
+            f"{prefix}_echo_requested_total {self.requested}",
+            f"# TYPE {prefix}_echo_received_total counter",
+            f"{prefix}_echo_received_total {self.received}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_csv(self, path):
+        with self.lock:
+            samples = list(self.samples)
+        with open(path, "w") as f:
+            f.write("seq,host_us,device_us,rtt_us\n")
+            for row in samples:
+                f.write(",".join(map(str, row)) + "\n")
+
+    def export(self, path):
+        """Write the samples as CSV, or Prometheus text for a .prom path."""
+        if path.endswith(".prom"):
+            with open(path, "w") as f:
+                f.write(self.prometheus_text())
+        else:
+            self.write_csv(path)
@@ -1,155 +1,249 @@
-
-# -----------------------------------------------------------------------------
-# Project Name: Racing Simulator-RC Controller
-# Author: bitsbits [https://www.youtube.com/@bits-bits]
-# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
-#
-# You are free to use, modify, and share this code for non-commercial purposes,
-# provided you credit the original author. Commercial use of this code or any
-# derivatives is not permitted without explicit permission.
-#
-# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
-# -----------------------------------------------------------------------------
-
-import pygame
-import serial
-import serial.tools.list_ports
-import time
-
-# -------------------------------
-# ABS and Brake Smoothing Config
-# -------------------------------
-BRAKE_DECEL_RATE = 3500    # Max deceleration rate (units/sec)
-ENABLE_ABS       = True    # Toggle ABS simulation
-ABS_FREQUENCY    = 20      # Pulses per second for ABS
-ABS_DUTY_CYCLE   = 0.75    # Fraction of each pulse where brakes are applied
-
-def apply_braking_smooth(current_throttle, brake_target, dt, now, brake_val):
-    """
-    Ramp current_throttle down to brake_target at BRAKE_DECEL_RATE.
-    When ABS engaged (brake_val >= 1400), pulse per ABS_FREQUENCY & duty cycle.
-    """
-    decel = BRAKE_DECEL_RATE * dt
-    if ENABLE_ABS and brake_val >= 1400:
-        period = 1.0 / ABS_FREQUENCY
-        if (now % period) >= (ABS_DUTY_CYCLE * period):
-            return current_throttle
-    if current_throttle > brake_target:
-        return max(current_throttle - decel, brake_target)
-    return brake_target
-
-def select_serial_port():
-    ports = list(serial.tools.list_ports.comports())
-    if not ports:
-        print("No serial ports found. Plug in your Arduino.")
-        return None
-    print("Available serial ports:")
-    for i, p in enumerate(ports):
-        print(f"{i}: {p.device} — {p.description}")
-    idx = int(input("Select the Arduino port index: "))
-    return ports[idx].device
-
-def main():
-    # Open serial
-    port = select_serial_port()
-    if not port:
-        return
-    try:
-        ser = serial.Serial(port, 57600, timeout=1)
-        print(f"Serial opened on {port}")
-    except Exception as e:
-        print(f"Failed to open {port}: {e}")
-        return
-
-    # Init Pygame & joystick
-    pygame.init()
-    count = pygame.joystick.get_count()
-    if count == 0:
-        print("No joystick detected.")
-        return
-    print("Available joysticks:")
-    for i in range(count):
-        js = pygame.joystick.Joystick(i)
-        js.init()
-        print(f"{i}: {js.get_name()}")
-    idx = int(input("Select joystick index to use: "))
-    j = pygame.joystick.Joystick(idx)
-    j.init()
-    print("Joystick initialized. Press Ctrl+C to exit.")
-
-    engine_output = 0
-    neutral = 1000
-    last_time = time.time()
-
-    while True:
-        pygame.event.pump()
-        now = time.time()
-        dt = now - last_time
-        last_time = now
-
-        # Axes
-        x_axis = int(j.get_axis(0) * 1000) if j.get_numaxes() > 0 else 0
-        y_axis = int(j.get_axis(1) * 1000) if j.get_numaxes() > 1 else 0
-        z_axis = int(j.get_axis(4) * 1000) if j.get_numaxes() > 4 else 0
-
-        # Paddles
-        leftpaddle  = int(j.get_button(5)) if j.get_numbuttons() > 5 else 0
-        rightpaddle = int(j.get_button(4)) if j.get_numbuttons() > 4 else 0
-
-        # Linear throttle/brake
-        thr = neutral - y_axis
-        brk = neutral - z_axis
-        combined = thr if thr > brk else -brk
-        combined = int(combined / 2)
-
-        # ABS/brake smoothing
-        if combined < 0:
-            engine_output = apply_braking_smooth(engine_output, combined, dt, now, brk)
-        else:
-            engine_output = combined
-
-        # Handbrake (axis 6)
-        try:
-            hb = j.get_axis(6)
-        except:
-            hb = 1.0
-        if hb <= 0.5:
-            frac = (0.5 - hb) / 1.5
-            engine_output = int(-250 - 750 * frac)
-
-        # Pots
-        left_pot  = int(j.get_axis(6) * 1000) if j.get_numaxes() > 6 else 0
-        right_pot = int(j.get_axis(7) * 1000) if j.get_numaxes() > 7 else 0
-
-        # Switches (use same button IDs)
-        swE = (-1 if j.get_button(87)
-               else 0 if j.get_button(86)
-               else 1 if j.get_button(85)
-               else -1)
-        swB = (-1 if j.get_button(90)
-               else 0 if j.get_button(89)
-               else 1 if j.get_button(88)
-               else -1)
-        swC = (-1 if j.get_button(94)
-               else 0 if j.get_button(93)
-               else 1 if j.get_button(92)
-               else -1)
-        swF = (-1 if j.get_button(78)
-               else 0 if j.get_button(77)
-               else 1 if j.get_button(76)
-               else -1)
-
-        # Build & send
-        out = (
-            f"{int(engine_output)},{x_axis},0,0,"
-            f"{leftpaddle},{rightpaddle},"
-            f"{left_pot},{right_pot},"
-            f"{swE},{swB},{swC},{swF}\n"
-        )
-        print(out.strip())
-        ser.write(out.encode())
-
-        time.sleep(0.01)
-
-if __name__ == "__main__":
-    main()
+
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import pygame
+
+from absengine import AbsEngine, step_curve
+from curves import ResponseCurves, mix_pedals
+from devices import DeviceSession, list_devices, startup_args
+from filters import FilterChain, InputFilters, SlewLimit
+from joyevents import EventInput
+from mapping import compile_profile, load_profile
+from profiler import StageProfiler
+from recorder import TraceRecorder
+from scheduler import LoopScheduler
+from serial_link import SerialLink
+from status import StatusDisplay
+
+# -------------------------------
+# Loop Rate Config
+# -------------------------------
+LOOP_RATE_HZ = 100      # Control-loop tick rate; keep under the link's frame capacity
+LOOP_POLICY  = "skip"   # "skip" drops missed ticks, "catchup" runs them back-to-back
+INPUT_MODE   = "poll"   # "poll" reads every input each tick, "events" wakes on joystick input
+QUIET        = False    # Print nothing while running (no status line)
+
+# -------------------------------
+# Profiling Config
+# -------------------------------
+PROFILE_STAGES   = False   # Time every loop stage from the start (switch while running: see profiler.py)
+PROFILE_SNAPSHOT = ""      # Write stage timings to this JSON file instead of printing summaries
+
+# -------------------------------
+# Input Profile Config
+# -------------------------------
+PROFILE = "abs"         # Profile name in profiles/, or a path to a JSON/TOML profile
+INPUTS  = ("x_axis", "y_axis", "z_axis", "leftpaddle", "rightpaddle", "handbrake",
+           "left_pot", "right_pot", "swE", "swB", "swC", "swF")
+RECORD_PATH = ""        # Record raw inputs and output channels each tick to this trace file
+
+# -------------------------------
+# Device Selection Config
+# -------------------------------
+SERIAL_PORT      = ""     # Port to open without asking: device name, "VID:PID", "serial=..." or "name=<pattern>"
+JOYSTICKS        = {}     # Role -> joystick without asking: name pattern, "guid=..." or "#index"
+USE_DEVICE_CACHE = True   # Reuse the devices last picked for this profile when they are still connected
+
+# -------------------------------
+# Serial Protocol Config
+# -------------------------------
+PROTOCOL          = "text"   # "text" CSV lines, or "binary" packed frames (needs the updated sketch)
+SEND_CHANGES_ONLY = True     # Skip frames identical to the last one sent, apart from keyframes
+CHANNEL_DEADBAND  = 0        # Change threshold per channel: one int, or a tuple with one per channel
+ADAPTIVE_RATE     = True     # Hold frames back to what the baud rate carries, axes and paddles first (see ratecontrol.py)
+MEASURE_LATENCY   = False    # Ask the sketch to echo frames and report round-trip latency (binary only)
+LATENCY_EXPORT    = ""       # On exit, write latency samples to this .csv (or .prom for Prometheus text)
+READ_TELEMETRY    = True     # Show the sketch's reports (frames, errors, loop time) on the status line
+TELEMETRY_EXPORT  = ""       # On exit, write the sketch's reports to this .csv (or .prom for Prometheus text)
+FAILSAFE_VALUES   = (0,) * 12  # Outputs when the link drops: throttle/brake (x) and steering centred
+
+# -------------------------------
+# ABS and Brake Smoothing Config
+# -------------------------------
+BRAKE_DECEL_RATE = 3500    # Max deceleration rate (units/sec)
+ENABLE_ABS       = True    # Toggle ABS simulation
+ABS_FREQUENCY    = 20      # Pulses per second for ABS
+ABS_DUTY_CYCLE   = 0.75    # Fraction of each pulse where brakes are applied
+ABS_DUTY_CURVE   = step_curve(1400, ABS_DUTY_CYCLE)  # (brake travel, duty) points; duty 1.0 = no ABS
+ABS_EDGE_FRAMES  = True    # Send an extra frame at each pulse edge that falls between ticks
+
+ACCEPTS_CURVES = True   # FrameProcessor takes the profile's response curves (see modes.make_processor)
+
+class FrameProcessor:
+    """
+    Per-tick processing for the ABS script: turn one read of the profile
+    inputs into the output channels. Keeps the brake-smoothing state.
+    """
+
+    def __init__(self, curves=None):
+        self.curves = curves if curves is not None else ResponseCurves()
+        self.engine_output = 0
+        # Brake smoothing: ramp the output down at BRAKE_DECEL_RATE
+        self.brake_smoothing = FilterChain([SlewLimit(fall=BRAKE_DECEL_RATE)])
+        self.brake_smoothing.reset(self.engine_output)
+        self.abs = AbsEngine(ABS_FREQUENCY, ABS_DUTY_CURVE, ENABLE_ABS)
+        self.last_time = None
+        self.abs_active = False
+
+    def step(self, values, now):
+        (x_axis, y_axis, z_axis, leftpaddle, rightpaddle, handbrake,
+         left_pot, right_pot, swE, swB, swC, swF) = values
+        dt = now - self.last_time if self.last_time is not None else 0.0
+        self.last_time = now
+
+        curves = self.curves
+        x_axis = curves.steering.map(x_axis)
+
+        # Throttle/brake pedal travel through the response curves (linear by default)
+        thr, brk = curves.pedals(y_axis, z_axis)
+        combined = mix_pedals(thr, brk)
+        output = self.apply_braking(now, dt, combined, brk, handbrake)
+
+        return (output, x_axis, 0, 0,
+                leftpaddle, rightpaddle,
+                left_pot, right_pot,
+                swE, swB, swC, swF)
+
+    def apply_braking(self, now, dt, combined, brk, handbrake):
+        """
+        ABS and brake smoothing on the combined output, then the handbrake.
+        Returns the engine output for this tick.
+        """
+        # ABS/brake smoothing: the output is held in the release part of each pulse
+        applied = self.abs.update(now, brk if combined < 0 else 0)
+        if combined < 0:
+            if applied:
+                self.engine_output = self.brake_smoothing.step(combined, dt)
+        else:
+            self.engine_output = combined
+        self.abs_active = self.abs.active
+
+        # Handbrake (axis 6)
+        if handbrake <= 500:
+            frac = (500 - handbrake) / 1500
+            self.engine_output = int(-250 - 750 * frac)
+        # The next ramp starts from whatever was output this tick
+        self.brake_smoothing.reset(self.engine_output)
+        return int(self.engine_output)
+
+    def next_edge(self):
+        """Clock time of the next ABS pulse edge, or None when ABS is idle."""
+        return self.abs.next_edge()
+
+    def status(self):
+        return "ABS on" if self.abs_active else "ABS off"
+
+def main():
+    args = startup_args("Drive an RC car with linear brake and ABS.")
+    if args.list:
+        list_devices()
+        return
+
+    # Open the serial port & pick joysticks for the profile's devices:
+    # given specs first, then the device cache, and only then ask
+    profile = load_profile(PROFILE)
+    session = DeviceSession(profile, 57600, args.port or SERIAL_PORT, {**JOYSTICKS, **args.joystick},
+                            USE_DEVICE_CACHE and not args.no_cache)
+    if not session.start():
+        return
+    joysticks = session.joysticks
+    events = None
+    if INPUT_MODE == "events":
+        events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+        joysticks = events.states
+    inputs = compile_profile(profile, joysticks, INPUTS)
+    filters = InputFilters(profile.get("filters"), INPUTS)
+    recorder = TraceRecorder(RECORD_PATH, joysticks) if RECORD_PATH else None
+
+    processor = FrameProcessor(ResponseCurves(profile.get("curves")))
+    link = SerialLink(session.ser, PROTOCOL, SEND_CHANGES_ONLY, CHANNEL_DEADBAND, MEASURE_LATENCY,
+                      READ_TELEMETRY, ADAPTIVE_RATE, FAILSAFE_VALUES)
+    scheduler = LoopScheduler(LOOP_RATE_HZ, LOOP_POLICY)
+    hud = StatusDisplay(scheduler, link.writer, quiet=QUIET, telemetry=link.telemetry, rate=link.rate)
+    prof = StageProfiler(PROFILE_STAGES, PROFILE_SNAPSHOT)
+    link.writer.profiler = prof
+    try:
+        while True:
+            if events:
+                # Brake smoothing and ABS still need a tick every period
+                events.wait(scheduler.period)
+                now = scheduler.tick()
+                t = start = prof.begin()
+            else:
+                now = scheduler.wait()
+                t = start = prof.begin()
+                pygame.event.pump()
+                t = prof.lap("pump", t)
+
+            if session.due(now) and session.check(now, link):
+                # A joystick came or went: bind the profile to what is connected now
+                joysticks = session.joysticks
+                if events:
+                    events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+                    joysticks = events.states
+                inputs = compile_profile(profile, joysticks, INPUTS)
+                if recorder:
+                    recorder.rebind(joysticks)
+            t = prof.lap("devices", t)
+
+            values = inputs.read()
+            t = prof.lap("read", t)
+            if filters:
+                filters.apply(values, now)
+                t = prof.lap("filters", t)
+            channels = processor.step(values, now)
+            t = prof.lap("process", t)
+            if recorder:
+                recorder.record(now, channels)
+                t = prof.lap("record", t)
+            link.send(channels, now)
+            t = prof.lap("send", t)
+            # An ABS pulse edge before the next tick gets its own frame, on time
+            edge = processor.next_edge() if ABS_EDGE_FRAMES and not events else None
+            if edge is not None and edge < scheduler.deadline:
+                now = scheduler.sleep_until(edge)
+                if start:
+                    # Leave the sleep out of the tick time
+                    resumed = prof.begin()
+                    start += resumed - t
+                    t = resumed
+                channels = processor.step(values, now)
+                if recorder:
+                    recorder.record(now, channels)
+                link.send(channels, now)
+                t = prof.lap("edge", t)
+            if hud.due(now):
+                hud.show(now, channels, processor.status())
+                prof.lap("status", t)
+            prof.lap("tick", start)
+            if prof.due(now):
+                prof.poll(now)
+    except KeyboardInterrupt:
+        hud.close()
+        print(scheduler.summary())
+        if prof.stages:
+            print(prof.summary())
+    finally:
+        link.close()
+        if recorder:
+            recorder.close()
+    print(link.summary())
+    if session.summary():
+        print(session.summary())
+    if link.latency and LATENCY_EXPORT:
+        link.latency.export(LATENCY_EXPORT)
+    if link.telemetry and TELEMETRY_EXPORT:
+        link.telemetry.export(TELEMETRY_EXPORT)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import json
+import os
+
+from curves import validate_curves
+from filters import validate_filters
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: JSON profiles only
+    tomllib = None
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# -----------------------------------------------------------------------------
+# Profile format (JSON or TOML)
+#
+#   name      profile name
+#   devices   list of {"role", "prompt", "optional", "ask"}; one joystick each
+#   channels  list of input channels, read in this order:
+#     {"name", "type": "axis",   "device", "index", "scale"=1000, "invert", "default"=0}
+#     {"name", "type": "button", "device", "index", "invert", "default"=0}
+#     {"name", "type": "switch", "device", "positions": [[button, value], ...], "default"}
+#         the first pressed button in positions wins, else default
+#     {"name", "type": "const",  "value"}
+#   curves    optional steering/throttle/brake response curves (see curves.py)
+#   filters   optional per-channel filter stages (see filters.py)
+# -----------------------------------------------------------------------------
+
+CHANNEL_TYPES = ("axis", "button", "switch", "const")
+
+def load_profile(name_or_path):
+    """Load a profile by path, or by name from the profiles directory."""
+    path = name_or_path
+    if not os.path.exists(path):
+        for ext in (".json", ".toml"):
+            candidate = os.path.join(PROFILE_DIR, name_or_path + ext)
+            if os.path.exists(candidate):
+                path = candidate
+                break
+        else:
+            raise FileNotFoundError(f"No profile named {name_or_path!r} in {PROFILE_DIR}")
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML profiles need Python 3.11 or newer")
+        with open(path, "rb") as f:
+            profile = tomllib.load(f)
+    else:
+        with open(path) as f:
+            profile = json.load(f)
+    validate_profile(profile)
+    return profile
+
+def validate_profile(profile):
+    """Check the profile structure; raises ValueError on the first problem."""
+    name = profile.get("name", "?")
+    roles = set()
+    for dev in profile.get("devices", []):
+        if "role" not in dev:
+            raise ValueError(f"Profile {name}: device without a role")
+        roles.add(dev["role"])
+    seen = set()
+    for ch in profile.get("channels", []):
+        cname = ch.get("name")
+        if not cname:
+            raise ValueError(f"Profile {name}: channel without a name")
+        if cname in seen:
+            raise ValueError(f"Profile {name}: duplicate channel {cname!r}")
+        seen.add(cname)
+        kind = ch.get("type")
+        if kind not in CHANNEL_TYPES:
+            raise ValueError(f"Profile {name}: channel {cname!r} has unknown type {kind!r}")
+        if kind == "const":
+            if "value" not in ch:
+                raise ValueError(f"Profile {name}: const channel {cname!r} needs a value")
+            continue
+        if ch.get("device") not in roles:
+            raise ValueError(f"Profile {name}: channel {cname!r} uses unknown device {ch.get('device')!r}")
+        if kind == "switch":
+            if not ch.get("positions"):
+                raise ValueError(f"Profile {name}: switch {cname!r} needs positions")
+        elif not isinstance(ch.get("index"), int):
+            raise ValueError(f"Profile {name}: channel {cname!r} needs an integer index")
+    if "curves" in profile:
+        validate_curves(profile["curves"], name)
+    if "filters" in profile:
+        validate_filters(profile["filters"], seen, name)
+
+class MappingPlan:
+    """
+    A profile compiled against the joysticks actually connected. Every read
+    is a precomputed (slot, bound method, index, ...) operation, so the
+    per-frame path has no capability checks or exception handling left.
+    """
+
+    def __init__(self, names, values, axis_ops, button_ops, switch_ops):
+        self.names = names
+        self.values = values
+        self.axis_ops = axis_ops
+        self.button_ops = button_ops
+        self.switch_ops = switch_ops
+
+    def read(self):
+        """Read every channel; returns the shared values list in name order."""
+        values = self.values
+        for slot, get_axis, index, scale in self.axis_ops:
+            values[slot] = int(get_axis(index) * scale)
+        for slot, get_button, index, on, off in self.button_ops:
+            values[slot] = on if get_button(index) else off
+        for slot, get_button, positions, default in self.switch_ops:
+            for button, value in positions:
+                if get_button(button):
+                    values[slot] = value
+                    break
+            else:
+                values[slot] = default
+        return values
+
+def compile_profile(profile, devices, names):
+    """
+    Validate the profile against the selected joysticks ({role: joystick or
+    None}) once, and build a MappingPlan whose read() returns values in the
+    order of names. Inputs a device does not have are read as their default.
+    """
+    by_name = {ch["name"]: ch for ch in profile["channels"]}
+    missing = [n for n in names if n not in by_name]
+    if missing:
+        raise ValueError(f"Profile {profile.get('name', '?')} is missing channels: {', '.join(missing)}")
+
+    values = [0] * len(names)
+    axis_ops, button_ops, switch_ops = [], [], []
+    for slot, cname in enumerate(names):
+        ch = by_name[cname]
+        kind = ch["type"]
+        default = ch.get("default", 0)
+        if kind == "const":
+            values[slot] = ch["value"]
+            continue
+        js = devices.get(ch["device"])
+        values[slot] = default
+        if js is None:
+            continue
+        if kind == "axis":
+            if ch["index"] >= js.get_numaxes():
+                print(f"Warning: {js.get_name()} has no axis {ch['index']} for {cname}; using {default}")
+                continue
+            scale = ch.get("scale", 1000)
+            axis_ops.append((slot, js.get_axis, ch["index"], -scale if ch.get("invert") else scale))
+        elif kind == "button":
+            if ch["index"] >= js.get_numbuttons():
+                print(f"Warning: {js.get_name()} has no button {ch['index']} for {cname}; using {default}")
+                continue
+            on, off = (0, 1) if ch.get("invert") else (1, 0)
+            button_ops.append((slot, js.get_button, ch["index"], on, off))
+        else:
+            count = js.get_numbuttons()
+            positions = tuple((b, v) for b, v in ch["positions"] if b < count)
+            if len(positions) < len(ch["positions"]):
+                print(f"Warning: {js.get_name()} is missing buttons for switch {cname}")
+            if positions:
+                switch_ops.append((slot, js.get_button, positions, default))
+    return MappingPlan(tuple(names), values, axis_ops, button_ops, switch_ops)
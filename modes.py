@@ -0,0 +1,47 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import importlib
+
+from curves import ResponseCurves
+
+# Mode name -> script module providing PROFILE, INPUTS, the config constants
+# and FrameProcessor
+MODES = {
+    "drive": "drivelinearthrottle",
+    "fly": "fly",
+    "abs": "linearABSEbrake",
+    "paddleshift": "paddleshifttimeaccel",
+}
+
+# Baud rate each script opens its port at
+BAUD_RATES = {
+    "drive": 57600,
+    "fly": 115200,
+    "abs": 57600,
+    "paddleshift": 115200,
+}
+
+def load_mode(mode):
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r} (expected one of {', '.join(MODES)})")
+    return importlib.import_module(MODES[mode])
+
+def make_processor(module, profile):
+    """The script's FrameProcessor, with the profile's response curves if it sets any."""
+    curves = profile.get("curves")
+    if not curves:
+        return module.FrameProcessor()
+    # Only the pedal scripts take response curves; fly has no combine step
+    if not getattr(module, "ACCEPTS_CURVES", False):
+        raise ValueError(f"Profile {profile.get('name', '?')}: {module.__name__} does not use response curves")
+    return module.FrameProcessor(ResponseCurves(curves))
@@ -1,177 +1,216 @@
-
-# -----------------------------------------------------------------------------
-# Project Name: Racing Simulator-RC Controller
-# Author: bitsbits [https://www.youtube.com/@bits-bits]
-# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
-#
-# You are free to use, modify, and share this code for non-commercial purposes,
-# provided you credit the original author. Commercial use of this code or any
-# derivatives is not permitted without explicit permission.
-#
-# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
-# -----------------------------------------------------------------------------
-
-import pygame
-import serial
-import serial.tools.list_ports
-import time
-
-def select_serial_port():
-    ports = list(serial.tools.list_ports.comports())
-    if not ports:
-        print("No serial ports found. Make sure your Arduino is plugged in.")
-        return None
-    print("Available serial ports:")
-    for i, p in enumerate(ports):
-        print(f"{i}: {p.device} — {p.description}")
-    idx = int(input("Select the Arduino port index: "))
-    return ports[idx].device
-
-def main():
-    # Serial‑port selection by index
-    serial_port = select_serial_port()
-    if not serial_port:
-        return
-    try:
-        ser = serial.Serial(serial_port, 115200, timeout=1)
-        print(f"Opened serial connection on {serial_port}")
-    except Exception as e:
-        print(f"Could not open serial port {serial_port}: {e}")
-        return
-
-    # Initialize Pygame and require at least one joystick
-    pygame.init()
-    joystick_count = pygame.joystick.get_count()
-    if joystick_count == 0:
-        print("No joysticks detected. Please connect your controller.")
-        return
-
-    print("Available joysticks:")
-    for i in range(joystick_count):
-        js = pygame.joystick.Joystick(i)
-        js.init()
-        print(f"{i}: {js.get_name()}")
-
-    # Single joystick for all controls
-    idx = int(input("Select joystick index for all controls: "))
-    j = pygame.joystick.Joystick(idx)
-    j.init()
-
-    print("Controller initialized. Press Ctrl+C to exit.")
-
-    # Gear and acceleration setup
-    gear = 1
-    max_gear = 6
-    acceleration_durations = [0, 0.65, 0.9, 1.25, 1.875, 2.3, 2.5]
-    right_paddle_pressed = False
-    left_paddle_pressed = False
-    combined_output_current = 0
-    combined_output_target = 0
-    acceleration_start_time = None
-    acceleration_duration = acceleration_durations[gear]
-    interpolation_start_value = 0
-
-    while True:
-        pygame.event.pump()
-
-        # Steering, throttle, brake from axes 0, 1, 4
-        try:
-            x_axis = int(j.get_axis(0) * 1000)
-        except:
-            x_axis = 0
-        try:
-            y_axis = int(j.get_axis(1) * 1000)
-        except:
-            y_axis = 0
-        try:
-            z_axis = int(j.get_axis(4) * 1000)
-        except:
-            z_axis = 0
-
-        # Paddle buttons for shifting (buttons 5=downshift, 4=upshift)
-        try:
-            leftpaddle = int(j.get_button(5))
-        except:
-            leftpaddle = 0
-        try:
-            rightpaddle = int(j.get_button(4))
-        except:
-            rightpaddle = 0
-
-        # Compute raw combined output
-        neutral = 1000
-        thr = neutral - y_axis
-        brk = neutral - z_axis
-        combined = thr if thr > brk else -brk
-        combined = int(combined / 2)
-
-        # Gear shifting with debouncing
-        if rightpaddle and not right_paddle_pressed:
-            if gear < max_gear:
-                gear += 1
-                acceleration_duration = acceleration_durations[gear]
-                acceleration_start_time = time.time()
-                interpolation_start_value = combined_output_current
-            right_paddle_pressed = True
-        elif not rightpaddle:
-            right_paddle_pressed = False
-
-        if leftpaddle and not left_paddle_pressed:
-            if gear > 1:
-                gear -= 1
-                acceleration_duration = acceleration_durations[gear]
-                acceleration_start_time = time.time()
-                interpolation_start_value = combined_output_current
-            left_paddle_pressed = True
-        elif not leftpaddle:
-            left_paddle_pressed = False
-
-        # Apply gear ratio
-        if combined > 0:
-            combined_output_target = int(combined * (gear / max_gear))
-        else:
-            combined_output_target = combined
-
-        # Interpolate acceleration / immediate braking
-        if combined < 0:
-            combined_output_current = combined_output_target
-            acceleration_start_time = None
-        elif combined > 0:
-            if combined_output_current < 0:
-                combined_output_current = 0
-                acceleration_start_time = time.time()
-                interpolation_start_value = 0
-            if acceleration_start_time is None:
-                acceleration_start_time = time.time()
-                interpolation_start_value = combined_output_current
-            elapsed = time.time() - acceleration_start_time
-            frac = min(elapsed / acceleration_duration, 1.0)
-            combined_output_current = int(
-                interpolation_start_value + (combined_output_target - interpolation_start_value) * frac
-            )
-            if frac >= 1.0:
-                acceleration_start_time = None
-        else:
-            combined_output_current = combined_output_target
-
-        # Potentiometers on axes 6 and 7
-        try:
-            left_pot = int(j.get_axis(6) * 1000)
-        except:
-            left_pot = 0
-        try:
-            right_pot = int(j.get_axis(7) * 1000)
-        except:
-            right_pot = 0
-
-        # Build and send message:
-        # combined_output_current, x_axis, 0, 0, leftpaddle, rightpaddle, left_pot, right_pot, gear
-        msg = (
-            f"{combined_output_current},{x_axis},0,0,"
-            f"{leftpaddle},{rightpaddle},{left_pot},{right_pot},{gear}\n"
-        )
-        print(msg.strip())
-        ser.write(msg.encode())
-
-if __name__ == "__main__":
-    main()
+
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import pygame
+
+from curves import ResponseCurves, mix_pedals
+from devices import DeviceSession, list_devices, startup_args
+from filters import InputFilters
+from joyevents import EventInput
+from mapping import compile_profile, load_profile
+from profiler import StageProfiler
+from powertrain import Powertrain
+from recorder import TraceRecorder
+from scheduler import LoopScheduler
+from serial_link import SerialLink
+from status import StatusDisplay
+
+# -------------------------------
+# Loop Rate Config
+# -------------------------------
+LOOP_RATE_HZ = 200      # Control-loop tick rate; keep under the link's frame capacity
+LOOP_POLICY  = "skip"   # "skip" drops missed ticks, "catchup" runs them back-to-back
+INPUT_MODE   = "poll"   # "poll" reads every input each tick, "events" wakes on joystick input
+QUIET        = False    # Print nothing while running (no status line)
+
+# -------------------------------
+# Profiling Config
+# -------------------------------
+PROFILE_STAGES   = False   # Time every loop stage from the start (switch while running: see profiler.py)
+PROFILE_SNAPSHOT = ""      # Write stage timings to this JSON file instead of printing summaries
+
+# -------------------------------
+# Input Profile Config
+# -------------------------------
+PROFILE = "paddleshift" # Profile name in profiles/, or a path to a JSON/TOML profile
+INPUTS  = ("x_axis", "y_axis", "z_axis", "leftpaddle", "rightpaddle",
+           "left_pot", "right_pot")
+RECORD_PATH = ""        # Record raw inputs and output channels each tick to this trace file
+
+# -------------------------------
+# Device Selection Config
+# -------------------------------
+SERIAL_PORT      = ""     # Port to open without asking: device name, "VID:PID", "serial=..." or "name=<pattern>"
+JOYSTICKS        = {}     # Role -> joystick without asking: name pattern, "guid=..." or "#index"
+USE_DEVICE_CACHE = True   # Reuse the devices last picked for this profile when they are still connected
+
+# -------------------------------
+# Serial Protocol Config
+# -------------------------------
+PROTOCOL          = "text"   # "text" CSV lines, or "binary" packed frames (needs the updated sketch)
+SEND_CHANGES_ONLY = True     # Skip frames identical to the last one sent, apart from keyframes
+CHANNEL_DEADBAND  = 0        # Change threshold per channel: one int, or a tuple with one per channel
+ADAPTIVE_RATE     = True     # Hold frames back to what the baud rate carries, axes and paddles first (see ratecontrol.py)
+MEASURE_LATENCY   = False    # Ask the sketch to echo frames and report round-trip latency (binary only)
+LATENCY_EXPORT    = ""       # On exit, write latency samples to this .csv (or .prom for Prometheus text)
+READ_TELEMETRY    = True     # Show the sketch's reports (frames, errors, loop time) on the status line
+TELEMETRY_EXPORT  = ""       # On exit, write the sketch's reports to this .csv (or .prom for Prometheus text)
+FAILSAFE_VALUES   = (0,) * 12  # Outputs when the link drops: throttle/brake (x) and steering centred
+
+# -------------------------------
+# Powertrain Config
+# -------------------------------
+GEAR_RATIOS     = tuple(g / 6 for g in range(1, 7))          # Output scale per gear, 1st to top
+SHIFT_TIMES     = (0.65, 0.9, 1.25, 1.875, 2.3, 2.5)        # Seconds to ramp to the new target, per gear
+RAMP_SHAPE      = "linear"  # "linear", "ease_out" or "s_curve"
+SHIFT_CUT       = 0.0       # Seconds of cut throttle on each upshift (0 = off)
+BLIP_TIME       = 0.0       # Seconds of throttle blip on each downshift (0 = off)
+BLIP_LEVEL      = 150       # Output held during a blip
+LAUNCH_CONTROL  = False     # In 1st, full throttle on the brake holds the car; releasing the brake launches
+LAUNCH_TIME     = 0.5       # Seconds to full output on a launch
+IDLE_RPM        = 900
+REDLINE_RPM     = 7500
+
+ACCEPTS_CURVES = True   # FrameProcessor takes the profile's response curves (see modes.make_processor)
+
+class FrameProcessor:
+    """
+    Per-tick processing for the paddle-shift script: the combined pedals
+    go through the powertrain model (gears, ramps, cut/blip, launch),
+    driven by the tick timestamp.
+    """
+
+    def __init__(self, curves=None):
+        self.curves = curves if curves is not None else ResponseCurves()
+        self.powertrain = Powertrain(
+            GEAR_RATIOS, SHIFT_TIMES, RAMP_SHAPE,
+            shift_cut=SHIFT_CUT, blip_time=BLIP_TIME, blip_level=BLIP_LEVEL,
+            launch_control=LAUNCH_CONTROL, launch_time=LAUNCH_TIME,
+            idle_rpm=IDLE_RPM, redline_rpm=REDLINE_RPM,
+        )
+
+    def step(self, values, now):
+        # Steering, throttle, brake from axes 0, 1, 4; paddles on buttons
+        # 5=downshift, 4=upshift; potentiometers on axes 6 and 7
+        (x_axis, y_axis, z_axis, leftpaddle, rightpaddle,
+         left_pot, right_pot) = values
+
+        curves = self.curves
+        x_axis = curves.steering.map(x_axis)
+
+        # Compute raw combined output from the shaped pedal travel
+        thr, brk = curves.pedals(y_axis, z_axis)
+        combined = mix_pedals(thr, brk)
+
+        powertrain = self.powertrain
+        output = powertrain.update(now, combined, thr, brk, leftpaddle, rightpaddle)
+
+        # Output order:
+        # output, x_axis, 0, 0, leftpaddle, rightpaddle, left_pot, right_pot, gear
+        return (output, x_axis, 0, 0,
+                leftpaddle, rightpaddle, left_pot, right_pot, powertrain.gear)
+
+    def status(self):
+        return self.powertrain.status()
+
+def main():
+    args = startup_args("Drive an RC car with paddle-shift gears.")
+    if args.list:
+        list_devices()
+        return
+
+    # Open the serial port & pick joysticks for the profile's devices:
+    # given specs first, then the device cache, and only then ask
+    profile = load_profile(PROFILE)
+    session = DeviceSession(profile, 115200, args.port or SERIAL_PORT, {**JOYSTICKS, **args.joystick},
+                            USE_DEVICE_CACHE and not args.no_cache)
+    if not session.start():
+        return
+    joysticks = session.joysticks
+    events = None
+    if INPUT_MODE == "events":
+        events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+        joysticks = events.states
+    inputs = compile_profile(profile, joysticks, INPUTS)
+    filters = InputFilters(profile.get("filters"), INPUTS)
+    recorder = TraceRecorder(RECORD_PATH, joysticks) if RECORD_PATH else None
+
+    processor = FrameProcessor(ResponseCurves(profile.get("curves")))
+
+    link = SerialLink(session.ser, PROTOCOL, SEND_CHANGES_ONLY, CHANNEL_DEADBAND, MEASURE_LATENCY,
+                      READ_TELEMETRY, ADAPTIVE_RATE, FAILSAFE_VALUES)
+    scheduler = LoopScheduler(LOOP_RATE_HZ, LOOP_POLICY)
+    hud = StatusDisplay(scheduler, link.writer, quiet=QUIET, telemetry=link.telemetry, rate=link.rate)
+    prof = StageProfiler(PROFILE_STAGES, PROFILE_SNAPSHOT)
+    link.writer.profiler = prof
+    try:
+        while True:
+            if events:
+                # Acceleration interpolation still needs a tick every period
+                events.wait(scheduler.period)
+                now = scheduler.tick()
+                t = start = prof.begin()
+            else:
+                now = scheduler.wait()
+                t = start = prof.begin()
+                pygame.event.pump()
+                t = prof.lap("pump", t)
+
+            if session.due(now) and session.check(now, link):
+                # A joystick came or went: bind the profile to what is connected now
+                joysticks = session.joysticks
+                if events:
+                    events = EventInput(joysticks, 1.0 / LOOP_RATE_HZ)
+                    joysticks = events.states
+                inputs = compile_profile(profile, joysticks, INPUTS)
+                if recorder:
+                    recorder.rebind(joysticks)
+            t = prof.lap("devices", t)
+
+            values = inputs.read()
+            t = prof.lap("read", t)
+            if filters:
+                filters.apply(values, now)
+                t = prof.lap("filters", t)
+            channels = processor.step(values, now)
+            t = prof.lap("process", t)
+            if recorder:
+                recorder.record(now, channels)
+                t = prof.lap("record", t)
+            link.send(channels, now)
+            t = prof.lap("send", t)
+            if hud.due(now):
+                hud.show(now, channels, processor.status())
+                prof.lap("status", t)
+            prof.lap("tick", start)
+            if prof.due(now):
+                prof.poll(now)
+    except KeyboardInterrupt:
+        hud.close()
+        print(scheduler.summary())
+        if prof.stages:
+            print(prof.summary())
+    finally:
+        link.close()
+        if recorder:
+            recorder.close()
+    print(link.summary())
+    if session.summary():
+        print(session.summary())
+    if link.latency and LATENCY_EXPORT:
+        link.latency.export(LATENCY_EXPORT)
+    if link.telemetry and TELEMETRY_EXPORT:
+        link.telemetry.export(TELEMETRY_EXPORT)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# -------------------------------
+# Powertrain Defaults
+# -------------------------------
+RAMP_RESOLUTION = 1000     # Ramp table entries per second (1 ms steps)
+FULL_OUTPUT     = 1000     # Combined throttle output at full pedal
+RAMP_SHAPES     = ("linear", "ease_out", "s_curve")
+
+def ramp_table(duration, shape="linear", resolution=RAMP_RESOLUTION):
+    """
+    Fraction of the way from the start value to the target for every
+    1/resolution s of elapsed time; the last entry is 1.0.
+    """
+    steps = max(1, int(round(duration * resolution)))
+    table = []
+    for i in range(steps + 1):
+        t = i / steps
+        if shape == "ease_out":
+            t = 1 - (1 - t) * (1 - t)
+        elif shape == "s_curve":
+            t = t * t * (3 - 2 * t)
+        table.append(t)
+    return table
+
+class Powertrain:
+    """
+    Gearbox and engine model for paddle-shift mode. Each gear has an output
+    ratio and a ramp time to reach a new target after a shift. The ramp
+    shapes are precomputed per gear, so a tick is one table index off a
+    single timestamp. Models an RPM figure, an ignition cut on upshifts,
+    a throttle blip on downshifts and launch control.
+    """
+
+    def __init__(self, ratios, shift_times, shape="linear",
+                 shift_cut=0.0, blip_time=0.0, blip_level=0,
+                 launch_control=False, launch_throttle=1900, launch_brake=1000, launch_time=0.5,
+                 idle_rpm=900, redline_rpm=7500, launch_rpm=4000):
+        if len(ratios) != len(shift_times):
+            raise ValueError("Need one shift time per gear ratio")
+        if shape not in RAMP_SHAPES:
+            raise ValueError(f"Unknown ramp shape: {shape}")
+        # Index 0 is unused so gear numbers index directly, as before
+        self.ratios = (0.0,) + tuple(ratios)
+        self.tables = [None] + [ramp_table(t, shape) for t in shift_times]
+        self.launch_table = ramp_table(launch_time, shape)
+        self.rpm_scale = (0.0,) + tuple((redline_rpm - idle_rpm) / (FULL_OUTPUT * r) for r in ratios)
+        self.max_gear = len(ratios)
+        self.shift_cut = shift_cut
+        self.blip_time = blip_time
+        self.blip_level = blip_level
+        self.launch_control = launch_control
+        self.launch_throttle = launch_throttle
+        self.launch_brake = launch_brake
+        self.idle_rpm = idle_rpm
+        self.redline_rpm = redline_rpm
+        self.launch_rpm = launch_rpm
+
+        self.gear = 1
+        self.table = self.tables[1]
+        self.current = 0           # Ramp state
+        self.output = 0            # What was sent (differs during a cut or blip)
+        self.target = 0
+        self.ramp_start = None
+        self.start_value = 0
+        self.cut_until = None
+        self.blip_until = None
+        self.up_pressed = False
+        self.down_pressed = False
+        self.launch_armed = False
+        self.rpm = idle_rpm
+        self.shifts = 0
+
+    def _start_ramp(self, now, table):
+        self.table = table
+        self.ramp_start = now
+        self.start_value = self.current
+
+    def shift(self, now, down, up):
+        """Debounced paddles: one gear per press."""
+        if up and not self.up_pressed:
+            if self.gear < self.max_gear:
+                self.gear += 1
+                self.shifts += 1
+                self._start_ramp(now + self.shift_cut, self.tables[self.gear])
+                if self.shift_cut:
+                    self.cut_until = now + self.shift_cut
+            self.up_pressed = True
+        elif not up:
+            self.up_pressed = False
+
+        if down and not self.down_pressed:
+            if self.gear > 1:
+                self.gear -= 1
+                self.shifts += 1
+                self._start_ramp(now + self.blip_time, self.tables[self.gear])
+                if self.blip_time:
+                    self.blip_until = now + self.blip_time
+            self.down_pressed = True
+        elif not down:
+            self.down_pressed = False
+
+    def update(self, now, combined, thr, brk, down, up):
+        """
+        One tick: apply the paddles, then ramp the output towards the
+        combined throttle/brake (-1000..1000) scaled by the gear ratio.
+        Returns the output value.
+        """
+        self.shift(now, down, up)
+
+        if self.launch_control and self.gear == 1:
+            if thr >= self.launch_throttle and brk >= self.launch_brake:
+                # Armed: car held on the brake, engine at launch revs
+                self.launch_armed = True
+                self.current = self.output = 0
+                self.ramp_start = None
+                self.rpm = self.launch_rpm
+                return 0
+            if self.launch_armed:
+                self.launch_armed = False
+                if thr >= self.launch_throttle:
+                    self.current = 0
+                    self._start_ramp(now, self.launch_table)
+
+        # Apply gear ratio
+        if combined > 0:
+            self.target = int(combined * self.ratios[self.gear])
+        else:
+            self.target = combined
+
+        # Interpolate acceleration / immediate braking
+        if combined < 0:
+            self.current = self.target
+            self.ramp_start = None
+        elif combined > 0:
+            if self.current < 0:
+                # Off the brake: ramp up from 0 on this gear's table, not a leftover launch ramp
+                self.current = 0
+                self._start_ramp(now, self.tables[self.gear])
+            elif self.ramp_start is None:
+                self._start_ramp(now, self.tables[self.gear])
+            elapsed = now - self.ramp_start
+            if elapsed > 0:
+                table = self.table
+                i = int(elapsed * RAMP_RESOLUTION)
+                frac = table[i] if i < len(table) else 1.0
+                self.current = int(self.start_value + (self.target - self.start_value) * frac)
+                if frac >= 1.0:
+                    self.ramp_start = None
+        else:
+            self.current = self.target
+
+        output = self.current
+        if self.cut_until is not None:
+            if now < self.cut_until and combined > 0:
+                output = 0
+            elif now >= self.cut_until:
+                self.cut_until = None
+        if self.blip_until is not None:
+            if now < self.blip_until and combined >= 0:
+                output = max(output, self.blip_level)
+            elif now >= self.blip_until:
+                self.blip_until = None
+        self.output = output
+
+        rpm = self.idle_rpm + self.current * self.rpm_scale[self.gear] if self.current > 0 else self.idle_rpm
+        if self.blip_until is not None:
+            rpm = max(rpm, self.idle_rpm + self.blip_level * self.rpm_scale[self.gear])
+        self.rpm = min(rpm, self.redline_rpm)
+        return output
+
+    def status(self):
+        state = " launch" if self.launch_armed else " cut" if self.cut_until is not None else ""
+        return f"gear {self.gear} {self.rpm:5.0f} rpm{state}"
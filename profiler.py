@@ -0,0 +1,170 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import sys
+import time
+from array import array
+
+# -------------------------------
+# Profiler Config
+# -------------------------------
+RING_SIZE      = 4096              # Samples kept per stage; summaries cover this window
+DUMP_INTERVAL  = 5.0               # Seconds between summaries while profiling is on
+POLL_INTERVAL  = 0.5               # Seconds between checks of the control file
+PROFILE_CONTROL = "rcsim.profile"  # Write "on" or "off" to this file to switch profiling while running
+
+class StageRing:
+    """The last RING_SIZE durations of one stage in nanoseconds, plus running totals."""
+    __slots__ = ("samples", "pos", "count", "total_ns", "max_ns")
+
+    def __init__(self, size=RING_SIZE):
+        self.samples = array("q", bytes(8 * size))
+        self.pos = 0
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        samples = self.samples
+        samples[self.pos] = ns
+        self.pos = (self.pos + 1) % len(samples)
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def window(self):
+        """The samples currently in the ring, sorted."""
+        n = min(self.count, len(self.samples))
+        return sorted(self.samples[:n])
+
+    def stats(self):
+        """Figures over the ring window: n, mean, p50, p99 and max in ns."""
+        ordered = self.window()
+        if not ordered:
+            return {"n": 0, "mean_ns": 0.0, "p50_ns": 0, "p99_ns": 0, "max_ns": 0}
+        last = len(ordered) - 1
+        return {
+            "n": len(ordered),
+            "mean_ns": sum(ordered) / len(ordered),
+            "p50_ns": ordered[last // 2],
+            "p99_ns": ordered[min(last, int(round(0.99 * last)))],
+            "max_ns": ordered[-1],
+        }
+
+    def rows(self):
+        """Power-of-two histogram of the window: (upper bound in ns, count) for non-empty buckets."""
+        buckets = {}
+        for ns in self.window():
+            bound = 1 << max(ns, 1).bit_length()
+            buckets[bound] = buckets.get(bound, 0) + 1
+        return sorted(buckets.items())
+
+class StageProfiler:
+    """
+    Per-stage timers for the control loop. The loop threads one timestamp
+    through its stages:
+
+        t = prof.begin()
+        ...stage...
+        t = prof.lap("read", t)
+
+    While profiling is off, begin() returns 0 and lap() returns at once, so
+    the timers can stay in the loop. Profiling is switched at runtime through
+    the control file; while on, a summary is printed every DUMP_INTERVAL, or
+    written as JSON to snapshot_path when one is given.
+    """
+
+    def __init__(self, enabled=False, snapshot_path="", control_path=PROFILE_CONTROL,
+                 window=RING_SIZE, dump_interval=DUMP_INTERVAL, stream=None):
+        self.default = enabled
+        self.enabled = enabled
+        self.snapshot_path = snapshot_path
+        self.control_path = control_path
+        self.window = window
+        self.dump_interval = dump_interval
+        self.stream = stream if stream is not None else sys.stdout
+        self.stages = {}
+        self.next_poll = 0.0
+        self.next_dump = None
+        self.dumps = 0
+
+    def begin(self):
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def lap(self, name, start):
+        """Record the time since start under name; returns the new start."""
+        if not start:
+            return 0
+        now = time.perf_counter_ns()
+        ring = self.stages.get(name)
+        if ring is None:
+            ring = self.stages[name] = StageRing(self.window)
+        ring.add(now - start)
+        return now
+
+    def due(self, now):
+        return now >= self.next_poll
+
+    def poll(self, now):
+        """Pick up the control file and dump a summary when one is due."""
+        self.next_poll = now + POLL_INTERVAL
+        enabled = self._control()
+        if enabled != self.enabled:
+            self.enabled = enabled
+            self.stream.write(f"\nProfiling {'on' if enabled else 'off'}\n")
+            self.next_dump = now + self.dump_interval if enabled else None
+        if self.enabled and self.next_dump is None:
+            self.next_dump = now + self.dump_interval
+        if self.next_dump is not None and now >= self.next_dump:
+            self.next_dump = now + self.dump_interval
+            self.dump()
+
+    def _control(self):
+        if not self.control_path:
+            return self.enabled
+        try:
+            with open(self.control_path) as f:
+                word = f.read().strip().lower()
+        except OSError:
+            return self.default
+        return word != "off" if word else True
+
+    def snapshot(self):
+        return {
+            name: dict(ring.stats(), total_n=ring.count, total_ns=ring.total_ns, histogram=ring.rows())
+            for name, ring in list(self.stages.items())
+        }
+
+    def summary(self):
+        if not self.stages:
+            return "no stages timed"
+        lines = []
+        for name, ring in list(self.stages.items()):
+            s = ring.stats()
+            lines.append(f"{name:<10} n={s['n']:<6} mean {s['mean_ns'] / 1000:8.2f} us  "
+                         f"p50 {s['p50_ns'] / 1000:8.2f} us  p99 {s['p99_ns'] / 1000:8.2f} us  "
+                         f"max {s['max_ns'] / 1000:8.2f} us")
+        return "\n".join(lines)
+
+    def dump(self):
+        self.dumps += 1
+        if self.snapshot_path:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"time": time.time(), "stages": self.snapshot()}, f, indent=2)
+            os.replace(tmp, self.snapshot_path)
+        else:
+            self.stream.write("\n" + self.summary() + "\n")
+            self.stream.flush()
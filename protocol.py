@@ -0,0 +1,316 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import binascii
+import struct
+
+# -----------------------------------------------------------------------------
+# Frame layout
+#
+# Every frame carries the same 12 logical channels as the CSV line:
+#   x_axis, y_axis, z_axis, c_axis, leftpaddle, rightpaddle,
+#   left_pot, right_pot, swE, swB, swC, swF
+#
+# Binary frame (14 bytes, little-endian):
+#   [0]      sync byte 0xA5
+#   [1]      sequence number (wraps at 256)
+#   [2..11]  80-bit little-endian channel word:
+#              bits 0-65  six 11-bit analog channels x, y, z, c, left_pot,
+#                         right_pot, each stored as value + 1024 (values are
+#                         clamped to -1024..1023)
+#              bits 66-79 digital word:
+#                bit 0      leftpaddle
+#                bit 1      rightpaddle
+#                bits 2-3   swE    (0 = down/-1, 1 = neutral/0, 2 = up/1,
+#                bits 4-5   swB     3 = hold, for any other value)
+#                bits 6-7   swC
+#                bits 8-9   swF
+#                bit 13     echo request: the frame carries a host timestamp
+#                           (bit 7 of byte 11)
+#   [12..15] uint32 host timestamp in microseconds (echo frames only)
+#   [last 2] CRC-16/CCITT (poly 0x1021, init 0xFFFF) over every byte after
+#            the sync byte
+#
+# Text frames run from 27 bytes (paddle-shift) to 42 (fly) on average in the
+# harness, so this is about 1.9-3x smaller, not a flat 3x; changes-only
+# sending saves more on top.
+#
+# Failsafe values frame (host to sketch, 27 bytes, sent in either protocol):
+#   [0]      sync byte 0xA6
+#   [1..24]  12 int16 channel values the sketch's failsafe applies
+#   [25..26] CRC-16/CCITT over bytes 1-24
+#   It does not count as a frame for the failsafe watchdog.
+#
+# Device frames (sketch to host):
+#   [0] sync byte 0x5A, [1] message type, [2] payload length,
+#   [3..] payload, [last] CRC-8 over type, length and payload
+#
+#   MSG_ECHO payload: uint8 seq, uint32 host timestamp (as sent),
+#                     uint32 sketch micros() right after the DAC write
+#   MSG_TELEMETRY payload (every TELEMETRY_INTERVAL_MS of the sketch):
+#                     uint32 frames applied (text and binary),
+#                     uint16 CRC errors, uint16 bad text lines,
+#                     uint16 mean and uint16 max loop() time in us since the last report,
+#                     uint8 failsafe trips, uint8 1 while in failsafe,
+#                     8 x uint16 DAC codes (mcp A-D, mcp2 A-D)
+#                     The counters wrap and restart from 0 when the sketch resets.
+# -----------------------------------------------------------------------------
+
+PROTOCOL_TEXT   = "text"
+PROTOCOL_BINARY = "binary"
+
+FRAME_SYNC   = 0xA5
+FRAME_BODY   = struct.Struct("<BBQH")   # Sync, sequence, channel word bits 0-63 and 64-79
+FRAME_HEAD   = 2          # Sync byte and sequence number
+FRAME_WORD   = 10         # Bytes of bit-packed channels
+FRAME_STAMP  = struct.Struct("<I")
+FRAME_CRC    = struct.Struct("<H")
+FRAME_SIZE   = FRAME_HEAD + FRAME_WORD + FRAME_CRC.size
+FRAME_SIZE_STAMPED = FRAME_SIZE + FRAME_STAMP.size
+ANALOG_BITS  = 11
+ANALOG_OFFSET = 1 << (ANALOG_BITS - 1)   # Fields hold value + 1024: 0-2047
+ANALOG_MIN   = -ANALOG_OFFSET
+ANALOG_MAX   = ANALOG_OFFSET - 1
+DIGITAL_SHIFT = 6 * ANALOG_BITS
+FLAG_ECHO    = 0x2000     # In the digital word
+FLAG_ECHO_BYTE = FRAME_HEAD + (DIGITAL_SHIFT + 13) // 8   # Where the echo flag sits in the frame...
+FLAG_ECHO_MASK = 1 << ((DIGITAL_SHIFT + 13) % 8)          # ...and its bit there
+NUM_CHANNELS = 12
+
+FAILSAFE_SYNC  = 0xA6
+FAILSAFE_BODY  = struct.Struct("<B12h")
+FAILSAFE_FRAME_SIZE = FAILSAFE_BODY.size + FRAME_CRC.size
+
+DEVICE_SYNC  = 0x5A
+MSG_ECHO     = 0x01
+ECHO_BODY    = struct.Struct("<BII")
+MSG_TELEMETRY  = 0x02
+TELEMETRY_BODY = struct.Struct("<IHHHHBB8H")
+
+ANALOG_CHANNELS  = (0, 1, 2, 3, 6, 7)
+PADDLE_CHANNELS  = (4, 5)
+SWITCH_CHANNELS  = (8, 9, 10, 11)
+SWITCH_HOLD      = 3
+SWITCH_CODES     = {-1: 0, 0: 1, 1: 2}
+# Digital word bits 2-9 for every combination of switch positions
+SWITCH_WORDS     = {
+    (e, b, c, f): (SWITCH_CODES[e] << 2 | SWITCH_CODES[b] << 4 | SWITCH_CODES[c] << 6 | SWITCH_CODES[f] << 8)
+    for e in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1) for f in (-1, 0, 1)
+}
+
+def _make_crc8_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _make_crc8_table()
+
+def crc8(data, start=0, end=None):
+    crc = 0
+    table = CRC8_TABLE
+    for b in memoryview(data)[start:end]:
+        crc = table[crc ^ b]
+    return crc
+
+CRC16_INIT = 0xFFFF
+
+def crc16(data, start=0, end=None):
+    """CRC-16/CCITT-FALSE; binascii.crc_hqx does the table lookups in C."""
+    return binascii.crc_hqx(memoryview(data)[start:end], CRC16_INIT)
+
+def _clamp16(v):
+    v = int(v)
+    return -32768 if v < -32768 else 32767 if v > 32767 else v
+
+def _analog(v):
+    """Analog field for a value: clamped, plus ANALOG_OFFSET."""
+    v = int(v)
+    return (ANALOG_MIN if v < ANALOG_MIN else ANALOG_MAX if v > ANALOG_MAX else v) + ANALOG_OFFSET
+
+def pack_digital(channels):
+    """
+    Build the digital word from the paddle and switch channels. Frames with
+    fewer than 12 channels (paddle-shift mode) leave the missing switches on hold.
+    """
+    code = SWITCH_CODES.get
+    if len(channels) >= NUM_CHANNELS:
+        switches = SWITCH_WORDS.get(tuple(channels[8:12]))
+        if switches is None:
+            switches = (code(channels[8], SWITCH_HOLD) << 2 | code(channels[9], SWITCH_HOLD) << 4
+                        | code(channels[10], SWITCH_HOLD) << 6 | code(channels[11], SWITCH_HOLD) << 8)
+        return (channels[4] == 1) | (channels[5] == 1) << 1 | switches
+    n = len(channels)
+    word = (1 if n > 4 and channels[4] == 1 else 0) | (2 if n > 5 and channels[5] == 1 else 0)
+    shift = 2
+    for ch in SWITCH_CHANNELS:
+        word |= (code(channels[ch], SWITCH_HOLD) if ch < n else SWITCH_HOLD) << shift
+        shift += 2
+    return word
+
+def to_micros(seconds):
+    """Clock reading as a wrapping uint32 microsecond count, as used on the wire."""
+    return int(seconds * 1000000) & 0xFFFFFFFF
+
+class TextEncoder:
+    """Encode channels as the original comma-separated line."""
+
+    protocol = PROTOCOL_TEXT
+
+    def encode(self, channels, stamp=None):
+        return (",".join(map(str, channels)) + "\n").encode()
+
+class BinaryEncoder:
+    """
+    Encode channels as fixed-size binary frames. The frame is packed into one
+    reusable buffer, so the returned bytearray is only valid until the next call.
+    With stamped set, frames that are given a stamp (the tick time the inputs
+    were read) carry it and ask the sketch to echo it back.
+    """
+
+    protocol = PROTOCOL_BINARY
+
+    def __init__(self, stamped=False):
+        self.stamped = stamped
+        self.buffer = bytearray(FRAME_SIZE_STAMPED if stamped else FRAME_SIZE)
+        view = memoryview(self.buffer)
+        self.plain = view[:FRAME_SIZE]
+        # The bytes each CRC covers, sliced once rather than per frame
+        self.crc_plain = view[1:FRAME_SIZE - 2]
+        self.crc_stamped = view[1:FRAME_SIZE_STAMPED - 2] if stamped else None
+        self.seq = 0
+
+    def encode(self, channels, stamp=None):
+        digital = pack_digital(channels)
+        stamped = self.stamped and stamp is not None
+        if stamped:
+            digital |= FLAG_ECHO
+        if len(channels) < NUM_CHANNELS:
+            channels = tuple(channels) + (0,) * (NUM_CHANNELS - len(channels))
+        try:
+            x = channels[0] + ANALOG_OFFSET
+            y = channels[1] + ANALOG_OFFSET
+            z = channels[2] + ANALOG_OFFSET
+            c = channels[3] + ANALOG_OFFSET
+            left_pot = channels[6] + ANALOG_OFFSET
+            right_pot = channels[7] + ANALOG_OFFSET
+            # Any field outside 0-2047 sets a bit above the 11 (a negative one all of them)
+            clamp = (x | y | z | c | left_pot | right_pot) >> ANALOG_BITS
+        except TypeError:
+            clamp = True     # Float values: _analog() truncates them as int() would
+        if clamp:
+            x, y, z, c, left_pot, right_pot = (_analog(channels[i]) for i in ANALOG_CHANNELS)
+        word = (x | y << 11 | z << 22 | c << 33 | left_pot << 44 | right_pot << 55
+                | digital << DIGITAL_SHIFT)
+        buf = self.buffer
+        FRAME_BODY.pack_into(buf, 0, FRAME_SYNC, self.seq, word & 0xFFFFFFFFFFFFFFFF, word >> 64)
+        self.seq = (self.seq + 1) & 0xFF
+        if stamped:
+            FRAME_STAMP.pack_into(buf, FRAME_HEAD + FRAME_WORD, to_micros(stamp))
+            FRAME_CRC.pack_into(buf, FRAME_SIZE_STAMPED - 2, binascii.crc_hqx(self.crc_stamped, CRC16_INIT))
+            return buf
+        FRAME_CRC.pack_into(buf, FRAME_SIZE - 2, binascii.crc_hqx(self.crc_plain, CRC16_INIT))
+        return self.plain
+
+def make_encoder(protocol, stamped=False):
+    if protocol == PROTOCOL_TEXT:
+        return TextEncoder()
+    if protocol == PROTOCOL_BINARY:
+        return BinaryEncoder(stamped)
+    raise ValueError(f"Unknown serial protocol: {protocol}")
+
+def decode_frame(frame):
+    """
+    Reference decoder for one binary frame, mirroring RCSimSketch.ino.
+    Returns (seq, channels, stamp) with all 12 channels and the host timestamp
+    or None; switches on hold decode as 2, which the sketch ignores.
+    Raises ValueError on a bad length, sync byte or CRC.
+    """
+    if len(frame) not in (FRAME_SIZE, FRAME_SIZE_STAMPED):
+        raise ValueError(f"Frame must be {FRAME_SIZE} or {FRAME_SIZE_STAMPED} bytes, got {len(frame)}")
+    if frame[0] != FRAME_SYNC:
+        raise ValueError(f"Bad sync byte 0x{frame[0]:02X}")
+    seq = frame[1]
+    bits = int.from_bytes(frame[FRAME_HEAD:FRAME_HEAD + FRAME_WORD], "little")
+    x, y, z, c, left_pot, right_pot = (
+        ((bits >> shift) & 0x7FF) - ANALOG_OFFSET for shift in range(0, DIGITAL_SHIFT, ANALOG_BITS))
+    word = bits >> DIGITAL_SHIFT
+    size = FRAME_SIZE_STAMPED if word & FLAG_ECHO else FRAME_SIZE
+    if len(frame) != size:
+        raise ValueError(f"Frame flags say {size} bytes, got {len(frame)}")
+    if crc16(frame, 1, size - 2) != FRAME_CRC.unpack_from(frame, size - 2)[0]:
+        raise ValueError("CRC mismatch")
+    stamp = FRAME_STAMP.unpack_from(frame, FRAME_HEAD + FRAME_WORD)[0] if word & FLAG_ECHO else None
+    switches = [((word >> shift) & 0x3) - 1 for shift in (2, 4, 6, 8)]
+    channels = (x, y, z, c, word & 1, (word >> 1) & 1, left_pot, right_pot, *switches)
+    return seq, channels, stamp
+
+def encode_failsafe_frame(values):
+    """
+    Frame setting the values the sketch's failsafe applies. Channels missing
+    from values (paddle-shift mode) fail safe to 0.
+    """
+    values = tuple(values) + (0,) * (NUM_CHANNELS - len(values))
+    frame = bytearray(FAILSAFE_FRAME_SIZE)
+    FAILSAFE_BODY.pack_into(frame, 0, FAILSAFE_SYNC, *map(_clamp16, values[:NUM_CHANNELS]))
+    FRAME_CRC.pack_into(frame, FAILSAFE_BODY.size, crc16(frame, 1, FAILSAFE_BODY.size))
+    return bytes(frame)
+
+def encode_device_frame(msg_type, payload):
+    """Build a sketch-to-host frame; used to emulate the sketch."""
+    frame = bytearray((DEVICE_SYNC, msg_type, len(payload)))
+    frame += payload
+    frame.append(crc8(frame, 1))
+    return bytes(frame)
+
+class DeviceFrameParser:
+    """
+    Incremental parser for frames sent by the sketch. feed() takes whatever
+    bytes the port returned and yields (msg_type, payload) for each frame
+    whose CRC checks out; anything else, such as the sketch's startup text,
+    is skipped and counted in self.skipped.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped = 0
+
+    def feed(self, data):
+        buf = self.buffer
+        buf += data
+        while buf:
+            if buf[0] != DEVICE_SYNC:
+                start = buf.find(DEVICE_SYNC)
+                drop = len(buf) if start < 0 else start
+                self.skipped += drop
+                del buf[:drop]
+                continue
+            if len(buf) < 3:
+                return
+            size = buf[2] + 4
+            if len(buf) < size:
+                return
+            if crc8(buf, 1, size - 1) != buf[size - 1]:
+                self.crc_errors += 1
+                self.skipped += 1
+                del buf[:1]
+                continue
+            msg_type = buf[1]
+            payload = bytes(buf[3:size - 1])
+            del buf[:size]
+            self.frames += 1
+            yield msg_type, payload
@@ -0,0 +1,215 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# Adaptive send rate for a serial link. Run on its own, it simulates a host
+# loop feeding a line of limited capacity, with and without the controller:
+#
+#   python ratecontrol.py --protocol text --baud 57600 --rate 250
+
+import argparse
+import random
+
+# -------------------------------
+# Rate Control Config
+# -------------------------------
+BITS_PER_BYTE    = 10       # 8N1: start bit, 8 data bits, stop bit
+LINK_UTILIZATION = 0.8      # Share of the line's frame capacity the sender may use
+QUEUE_TARGET     = 0.005    # Seconds to drain the OS transmit buffer before the rate backs off
+CONTROL_INTERVAL = 0.05     # Seconds between rate adjustments
+BACKOFF          = 0.7      # Rate multiplier when the queue is over target or the writer dropped frames
+RECOVERY         = 0.05     # Share of the ceiling added back per interval while the queue is clear
+MIN_RATE_HZ      = 20       # Floor; stays above the keepalive rate (1 / KEYFRAME_INTERVAL)
+SLOW_SHARE       = 0.25     # While frames are held back, frames with only slow-channel changes get this share of the rate
+FAST_CHANNELS    = (0, 1, 2, 3, 4, 5)   # Axes (throttle, steering, ...) and paddles; pots, switches and gear are slow
+
+# The sender's answers from check()
+HOLD = 0        # No frame now
+SEND = 1        # Any frame
+SEND_FAST = 2   # Only a frame that moves a fast channel (or a keyframe)
+
+class RateController:
+    """
+    AIMD limit on the frames per second sent over one serial link. The
+    ceiling is what the line can carry: baud over BITS_PER_BYTE over the
+    mean bytes per frame (text frames vary), times LINK_UTILIZATION. Every
+    CONTROL_INTERVAL the bytes waiting in the OS transmit buffer behind the
+    frame going out are turned into a drain time; over QUEUE_TARGET, or when the writer had to
+    drop frames, the rate is cut by BACKOFF, otherwise it climbs back to
+    the ceiling by RECOVERY steps.
+
+    While the limit is holding frames back, a frame whose only changes are
+    on slow channels waits for 1 / slow_share times the interval, so the
+    fast channels get the bandwidth. A slow change is never lost: frames
+    carry every channel, so it goes out with the next frame either way.
+    """
+
+    def __init__(self, baud, out_waiting=None, dropped=None, fast_channels=FAST_CHANNELS,
+                 utilization=LINK_UTILIZATION, queue_target=QUEUE_TARGET, slow_share=SLOW_SHARE):
+        self.baud = baud
+        self.out_waiting = out_waiting      # () -> bytes in the OS transmit buffer
+        self.dropped = dropped              # () -> frames the writer replaced before writing them
+        self.fast_channels = tuple(fast_channels)
+        self.utilization = utilization
+        self.queue_target = queue_target
+        self.slow_share = slow_share
+        self.frame_size = None              # Running mean of bytes per frame
+        self.ceiling = None
+        self.rate = None
+        self.interval = 0.0
+        self.last_sent = None
+        self.next_update = 0.0
+        self.last_dropped = 0
+        self.held_since_update = 0
+        self.constrained = False
+        self.held = 0
+        self.backoffs = 0
+        self.min_rate = None
+        self.queue_delay = 0.0
+        self.worst_queue_delay = 0.0
+
+    def check(self, now):
+        """HOLD, SEND or SEND_FAST for a frame at now."""
+        if now >= self.next_update:
+            self.update(now)
+        if self.last_sent is None:
+            return SEND
+        elapsed = now - self.last_sent
+        if elapsed < self.interval:
+            self.held_since_update += 1
+            return HOLD
+        if self.constrained and elapsed < self.interval / self.slow_share:
+            return SEND_FAST
+        return SEND
+
+    def on_hold(self):
+        """The sender kept back a frame check() allowed only for fast channels."""
+        self.held_since_update += 1
+
+    def sent(self, now, size):
+        self.last_sent = now
+        if self.frame_size is None:
+            # The first frame sets the ceiling: adjust before the next one
+            self.frame_size = float(size)
+            self.next_update = now
+        else:
+            self.frame_size += (size - self.frame_size) / 16
+
+    def update(self, now):
+        self.next_update = now + CONTROL_INTERVAL
+        if self.frame_size is None:
+            return
+        self.ceiling = max(MIN_RATE_HZ, self.baud / BITS_PER_BYTE / self.frame_size * self.utilization)
+        if self.rate is None:
+            self.rate = self.ceiling
+
+        backlog = 0
+        if self.out_waiting:
+            try:
+                backlog = self.out_waiting() or 0
+            except Exception:
+                backlog = 0    # Port going away; the reconnect logic deals with that
+        # A frame still going out is not a backlog; what waits behind it is
+        self.queue_delay = max(0.0, backlog - self.frame_size) * BITS_PER_BYTE / self.baud
+        self.worst_queue_delay = max(self.worst_queue_delay, self.queue_delay)
+        dropped = self.dropped() if self.dropped else 0
+        if self.queue_delay > self.queue_target or dropped > self.last_dropped:
+            self.rate = max(MIN_RATE_HZ, self.rate * BACKOFF)
+            self.backoffs += 1
+        else:
+            self.rate = min(self.ceiling, self.rate + self.ceiling * RECOVERY)
+        self.last_dropped = dropped
+        self.min_rate = self.rate if self.min_rate is None else min(self.min_rate, self.rate)
+        self.interval = 1.0 / self.rate
+        self.constrained = self.held_since_update > 0 or self.rate < self.ceiling
+        self.held += self.held_since_update
+        self.held_since_update = 0
+
+    def summary(self):
+        if self.rate is None:
+            return "rate control: nothing sent"
+        return (
+            f"rate control: ceiling {self.ceiling:.0f} f/s, now {self.rate:.0f}, lowest {self.min_rate:.0f}; "
+            f"{self.backoffs} backoffs, "
+            f"worst OS queue {self.worst_queue_delay * 1000:.1f} ms"
+        )
+
+class SimulatedLine:
+    """A serial line of fixed byte rate behind an unbounded OS transmit buffer."""
+
+    def __init__(self, baud):
+        self.byte_time = BITS_PER_BYTE / baud
+        self.free_at = 0.0
+        self.now = 0.0
+        self.delays = []
+
+    def write(self, frame):
+        start = max(self.free_at, self.now)
+        self.free_at = start + len(frame) * self.byte_time
+        self.delays.append(self.free_at - self.now)
+
+    def out_waiting(self):
+        return max(0, int((self.free_at - self.now) / self.byte_time))
+
+def simulate(protocol, baud, rate_hz, seconds, adaptive, slow_share=SLOW_SHARE, seed=0):
+    """
+    Host loop at rate_hz with the steering and throttle moving on some
+    ticks and a noisy pot on most. Returns the line, the sender and the mean time
+    from a fast or a slow change to the end of the frame that carried it.
+    """
+    from protocol import make_encoder
+    from serial_link import FrameSender
+
+    rng = random.Random(seed)
+    line = SimulatedLine(baud)
+    rate = RateController(baud, line.out_waiting, slow_share=slow_share) if adaptive else None
+    sender = FrameSender(line.write, make_encoder(protocol), changes_only=True, rate=rate)
+    channels = [0] * 12
+    pending = {"fast": None, "slow": None}     # First change not yet sent
+    delays = {"fast": [], "slow": []}
+    for i in range(int(seconds * rate_hz)):
+        now = line.now = i / rate_hz
+        if rng.random() < 0.3:
+            channels[0] = rng.randint(-1000, 1000)
+            channels[1] = rng.randint(-1000, 1000)
+            pending["fast"] = pending["fast"] if pending["fast"] is not None else now
+        if rng.random() < 0.7:
+            channels[6] = rng.randint(-1000, 1000)
+            pending["slow"] = pending["slow"] if pending["slow"] is not None else now
+        if sender.send(tuple(channels), now):
+            for kind, since in pending.items():
+                if since is not None:
+                    delays[kind].append(line.free_at - since)
+                    pending[kind] = None
+    mean = lambda d: sum(d) / len(d) if d else 0.0
+    return line, sender, mean(delays["fast"]), mean(delays["slow"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a host loop on a serial line with and without rate control.")
+    parser.add_argument("--protocol", default="text", choices=["text", "binary"])
+    parser.add_argument("--baud", type=int, default=57600)
+    parser.add_argument("--rate", type=float, default=250, help="Host loop tick rate in Hz")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.protocol} at {args.baud} baud, {args.rate:g} Hz loop, {args.seconds:g} s")
+    for name, adaptive, slow_share in (("fixed", False, 1.0), ("no prio", True, 1.0), ("adaptive", True, SLOW_SHARE)):
+        line, sender, fast, slow = simulate(args.protocol, args.baud, args.rate, args.seconds, adaptive, slow_share)
+        delays = sorted(line.delays)
+        p99 = delays[int(0.99 * (len(delays) - 1))] if delays else 0.0
+        print(f"{name:<9} {sender.sent / args.seconds:6.0f} f/s  "
+              f"OS queue p99 {p99 * 1000:7.1f} ms  max {max(delays, default=0) * 1000:7.1f} ms  "
+              f"change to arrival: fast {fast * 1000:6.1f} ms  slow {slow * 1000:6.1f} ms")
+        if sender.rate:
+            print(f"          {sender.rate.summary()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import mmap
+import queue
+import struct
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for TraceFile.as_array()
+    np = None
+
+from protocol import NUM_CHANNELS
+
+# -----------------------------------------------------------------------------
+# Trace file layout
+#
+#   [0..7]   magic b"RCTRACE1"
+#   [8..11]  uint32 header length, the JSON header is padded to 8-byte alignment
+#   [12..]   JSON header: devices (role, name, axes, buttons), channels, record_size,
+#            axis_type ("d"; version 1 files have none and float32 axes)
+#   records  fixed size, little-endian, no padding:
+#              float64 t, then per device: float64 axes[n], uint8 button bits[ceil(m/8)],
+#              then int16 channels[12]
+#
+# Axes are stored as the float64 pygame returns, so a replay feeds the
+# processing exactly the values of the recorded run. Version 1 traces hold
+# float32 axes; their replays can differ from the run by one count on a
+# channel now and then.
+# -----------------------------------------------------------------------------
+
+MAGIC = b"RCTRACE1"
+HEADER_PREFIX = struct.Struct("<8sI")
+TIME = struct.Struct("<d")
+CHANNELS = struct.Struct(f"<{NUM_CHANNELS}h")
+AXIS_TYPE = "d"
+AXIS_DTYPES = {"d": "<f8", "f": "<f4"}
+CHUNK_RECORDS = 4096      # Records per buffered write
+
+class _Idle:
+    """Stand-in for a disconnected joystick: centred axes, no buttons held."""
+
+    def get_axis(self, i):
+        return 0.0
+
+    def get_button(self, i):
+        return 0
+
+_IDLE = _Idle()
+
+class TraceRecorder:
+    """
+    Log raw joystick state and the emitted channels every tick. Records are
+    packed into preallocated chunk buffers; a full chunk is handed to a
+    background thread for the file write, so the loop never blocks on disk.
+    """
+
+    def __init__(self, path, joysticks, chunk_records=CHUNK_RECORDS):
+        self.devices = []
+        self.roles = []
+        header_devices = []
+        offset = TIME.size
+        for role, js in joysticks.items():
+            if js is None:
+                continue
+            axes = js.get_numaxes()
+            buttons = js.get_numbuttons()
+            axis_struct = struct.Struct(f"<{axes}{AXIS_TYPE}")
+            button_bytes = (buttons + 7) // 8
+            self.devices.append((js, axis_struct, offset, range(axes),
+                                 offset + axis_struct.size, button_bytes, range(buttons)))
+            self.roles.append(role)
+            header_devices.append({"role": role, "name": js.get_name(),
+                                   "axes": axes, "buttons": buttons})
+            offset += axis_struct.size + button_bytes
+        self.channel_offset = offset
+        self.record_size = offset + CHANNELS.size
+        self.chunk_records = chunk_records
+        self.padding = (0,) * NUM_CHANNELS
+
+        header = json.dumps({
+            "version": 2,
+            "devices": header_devices,
+            "channels": NUM_CHANNELS,
+            "record_size": self.record_size,
+            "axis_type": AXIS_TYPE,
+        }).encode()
+        header += b" " * (-(HEADER_PREFIX.size + len(header)) % 8)
+        self.file = open(path, "wb")
+        self.file.write(HEADER_PREFIX.pack(MAGIC, len(header)) + header)
+
+        self.free = queue.Queue()
+        for _ in range(3):
+            self.free.put(bytearray(self.record_size * chunk_records))
+        self.full = queue.Queue()
+        self.buffer = self.free.get()
+        self.used = 0
+        self.records = 0
+        self.extra_buffers = 0
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, now, channels):
+        buf = self.buffer
+        base = self.used * self.record_size
+        TIME.pack_into(buf, base, now)
+        for js, axis_struct, axis_off, axes, button_off, button_bytes, buttons in self.devices:
+            axis_struct.pack_into(buf, base + axis_off, *map(js.get_axis, axes))
+            get_button = js.get_button
+            bits = 0
+            for i in buttons:
+                if get_button(i):
+                    bits |= 1 << i
+            start = base + button_off
+            buf[start:start + button_bytes] = bits.to_bytes(button_bytes, "little")
+        if len(channels) < NUM_CHANNELS:
+            channels = tuple(channels) + self.padding[len(channels):]
+        CHANNELS.pack_into(buf, base + self.channel_offset, *channels)
+        self.used += 1
+        self.records += 1
+        if self.used == self.chunk_records:
+            self._hand_off()
+
+    def rebind(self, joysticks):
+        """
+        Record from reconnected joysticks. The trace layout is fixed by the
+        header, so a role whose joystick is gone or has a different layout
+        is recorded as idle.
+        """
+        for n, role in enumerate(self.roles):
+            old, axis_struct, axis_off, axes, button_off, button_bytes, buttons = self.devices[n]
+            js = joysticks.get(role)
+            if js is None or js.get_numaxes() != len(axes) or js.get_numbuttons() != len(buttons):
+                js = _IDLE
+            self.devices[n] = (js, axis_struct, axis_off, axes, button_off, button_bytes, buttons)
+
+    def _hand_off(self):
+        self.full.put((self.buffer, self.used))
+        try:
+            self.buffer = self.free.get_nowait()
+        except queue.Empty:
+            # Disk is behind; grow rather than stall the loop
+            self.buffer = bytearray(self.record_size * self.chunk_records)
+            self.extra_buffers += 1
+        self.used = 0
+
+    def _run(self):
+        while True:
+            item = self.full.get()
+            if item is None:
+                return
+            buf, used = item
+            self.file.write(memoryview(buf)[:used * self.record_size])
+            self.free.put(buf)
+
+    def close(self):
+        if self.used:
+            self._hand_off()
+        self.full.put(None)
+        self._thread.join()
+        self.file.close()
+
+class TraceFile:
+    """
+    Read-only view of a recorded trace through mmap: records are unpacked
+    straight from the mapping, and as_array() gives a zero-copy numpy array.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = HEADER_PREFIX.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a trace file")
+        self.header = json.loads(bytes(self.map[HEADER_PREFIX.size:HEADER_PREFIX.size + header_len]))
+        self.data_offset = HEADER_PREFIX.size + header_len
+        self.record_size = self.header["record_size"]
+        self.devices = self.header["devices"]
+        self.axis_type = self.header.get("axis_type", "f")
+        fmt = "<d"
+        for dev in self.devices:
+            fmt += f"{dev['axes']}{self.axis_type}{(dev['buttons'] + 7) // 8}s"
+        self.record_struct = struct.Struct(fmt + f"{self.header['channels']}h")
+        # A record cut short by a crash is ignored
+        self.count = (len(self.map) - self.data_offset) // self.record_size
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index):
+        """(t, {role: (axes, buttons)}, channels) for one record."""
+        fields = self.record_struct.unpack_from(self.map, self.data_offset + index * self.record_size)
+        t = fields[0]
+        pos = 1
+        states = {}
+        for dev in self.devices:
+            axes = fields[pos:pos + dev["axes"]]
+            bits = int.from_bytes(fields[pos + dev["axes"]], "little")
+            states[dev["role"]] = (axes, [(bits >> i) & 1 for i in range(dev["buttons"])])
+            pos += dev["axes"] + 1
+        return t, states, fields[pos:]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.record(i)
+
+    def dtype(self):
+        fields = [("t", "<f8")]
+        for dev in self.devices:
+            fields.append((f"{dev['role']}_axes", AXIS_DTYPES[self.axis_type], (dev["axes"],)))
+            fields.append((f"{dev['role']}_buttons", "u1", ((dev["buttons"] + 7) // 8,)))
+        fields.append(("channels", "<i2", (self.header["channels"],)))
+        return np.dtype(fields)
+
+    def as_array(self):
+        """Zero-copy numpy structured array over the records (needs numpy)."""
+        if np is None:
+            raise RuntimeError("as_array() needs numpy")
+        return np.frombuffer(self.map, dtype=self.dtype(), count=self.count, offset=self.data_offset)
+
+    def replay(self, joysticks):
+        """Yield (t, joysticks) with the joysticks set to each recorded tick, by role."""
+        for t, states, _ in self:
+            for role, (axes, buttons) in states.items():
+                js = joysticks.get(role)
+                if js is None:
+                    continue
+                js.axes[:len(axes)] = axes[:len(js.axes)]
+                js.buttons[:len(buttons)] = buttons[:len(js.buttons)]
+            yield t, joysticks
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a recorded trace, or export it as CSV.")
+    parser.add_argument("trace")
+    parser.add_argument("--csv", help="Write t and the output channels to this CSV file")
+    args = parser.parse_args()
+
+    trace = TraceFile(args.trace)
+    print(f"{len(trace)} records of {trace.record_size} bytes")
+    for dev in trace.devices:
+        print(f"  {dev['role']}: {dev['name']} ({dev['axes']} axes, {dev['buttons']} buttons)")
+    if len(trace):
+        first, last = trace.record(0)[0], trace.record(len(trace) - 1)[0]
+        duration = last - first
+        rate = (len(trace) - 1) / duration if duration > 0 else 0.0
+        print(f"  {duration:.2f} s at {rate:.1f} Hz")
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write("t," + ",".join(f"ch{i}" for i in range(trace.header["channels"])) + "\n")
+            for t, _, channels in trace:
+                f.write(f"{t:.6f}," + ",".join(map(str, channels)) + "\n")
+    trace.close()
+
+if __name__ == "__main__":
+    main()
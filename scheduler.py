@@ -0,0 +1,121 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import time
+
+# -------------------------------
+# Scheduler Config
+# -------------------------------
+POLICY_SKIP    = "skip"      # Drop missed ticks and realign to the tick grid
+POLICY_CATCHUP = "catchup"   # Run missed ticks back-to-back until caught up
+MAX_CATCHUP    = 5           # Most ticks run back-to-back before falling back to skip
+SPIN_MARGIN    = 0.0005      # Seconds before a deadline to stop sleeping and spin
+
+class LoopScheduler:
+    """
+    Hold a control loop at a fixed tick rate using absolute deadlines on a
+    monotonic clock, so the rate does not drift with the work done per tick.
+    Call wait() at the top of every loop iteration.
+    """
+
+    def __init__(self, rate_hz, policy=POLICY_SKIP, clock=time.perf_counter,
+                 sleep=time.sleep, spin_margin=SPIN_MARGIN):
+        if rate_hz <= 0:
+            raise ValueError(f"Tick rate must be positive, got {rate_hz}")
+        if policy not in (POLICY_SKIP, POLICY_CATCHUP):
+            raise ValueError(f"Unknown scheduler policy: {policy}")
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.spin_margin = spin_margin
+        self.ticks = 0
+        self.missed = 0
+        self.late_ticks = 0
+        self.max_late = 0.0
+        self.deadline = None
+        self.started = None
+
+    def wait(self):
+        """
+        Block until the next tick is due and return the current clock time.
+        A tick that starts after its deadline is counted in self.late_ticks;
+        whole periods lost behind it are either run immediately (catchup) or
+        dropped and counted in self.missed (skip).
+        """
+        now = self.clock()
+        if self.deadline is None:
+            self.started = now
+            self.deadline = now + self.period
+            self.ticks += 1
+            return now
+
+        remaining = self.deadline - now
+        if remaining > 0:
+            now = self.sleep_until(self.deadline)
+            self.deadline += self.period
+        else:
+            late = -remaining
+            self.late_ticks += 1
+            if late > self.max_late:
+                self.max_late = late
+            behind = int(late / self.period)
+            if self.policy == POLICY_CATCHUP and behind < MAX_CATCHUP:
+                # Keep the deadline grid; the next wait() returns at once
+                # until the loop has caught back up.
+                self.deadline += self.period
+            else:
+                self.missed += behind
+                self.deadline += (behind + 1) * self.period
+        self.ticks += 1
+        return now
+
+    def sleep_until(self, t):
+        """
+        Sleep, then spin the last spin_margin, until clock time t; returns the
+        clock time. Does not count a tick or move the deadline, so it can be
+        used for extra output between ticks (e.g. a pulse edge).
+        """
+        now = self.clock()
+        remaining = t - now
+        if remaining > self.spin_margin:
+            self.sleep(remaining - self.spin_margin)
+        now = self.clock()
+        while now < t:
+            now = self.clock()
+        return now
+
+    def tick(self):
+        """
+        Count a tick without waiting, for loops paced by something else
+        (e.g. joystick events); returns the current clock time.
+        """
+        now = self.clock()
+        if self.started is None:
+            self.started = now
+        self.ticks += 1
+        return now
+
+    def actual_rate(self):
+        """Average tick rate since the first wait()."""
+        if self.started is None or self.ticks < 2:
+            return 0.0
+        elapsed = self.clock() - self.started
+        return (self.ticks - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (
+            f"{self.ticks} ticks at {self.actual_rate():.1f} Hz "
+            f"(target {self.rate_hz} Hz), {self.late_ticks} late, {self.missed} missed, "
+            f"worst late {self.max_late * 1000:.2f} ms"
+        )
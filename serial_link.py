@@ -0,0 +1,340 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import threading
+import time
+
+from latency import LatencyCollector
+from protocol import (
+    MSG_ECHO, MSG_TELEMETRY, PROTOCOL_BINARY, DeviceFrameParser, encode_failsafe_frame, make_encoder,
+)
+from ratecontrol import HOLD, SEND_FAST, RateController
+from stats import LatencyHistogram
+from telemetry import TelemetryCollector
+
+# -------------------------------
+# Send Mode Config
+# -------------------------------
+KEYFRAME_INTERVAL = 0.1    # Seconds between forced full frames while output is unchanged. These
+                           # are also the sketch's keepalives: keep well under FAILSAFE_TIMEOUT_MS
+FAILSAFE_RESEND   = 1.0    # Seconds between failsafe value frames, so a sketch that reset gets them again
+
+class FrameSender:
+    """
+    Sit between the channel-building code and the serial write. A frame is
+    only encoded and written when a channel moved by more than its deadband
+    since the last frame sent, or when a keyframe is due so the receiver can
+    recover from a dropped frame. Keyframes double as keepalives for the
+    sketch's failsafe watchdog. With changes_only off every frame is sent.
+    A RateController, when given, can hold frames back to what the line
+    carries; a held frame's changes go out with the next one.
+    """
+
+    def __init__(self, write, encoder, changes_only=True, deadband=0,
+                 keyframe_interval=KEYFRAME_INTERVAL, clock=time.perf_counter, rate=None):
+        self.write = write
+        self.encoder = encoder
+        self.changes_only = changes_only
+        self.deadband = deadband
+        self.keyframe_interval = keyframe_interval
+        self.clock = clock
+        self.rate = rate
+        self.last_sent = None
+        self.last_sent_time = None
+        self.sent = 0
+        self.suppressed = 0
+        self.keyframes = 0
+        self.held = 0              # Frames the rate controller kept back
+        self.bytes_sent = 0
+
+    def changed(self, channels, indices=None):
+        """Whether any channel (or any of indices) moved past its deadband since the last frame."""
+        last = self.last_sent
+        if last is None or len(last) != len(channels):
+            return True
+        deadband = self.deadband
+        if indices is not None:
+            for i in indices:
+                if i < len(channels) and \
+                        abs(channels[i] - last[i]) > (deadband if isinstance(deadband, int) else deadband[i]):
+                    return True
+        elif isinstance(deadband, int):
+            for new, old in zip(channels, last):
+                if abs(new - old) > deadband:
+                    return True
+        else:
+            for new, old, band in zip(channels, last, deadband):
+                if abs(new - old) > band:
+                    return True
+        return False
+
+    def send(self, channels, now=None):
+        """Send channels if needed; return True when a frame was written."""
+        if now is None:
+            now = self.clock()
+        keyframe = False
+        if self.changes_only and not self.changed(channels):
+            if now - self.last_sent_time < self.keyframe_interval:
+                self.suppressed += 1
+                return False
+            keyframe = True
+        rate = self.rate
+        if rate is not None:
+            allowed = rate.check(now)
+            if allowed == HOLD or (allowed == SEND_FAST and not keyframe
+                                   and not self.changed(channels, rate.fast_channels)):
+                if allowed == SEND_FAST:
+                    rate.on_hold()
+                self.held += 1
+                return False
+        if keyframe:
+            self.keyframes += 1
+        frame = self.encoder.encode(channels, now)
+        self.write(frame)
+        self.last_sent = channels
+        self.last_sent_time = now
+        self.sent += 1
+        self.bytes_sent += len(frame)
+        if rate is not None:
+            rate.sent(now, len(frame))
+        return True
+
+    def summary(self):
+        total = self.sent + self.suppressed
+        ratio = 100.0 * self.suppressed / total if total else 0.0
+        held = f", {self.held} held by the rate limit" if self.rate is not None else ""
+        return (
+            f"{self.sent} frames sent ({self.keyframes} keyframes), "
+            f"{self.suppressed} suppressed ({ratio:.1f}%){held}, {self.bytes_sent} bytes"
+        )
+
+class SerialWriter:
+    """
+    Own the serial port on a background thread fed by a single-slot mailbox.
+    put() never blocks on I/O: a frame that has not been written yet is
+    replaced by the newer one and counted as dropped, so the port only ever
+    carries the latest state. Enqueue-to-write latency is kept in a histogram.
+    """
+
+    def __init__(self, ser, on_write=None, clock=time.perf_counter):
+        self.ser = ser
+        self.on_write = on_write
+        self.clock = clock
+        self.latency = LatencyHistogram()
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.bytes_written = 0
+        self.last_write = None
+        self.failed_at = None      # Time of the first failed write since the port was (re)opened
+        self.profiler = None       # StageProfiler timing each ser.write() as the "write" stage
+        self._slot = None
+        self._control = None
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="serial-writer", daemon=True)
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def put(self, frame):
+        # Copy: the binary encoder reuses its buffer for the next frame.
+        item = (bytes(frame), self.clock())
+        with self._cond:
+            if self._slot is not None:
+                self.dropped += 1
+            self._slot = item
+            self._cond.notify()
+
+    def put_control(self, data):
+        """
+        Queue a configuration frame (failsafe values) for the sketch. It is
+        written ahead of the pending frame and is not counted as one.
+        """
+        with self._cond:
+            self._control = bytes(data)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._slot is None and self._control is None and self._running:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                control, self._control = self._control, None
+                if control is None:
+                    frame, queued = self._slot
+                    self._slot = None
+            if control is not None:
+                self._write(control)
+                continue
+            profiler = self.profiler
+            t = profiler.begin() if profiler else 0
+            if not self._write(frame):
+                continue
+            if t:
+                profiler.lap("write", t)
+            done = self.clock()
+            self.latency.record(done - queued)
+            self.last_write = done
+            self.written += 1
+            self.bytes_written += len(frame)
+            if self.on_write:
+                self.on_write(frame)
+
+    def _write(self, data):
+        try:
+            self.ser.write(data)
+        except Exception as e:
+            self.errors += 1
+            if self.failed_at is None:
+                self.failed_at = self.clock()
+                print(f"Serial write failed: {e}")
+            return False
+        return True
+
+    def summary(self):
+        return (
+            f"{self.written} frames written, {self.dropped} dropped, "
+            f"{self.errors} errors; queue latency {self.latency.summary()}"
+        )
+
+class SerialReader:
+    """
+    Read sketch-to-host frames on a background thread and hand each payload
+    to the handler registered for its message type, with the receive time.
+    """
+
+    def __init__(self, ser, handlers, clock=time.perf_counter):
+        self.ser = ser
+        self.handlers = handlers
+        self.clock = clock
+        self.parser = DeviceFrameParser()
+        self._running = False
+        self._thread = threading.Thread(target=self._run, name="serial-reader", daemon=True)
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        self._thread.join(timeout)
+
+    def summary(self):
+        p = self.parser
+        return f"{p.frames} frames from the sketch, {p.crc_errors} CRC errors, {p.skipped} bytes skipped"
+
+    def _run(self):
+        while self._running:
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                print(f"Serial read failed: {e}")
+                return
+            if not data:
+                continue
+            received_at = self.clock()
+            for msg_type, payload in self.parser.feed(data):
+                handler = self.handlers.get(msg_type)
+                if handler:
+                    handler(payload, received_at)
+
+class SerialLink:
+    """
+    The host side of one serial connection: the writer thread, the frame
+    sender in front of it, with adaptive_rate a RateController matched to
+    the port's baud rate and, when latency is measured or telemetry read,
+    the reader thread with the collectors for the sketch's echoes and reports.
+    With failsafe_values set, the sketch is told every FAILSAFE_RESEND what
+    its failsafe should output for this mode.
+    """
+
+    def __init__(self, ser, protocol, changes_only=True, deadband=0, measure_latency=False,
+                 read_telemetry=True, adaptive_rate=False, failsafe_values=None):
+        if measure_latency and protocol != PROTOCOL_BINARY:
+            print("Latency measurement needs the binary protocol; it is turned off.")
+            measure_latency = False
+        self.latency = LatencyCollector() if measure_latency else None
+        self.telemetry = TelemetryCollector() if read_telemetry else None
+        self.writer = SerialWriter(ser, self.latency.on_write if self.latency else None)
+        baud = getattr(ser, "baudrate", None)
+        if adaptive_rate and not baud:
+            print("Rate control needs the port's baud rate; it is turned off.")
+            adaptive_rate = False
+        writer = self.writer
+        self.rate = RateController(baud, lambda: writer.ser.out_waiting,
+                                   lambda: writer.dropped) if adaptive_rate else None
+        self.sender = FrameSender(self.writer.put, make_encoder(protocol, measure_latency),
+                                  changes_only, deadband, rate=self.rate)
+        handlers = {}
+        if self.latency:
+            handlers[MSG_ECHO] = self.latency.on_echo
+        if self.telemetry:
+            handlers[MSG_TELEMETRY] = self.telemetry.on_telemetry
+        self.reader = SerialReader(ser, handlers) if handlers else None
+        self.failsafe_frame = encode_failsafe_frame(failsafe_values) if failsafe_values else None
+        self.next_failsafe = 0.0
+        self.writer.start()
+        if self.reader:
+            self.reader.start()
+
+    def send(self, channels, now):
+        if self.failsafe_frame and now >= self.next_failsafe:
+            self.next_failsafe = now + FAILSAFE_RESEND
+            self.writer.put_control(self.failsafe_frame)
+        return self.sender.send(channels, now)
+
+    def reopen(self, ser):
+        """
+        Carry on over a reopened port: the writer switches to it, the reader
+        (if any) is restarted on it and the next frame is sent in full.
+        """
+        self.writer.ser = ser
+        self.writer.failed_at = None
+        self.sender.last_sent = None
+        self.next_failsafe = 0.0
+        if self.reader:
+            self.reader.stop()
+            parser = self.reader.parser
+            # Keep the counts; a partial frame from the old port is useless
+            parser.buffer.clear()
+            self.reader = SerialReader(ser, self.reader.handlers)
+            self.reader.parser = parser
+            self.reader.start()
+
+    def close(self):
+        self.writer.stop()
+        if self.reader:
+            self.reader.stop()
+
+    def summary(self):
+        lines = [self.sender.summary(), self.writer.summary()]
+        if self.rate:
+            lines.append(self.rate.summary())
+        if self.latency:
+            lines.append(self.latency.summary())
+        if self.telemetry:
+            lines.append(self.telemetry.summary())
+        if self.reader:
+            lines.append(self.reader.summary())
+        return "\n".join(lines)
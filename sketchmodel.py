@@ -0,0 +1,372 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import threading
+import time
+
+from protocol import (
+    ECHO_BODY, FAILSAFE_BODY, FAILSAFE_FRAME_SIZE, FAILSAFE_SYNC, FLAG_ECHO_BYTE, FLAG_ECHO_MASK,
+    FRAME_SIZE, FRAME_SIZE_STAMPED, FRAME_SYNC, MSG_ECHO, MSG_TELEMETRY, TELEMETRY_BODY, crc16,
+    encode_device_frame, to_micros,
+)
+
+HIGH = 1
+LOW = 0
+
+# (pin pair, state for +1, 0, -1) exactly as written by applyOutputs()
+SWITCH_PINS = {
+    "swE": ((14, 15), {1: (HIGH, LOW), 0: (HIGH, HIGH), -1: (LOW, HIGH)}),
+    "swB": ((10, 16), {1: (LOW, HIGH), 0: (HIGH, HIGH), -1: (HIGH, LOW)}),
+    "swF": ((7, 6),   {1: (LOW, HIGH), 0: (HIGH, HIGH), -1: (HIGH, LOW)}),
+    "swC": ((4, 5),   {1: (LOW, HIGH), 0: (HIGH, HIGH), -1: (HIGH, LOW)}),
+}
+PADDLE_PINS = (21, 8)
+
+SYNC_BYTES = (FRAME_SYNC, FAILSAFE_SYNC)    # isSync()
+LINE_MAX = 96                    # lineBuf size, including the terminating NUL
+FAILSAFE_TIMEOUT_MS = 250
+FAILSAFE_VALUES = (0, 0, -1000, 0, 0, 0, 0, 0, 0, 0, 0, 0)   # failsafeValues[] until the host sends its own: z at idle
+TELEMETRY_INTERVAL_MS = 100
+
+# MCP4728 write cost on the I2C bus, in bytes after the start condition
+I2C_ADDRESS_BYTES = 1
+SINGLE_WRITE_BYTES = 3    # setChannelValue(): one channel per transaction
+FAST_WRITE_BYTES = 8      # fastWrite(): all four channels in one transaction
+I2C_CLOCK_HZ = 400000
+
+def arduino_map(x, in_min, in_max, out_min, out_max):
+    """Arduino map(): long arithmetic with C truncation toward zero."""
+    num = (x - in_min) * (out_max - out_min)
+    den = in_max - in_min
+    q = abs(num) // abs(den)
+    return (q if (num < 0) == (den < 0) else -q) + out_min
+
+def _to_int(text):
+    """String::toInt(): atol() on the leading number, 0 if there is none."""
+    i, n = 0, len(text)
+    while i < n and text[i] in " \t\r\n":
+        i += 1
+    start = i
+    if i < n and text[i] in "+-":
+        i += 1
+    while i < n and text[i].isdigit():
+        i += 1
+    try:
+        return int(text[start:i])
+    except ValueError:
+        return 0
+
+def _substring(text, left, right=None):
+    """String::substring() with AVR 16-bit unsigned indices, so -1 means 'to the end'."""
+    n = len(text)
+    left &= 0xFFFF
+    right = n if right is None else right & 0xFFFF
+    if left > right:
+        left, right = right, left
+    if left >= n:
+        return ""
+    return text[left:min(right, n)]
+
+def _index_of(text, ch, start=0):
+    start &= 0xFFFF
+    return -1 if start >= len(text) else text.find(ch, start)
+
+def parse_text_line(line):
+    """The sketch's comma-split of one text line, including its quirks."""
+    idx = [_index_of(line, ",")]
+    for _ in range(10):
+        idx.append(_index_of(line, ",", idx[-1] + 1))
+    c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, c11 = idx
+    return (
+        _to_int(_substring(line, 0, c1)),
+        _to_int(_substring(line, c1 + 1, c2)),
+        _to_int(_substring(line, c2 + 1, c3)),
+        _to_int(_substring(line, c3 + 1, c4)),
+        _to_int(_substring(line, c4 + 1, c5)),
+        _to_int(_substring(line, c5 + 1, c6)),
+        _to_int(_substring(line, c6 + 1, c7)),
+        _to_int(_substring(line, c7 + 1)),
+        _to_int(_substring(line, c8 + 1, c9)),
+        _to_int(_substring(line, c9 + 1, c10)),
+        _to_int(_substring(line, c10 + 1, c11)),
+        _to_int(_substring(line, c11 + 1)),
+    )
+
+class DacBus:
+    """
+    Model of how the sketch schedules its two MCP4728 writes: one fast-write
+    per chip, skipped when the chip's codes are unchanged (batched), or the
+    old eight setChannelValue() calls per frame. Counts I2C traffic so both
+    schemes can be compared frame by frame.
+    """
+
+    def __init__(self, batched=True):
+        self.batched = batched
+        self.last = [(0, 0, 0, 0), (0, 0, 0, 0)]
+        self.frames = 0
+        self.transactions = 0
+        self.bytes = 0
+        self.frame_bytes = 0           # I2C bytes for the most recent frame
+
+    def write(self, dac):
+        """Write the eight DAC codes (mcp A-D, mcp2 A-D) for one frame."""
+        transactions = 0
+        for chip in (0, 1):
+            codes = tuple(dac[chip * 4:chip * 4 + 4])
+            if self.batched:
+                if codes == self.last[chip]:
+                    continue
+                transactions += 1
+            else:
+                transactions += 4
+            self.last[chip] = codes
+        per_transaction = I2C_ADDRESS_BYTES + (FAST_WRITE_BYTES if self.batched else SINGLE_WRITE_BYTES)
+        self.frame_bytes = transactions * per_transaction
+        self.frames += 1
+        self.transactions += transactions
+        self.bytes += self.frame_bytes
+        return self.frame_bytes
+
+    def bytes_per_frame(self):
+        return self.bytes / self.frames if self.frames else 0.0
+
+    def bus_time_us(self):
+        """Average bus time per frame: 9 clocks per byte plus start and stop."""
+        if not self.frames:
+            return 0.0
+        clocks = self.bytes * 9 + self.transactions * 2
+        return clocks / I2C_CLOCK_HZ * 1e6 / self.frames
+
+def millis(seconds):
+    return int(seconds * 1000) & 0xFFFFFFFF
+
+class SketchEmulator:
+    """
+    Python model of RCSimSketch.ino's loop(): the same text/binary framing,
+    CRC checks and resync, DAC mapping and pin writes, and the failsafe
+    watchdog and telemetry (feed() is the serial part of one loop() pass,
+    poll() the checks at its end; the loop time reported is the time between
+    polls). Bytes the sketch would send back (echoes and telemetry) collect
+    in self.tx, and the I2C traffic of the DAC writes is counted in self.dac_bus.
+    """
+
+    def __init__(self, echo=True, clock=time.perf_counter, batched_dac=True,
+                 failsafe_timeout_ms=FAILSAFE_TIMEOUT_MS, telemetry_interval_ms=TELEMETRY_INTERVAL_MS):
+        self.echo = echo
+        self.clock = clock
+        self.failsafe_timeout_ms = failsafe_timeout_ms
+        self.telemetry_interval_ms = telemetry_interval_ms
+        self.frame = bytearray()
+        self.line = bytearray()
+        self.line_overflow = False
+        self.binary_mode = False
+        self.dac = [0] * 8              # mcp A-D, mcp2 A-D
+        self.dac_bus = DacBus(batched_dac)
+        self.pins = {}
+        self.inputs = None              # last 12 values passed to applyOutputs()
+        self.frames = 0
+        self.text_lines = 0
+        self.bad_lines = 0
+        self.crc_errors = 0
+        self.tx = bytearray()
+        self.now = 0.0
+        self.last_frame_ms = 0
+        self.failsafes = 0              # times the watchdog tripped
+        self.loop_start = None
+        self.loop_times = []            # loop() pass times in us since the last report
+        self.last_telemetry_ms = 0
+        self.telemetry_sent = 0
+        self.failsafe_values = FAILSAFE_VALUES
+        # setup() ends in failsafe: neutral outputs until the first frame
+        self.enter_failsafe()
+
+    def feed(self, data, now=None):
+        """Bytes read in one loop() pass; now (seconds) stamps the frames that complete."""
+        self.now = self.clock() if now is None else now
+        for b in data:
+            if not self.frame and not self.binary_mode and (self.line or b not in SYNC_BYTES):
+                if b == 0x0A:
+                    if self.line_overflow:
+                        self.bad_lines += 1
+                    else:
+                        self.handle_text_line(self.line.decode("ascii", "replace"))
+                    self.line.clear()
+                    self.line_overflow = False
+                elif len(self.line) < LINE_MAX - 1:
+                    self.line.append(b)
+                else:
+                    self.line_overflow = True
+                continue
+            if not self.frame and b not in SYNC_BYTES:
+                continue
+            self.frame.append(b)
+            self.process_frame_buffer()
+
+    def poll(self, now=None):
+        """
+        The checks at the end of loop(): the failsafe watchdog, then the
+        telemetry report when one is due. Returns True when the failsafe trips.
+        """
+        now = self.clock() if now is None else now
+        if self.loop_start is not None:
+            self.loop_times.append(to_micros(now - self.loop_start))
+        self.loop_start = now
+        tripped = False
+        if not self.failsafe and (millis(now) - self.last_frame_ms) & 0xFFFFFFFF > self.failsafe_timeout_ms:
+            self.failsafes += 1
+            self.enter_failsafe()
+            tripped = True
+        if self.telemetry_interval_ms and \
+                (millis(now) - self.last_telemetry_ms) & 0xFFFFFFFF >= self.telemetry_interval_ms:
+            self.last_telemetry_ms = millis(now)
+            self.send_telemetry()
+        return tripped
+
+    def send_telemetry(self):
+        loops = self.loop_times
+        mean_us = sum(loops) // len(loops) if loops else 0
+        max_us = max(loops) if loops else 0
+        self.tx += encode_device_frame(MSG_TELEMETRY, TELEMETRY_BODY.pack(
+            (self.frames + self.text_lines) & 0xFFFFFFFF,
+            self.crc_errors & 0xFFFF, self.bad_lines & 0xFFFF,
+            min(mean_us, 0xFFFF), min(max_us, 0xFFFF),
+            self.failsafes & 0xFF, 1 if self.failsafe else 0,
+            *(code & 0xFFFF for code in self.dac)))
+        self.telemetry_sent += 1
+        self.loop_times = []
+
+    def enter_failsafe(self):
+        self.failsafe = True
+        self.apply_outputs(*self.failsafe_values)
+
+    def frame_received(self):
+        self.last_frame_ms = millis(self.now)
+        self.failsafe = False
+
+    def handle_text_line(self, line):
+        if line.count(",") < 7:
+            self.bad_lines += 1        # Fewer than 8 values: not a frame
+            return
+        self.text_lines += 1
+        self.apply_outputs(*parse_text_line(line))
+        self.frame_received()
+
+    def process_frame_buffer(self):
+        buf = self.frame
+        while buf:
+            if buf[0] == FAILSAFE_SYNC:
+                size = FAILSAFE_FRAME_SIZE
+            elif len(buf) <= FLAG_ECHO_BYTE:
+                return
+            else:
+                size = FRAME_SIZE_STAMPED if buf[FLAG_ECHO_BYTE] & FLAG_ECHO_MASK else FRAME_SIZE
+            if len(buf) < size:
+                return
+            if crc16(buf, 1, size - 2) == buf[size - 2] | (buf[size - 1] << 8):
+                if buf[0] == FAILSAFE_SYNC:
+                    self.apply_failsafe_frame(buf)
+                else:
+                    self.binary_mode = True
+                    self.apply_binary_frame(buf, size)
+                del buf[:size]
+            else:
+                self.crc_errors += 1
+                nxt = next((i for i in range(1, len(buf)) if buf[i] in SYNC_BYTES), len(buf))
+                del buf[:nxt]
+
+    def apply_failsafe_frame(self, buf):
+        self.failsafe_values = FAILSAFE_BODY.unpack_from(buf, 0)[1:]
+        if self.failsafe:
+            self.enter_failsafe()
+
+    def apply_binary_frame(self, buf, size):
+        def analog(bit):
+            # readAnalog(): three bytes from the one holding the field's first bit
+            p = 2 + (bit >> 3)
+            return (((buf[p] | (buf[p + 1] << 8) | (buf[p + 2] << 16)) >> (bit & 7)) & 0x7FF) - 1024
+        digital = (buf[10] | (buf[11] << 8)) >> 2
+        self.apply_outputs(
+            analog(0), analog(11), analog(22), analog(33),
+            digital & 1, (digital >> 1) & 1,
+            analog(44), analog(55),
+            ((digital >> 2) & 3) - 1, ((digital >> 4) & 3) - 1,
+            ((digital >> 6) & 3) - 1, ((digital >> 8) & 3) - 1,
+        )
+        self.frame_received()
+        self.frames += 1
+        if self.echo and size == FRAME_SIZE_STAMPED:
+            host_us = int.from_bytes(buf[12:16], "little")
+            self.tx += encode_device_frame(
+                MSG_ECHO, ECHO_BODY.pack(buf[1], host_us, to_micros(self.clock())))
+
+    def apply_outputs(self, x, y, z, c, leftpaddle, rightpaddle, left_pot, right_pot,
+                      swE, swB, swC, swF):
+        self.inputs = (x, y, z, c, leftpaddle, rightpaddle, left_pot, right_pot,
+                       swE, swB, swC, swF)
+        self.dac = [
+            arduino_map(x, -1000, 1000, 0, 4095),
+            arduino_map(y, -1000, 1000, 0, 4095),
+            arduino_map(z, 1000, -1000, 0, 4095),
+            arduino_map(c, -1000, 1000, 0, 4095),
+            arduino_map(right_pot, -1000, 1000, 0, 4095),
+            arduino_map(left_pot, -1000, 1000, 0, 4095),
+            0,
+            0,
+        ]
+        self.dac_bus.write(self.dac)
+        for name, position in (("swE", swE), ("swB", swB), ("swF", swF), ("swC", swC)):
+            (pin_a, pin_b), states = SWITCH_PINS[name]
+            if position in states:
+                self.pins[pin_a], self.pins[pin_b] = states[position]
+        self.pins[PADDLE_PINS[0]] = LOW if leftpaddle == 1 else HIGH
+        self.pins[PADDLE_PINS[1]] = LOW if rightpaddle == 1 else HIGH
+
+class LoopbackSerial:
+    """
+    In-memory stand-in for serial.Serial wired straight into a SketchEmulator:
+    writes are parsed at once and the sketch's replies can be read back.
+    Each look at in_waiting ends one sketch loop() pass, so the watchdog and
+    telemetry run on the wall clock while the port is read. A lock keeps
+    the writer and reader threads from running the sketch at the same time.
+    """
+
+    def __init__(self, sketch=None, baudrate=115200):
+        self.sketch = sketch if sketch is not None else SketchEmulator()
+        self.baudrate = baudrate
+        self.bytes_written = 0
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        with self.lock:
+            self.bytes_written += len(data)
+            self.sketch.feed(data)
+        return len(data)
+
+    @property
+    def in_waiting(self):
+        with self.lock:
+            self.sketch.poll()
+            return len(self.sketch.tx)
+
+    def read(self, size=1):
+        with self.lock:
+            tx = self.sketch.tx
+            data = bytes(tx[:size])
+            del tx[:size]
+        return data
+
+    @property
+    def out_waiting(self):
+        return 0
+
+    def close(self):
+        pass
@@ -0,0 +1,68 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+# Bucket i counts samples below 2**i microseconds; the last bucket takes the rest.
+NUM_BUCKETS = 24
+
+class LatencyHistogram:
+    """
+    Fixed power-of-two histogram of durations in seconds. Recording is a few
+    integer operations and never allocates, so it is safe to call every tick.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        us = int(seconds * 1000000)
+        i = us.bit_length() if us > 0 else 0
+        self.buckets[i if i < NUM_BUCKETS else NUM_BUCKETS - 1] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def reset(self):
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile, in seconds."""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min((1 << i) / 1000000, self.max)
+        return self.max
+
+    def summary(self):
+        return (
+            f"n={self.count} mean={self.mean() * 1000:.3f} ms "
+            f"p50<={self.percentile(50) * 1000:.3f} ms "
+            f"p99<={self.percentile(99) * 1000:.3f} ms "
+            f"max={self.max * 1000:.3f} ms"
+        )
+
+    def rows(self):
+        """(upper bound in microseconds, count) for every non-empty bucket."""
+        return [(1 << i, n) for i, n in enumerate(self.buckets) if n]
@@ -0,0 +1,90 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import sys
+
+# -------------------------------
+# Status Display Config
+# -------------------------------
+STATUS_RATE_HZ = 10     # In-place refreshes per second
+
+class StatusDisplay:
+    """
+    One status line rewritten in place at a low fixed rate, replacing the
+    per-frame print. The loop calls due(now) every tick, which is a single
+    comparison, and only builds the line when it returns True. With a
+    telemetry collector the sketch's own figures are shown at the end, and
+    with a rate controller its limit while it is holding frames back. In
+    quiet mode nothing is ever printed.
+    """
+
+    def __init__(self, scheduler=None, writer=None, rate_hz=STATUS_RATE_HZ,
+                 quiet=False, stream=None, telemetry=None, rate=None):
+        self.scheduler = scheduler
+        self.writer = writer
+        self.telemetry = telemetry
+        self.rate = rate
+        self.interval = 1.0 / rate_hz
+        self.quiet = quiet
+        self.stream = stream if stream is not None else sys.stdout
+        self.next_refresh = 0.0 if not quiet else float("inf")
+        self.last_time = None
+        self.last_ticks = 0
+        self.last_bytes = 0
+        self.last_frames = 0
+        self.width = 0
+
+    def due(self, now):
+        return now >= self.next_refresh
+
+    def show(self, now, channels, extra=""):
+        """Redraw the status line; extra is a short mode-specific field."""
+        self.next_refresh = now + self.interval
+        ticks = self.scheduler.ticks if self.scheduler else 0
+        written = self.writer.bytes_written if self.writer else 0
+        frames = self.writer.written if self.writer else 0
+        if self.last_time is None:
+            loop_hz = tx_bps = tx_fps = 0.0
+        else:
+            dt = now - self.last_time
+            loop_hz = (ticks - self.last_ticks) / dt
+            tx_bps = (written - self.last_bytes) / dt
+            tx_fps = (frames - self.last_frames) / dt
+        self.last_time = now
+        self.last_ticks = ticks
+        self.last_bytes = written
+        self.last_frames = frames
+
+        self.write_line(
+            f"[{','.join(map(str, channels))}] {extra}"
+            f"{' ' if extra else ''}loop {loop_hz:.0f} Hz | "
+            f"tx {tx_fps:.0f} f/s {tx_bps / 1000:.1f} kB/s"
+            f"{f' (limit {self.rate.rate:.0f})' if self.rate and self.rate.constrained else ''}"
+            f"{' | ' + self.telemetry.status(now) if self.telemetry else ''}"
+        )
+
+    def write_line(self, line, now=None):
+        """
+        Overwrite the status line with line, blanking what is left of the old
+        one. Passing now also schedules the next refresh, as show() does.
+        """
+        if now is not None:
+            self.next_refresh = now + self.interval
+        pad = self.width - len(line)
+        self.width = len(line)
+        self.stream.write("\r" + line + (" " * pad if pad > 0 else ""))
+        self.stream.flush()
+
+    def close(self):
+        if not self.quiet and self.width:
+            self.stream.write("\n")
+            self.stream.flush()
@@ -0,0 +1,148 @@
+# -----------------------------------------------------------------------------
+# Project Name: Racing Simulator-RC Controller
+# Author: bitsbits [https://www.youtube.com/@bits-bits]
+# License: Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+#
+# You are free to use, modify, and share this code for non-commercial purposes,
+# provided you credit the original author. Commercial use of this code or any
+# derivatives is not permitted without explicit permission.
+#
+# For full license details, see: https://creativecommons.org/licenses/by-nc/4.0/
+# -----------------------------------------------------------------------------
+
+import threading
+import time
+from collections import deque
+
+from protocol import TELEMETRY_BODY
+
+# -------------------------------
+# Telemetry Collector Config
+# -------------------------------
+REPORT_WINDOW = 3000       # Most recent sketch reports kept for export (5 min at 10 per second)
+STALE_AFTER   = 1.0        # Seconds without a report before the status line says so
+
+FIELDS = ("frames", "crc_errors", "bad_lines", "loop_us", "loop_max_us", "failsafes", "failsafe")
+COUNTERS = (("frames", 0xFFFFFFFF), ("crc_errors", 0xFFFF), ("bad_lines", 0xFFFF), ("failsafes", 0xFF))
+
+class TelemetryCollector:
+    """
+    Reports the sketch sends on its own every TELEMETRY_INTERVAL_MS: frames
+    applied, CRC errors, bad text lines, loop() time, failsafe state and
+    the DAC codes. The sketch's counters wrap and restart when it resets;
+    the totals here are built from the differences between reports, so
+    they carry on across both.
+    """
+
+    def __init__(self, window=REPORT_WINDOW, clock=time.perf_counter):
+        self.clock = clock
+        self.reports = deque(maxlen=window)   # (received_at, fields dict, dac tuple)
+        self.received = 0
+        self.totals = dict.fromkeys((name for name, _ in COUNTERS), 0)
+        self.resets = 0
+        self.loop_max_us = 0
+        self.last = None
+        self.last_at = None
+        self.rx_fps = 0.0
+        self.lock = threading.Lock()
+
+    def on_telemetry(self, payload, received_at=None):
+        """Reader hook for MSG_TELEMETRY frames."""
+        if received_at is None:
+            received_at = self.clock()
+        values = TELEMETRY_BODY.unpack(payload)
+        report = dict(zip(FIELDS, values))
+        dac = values[len(FIELDS):]
+        with self.lock:
+            last = self.last
+            if last is None or report["frames"] < last["frames"]:
+                # First report, or the sketch restarted: its counters began at 0
+                if last is not None:
+                    self.resets += 1
+                deltas = {name: report[name] for name, _ in COUNTERS}
+            else:
+                deltas = {name: (report[name] - last[name]) & mask for name, mask in COUNTERS}
+            for name, delta in deltas.items():
+                self.totals[name] += delta
+            if last is not None and received_at > self.last_at:
+                self.rx_fps = deltas["frames"] / (received_at - self.last_at)
+            self.loop_max_us = max(self.loop_max_us, report["loop_max_us"])
+            self.last = report
+            self.last_at = received_at
+            self.received += 1
+            self.reports.append((received_at, report, dac))
+
+    def dac(self):
+        """The last reported DAC codes (mcp A-D, mcp2 A-D), or None."""
+        with self.lock:
+            return self.reports[-1][2] if self.reports else None
+
+    def status(self, now):
+        """Short status line field: what the sketch says it is doing."""
+        last = self.last
+        if last is None or now - self.last_at > STALE_AFTER:
+            return "fw -"
+        return (
+            f"fw {self.rx_fps:.0f} f/s loop {last['loop_us']}/{last['loop_max_us']} us "
+            f"crc {self.totals['crc_errors']} bad {self.totals['bad_lines']}"
+            f"{' FAILSAFE' if last['failsafe'] else ''}"
+        )
+
+    def summary(self):
+        if not self.received:
+            return "no sketch telemetry received (older sketch, or TELEMETRY_INTERVAL_MS is 0)"
+        t = self.totals
+        restarts = f", {self.resets} sketch restarts" if self.resets else ""
+        return (
+            f"sketch: {t['frames']} frames applied, {t['crc_errors']} CRC errors, "
+            f"{t['bad_lines']} bad lines, {t['failsafes']} failsafe trips, "
+            f"loop max {self.loop_max_us} us ({self.received} reports{restarts})"
+        )
+
+    def prometheus_text(self, prefix="rcsim_sketch"):
+        last = self.last or dict.fromkeys(FIELDS, 0)
+        lines = []
+        for name, help_text in (
+            ("frames", "Frames the sketch applied to its outputs."),
+            ("crc_errors", "Binary frames the sketch dropped on a CRC mismatch."),
+            ("bad_lines", "Text lines the sketch dropped as malformed or too long."),
+            ("failsafes", "Times the sketch's failsafe watchdog tripped."),
+        ):
+            lines += [
+                f"# HELP {prefix}_{name}_total {help_text}",
+                f"# TYPE {prefix}_{name}_total counter",
+                f"{prefix}_{name}_total {self.totals[name]}",
+            ]
+        lines += [
+            f"# TYPE {prefix}_loop_seconds gauge",
+            f"{prefix}_loop_seconds {last['loop_us'] / 1e6:.6f}",
+            f"# TYPE {prefix}_loop_max_seconds gauge",
+            f"{prefix}_loop_max_seconds {self.loop_max_us / 1e6:.6f}",
+            f"# TYPE {prefix}_failsafe gauge",
+            f"{prefix}_failsafe {last['failsafe']}",
+            f"# TYPE {prefix}_dac_code gauge",
+        ]
+        for i, code in enumerate(self.dac() or ()):
+            lines.append(f'{prefix}_dac_code{{chip="{i // 4}",channel="{"ABCD"[i % 4]}"}} {code}')
+        lines += [
+            f"# TYPE {prefix}_reports_total counter",
+            f"{prefix}_reports_total {self.received}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_csv(self, path):
+        with self.lock:
+            reports = list(self.reports)
+        with open(path, "w") as f:
+            f.write("received_s," + ",".join(FIELDS) + "," + ",".join(f"dac{i}" for i in range(8)) + "\n")
+            for received_at, report, dac in reports:
+                f.write(f"{received_at:.6f}," + ",".join(str(report[k]) for k in FIELDS)
+                        + "," + ",".join(map(str, dac)) + "\n")
+
+    def export(self, path):
+        """Write the reports as CSV, or Prometheus text for a .prom path."""
+        if path.endswith(".prom"):
+            with open(path, "w") as f:
+                f.write(self.prometheus_text())
+        else:
+            self.write_csv(path)
@@ -0,0 +1,56 @@
+import pytest
+
+from absengine import AbsEngine, duty_table, run_benchmark, step_curve
+from curves import PEDAL_TRAVEL
+
+def test_duty_table_interpolates_and_holds():
+    table = duty_table(((1000, 1.0), (2000, 0.5)))
+    assert len(table) == PEDAL_TRAVEL + 1
+    assert table[0] == table[1000] == 1.0
+    assert table[1500] == pytest.approx(0.75)
+    assert table[2000] == 0.5
+
+def test_step_curve_engages_at_threshold():
+    table = duty_table(step_curve(1400, 0.75))
+    assert table[1399] == 1.0 and table[1400] == 0.75 and table[2000] == 0.75
+
+def test_phase_starts_applied_and_releases_at_duty():
+    engine = AbsEngine(20, step_curve(1400, 0.75))
+    assert engine.update(10.0, 1000)               # Below threshold: no ABS
+    assert not engine.active and engine.next_edge() is None
+    assert engine.update(10.01, 2000)              # Engages with the brake applied
+    assert engine.active and engine.engagements == 1
+    assert engine.next_edge() == pytest.approx(10.01 + 0.75 / 20)
+    assert engine.update(10.03, 2000)
+    assert not engine.update(10.01 + 0.0375, 2000)  # Exactly at the edge: released
+    assert engine.next_edge() == pytest.approx(10.06)
+    assert engine.update(10.06, 2000)              # Next pulse
+    assert engine.edges == 2
+
+def test_phase_wraps_over_missed_pulses():
+    engine = AbsEngine(20, ((0, 0.5),))
+    engine.update(0.0, 2000)
+    # 3.25 pulses later: a quarter into a pulse, still applied
+    assert engine.update(0.1625, 2000)
+    assert engine.phase == pytest.approx(0.25)
+
+def test_releasing_brake_resets_phase():
+    engine = AbsEngine(20, step_curve(1400, 0.5))
+    engine.update(0.0, 2000)
+    assert not engine.update(0.03, 2000)
+    assert engine.update(0.04, 0) and not engine.active
+    engine.update(0.05, 2000)
+    assert engine.phase == 0.0 and engine.engagements == 2
+
+def test_disabled_engine_always_applies():
+    engine = AbsEngine(20, ((0, 0.5),), enabled=False)
+    assert all(engine.update(n * 0.005, 2000) for n in range(100))
+    assert engine.edges == 0
+
+def test_edge_frames_land_on_the_pulse_grid():
+    # Simulated clock: extra frames at the edges leave no timing error
+    errors = run_benchmark("edges", 100, 2.0, 20, 0.75)
+    assert len(errors) >= 70
+    assert max(abs(e) for e in errors) < 1e-6
+    ticks = run_benchmark("ticks", 100, 2.0, 20, 0.75)
+    assert max(abs(e) for e in ticks) > 1e-3
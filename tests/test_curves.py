@@ -0,0 +1,66 @@
+import pytest
+
+from curves import PEDAL_TRAVEL, Curve, ResponseCurves, mix_pedals, validate_curves
+
+def test_default_curves_are_identity():
+    curves = ResponseCurves()
+    for _, curve in curves.items():
+        assert curve.identity
+    assert curves.steering.map(-437) == -437
+    assert curves.pedals(1000, -1000) == (0, PEDAL_TRAVEL)
+
+def test_deadzone_and_saturation():
+    curve = Curve(-1000, 1000, deadzone=0.1, saturation=0.9)
+    assert curve.map(100) == 0 and curve.map(-100) == 0
+    assert curve.map(500) == 500 and curve.map(-500) == -500
+    assert curve.map(900) == 1000 and curve.map(-950) == -1000
+    # Clamped outside the range
+    assert curve.map(5000) == 1000 and curve.map(-5000) == -1000
+
+def test_pedal_deadzone_measured_from_rest():
+    curve = Curve(0, PEDAL_TRAVEL, deadzone=0.05)
+    assert curve.map(100) == 0
+    assert curve.map(PEDAL_TRAVEL) == PEDAL_TRAVEL
+    assert 0 < curve.map(200) < 200
+
+def test_expo_softens_the_centre_only():
+    curve = Curve(-1000, 1000, expo=0.5)
+    assert curve.map(0) == 0 and curve.map(1000) == 1000
+    assert curve.map(200) == round((0.5 * 0.2 + 0.5 * 0.2 ** 3) * 1000)
+    assert curve.map(-200) == -curve.map(200)
+
+def test_spline_passes_through_points_monotonically():
+    points = [[0, 0], [0.5, 0.2], [0.8, 0.9], [1, 1]]
+    curve = Curve(0, PEDAL_TRAVEL, points=points)
+    for x, y in points:
+        assert curve.map(round(x * PEDAL_TRAVEL)) == round(y * PEDAL_TRAVEL)
+    assert all(b >= a for a, b in zip(curve.table, curve.table[1:]))
+
+def test_batch_path_matches_scalar_path():
+    np = pytest.importorskip("numpy")
+    curves = ResponseCurves({
+        "steering": {"deadzone": 0.02, "expo": 0.3},
+        "throttle": {"deadzone": 0.03, "saturation": 0.97},
+        "brake": {"points": [[0, 0], [0.5, 0.3], [1, 1]]},
+    })
+    values = np.arange(-2500, 2500, 7)
+    for _, curve in curves.items():
+        assert curve.apply_array(values).tolist() == [curve.map(int(v)) for v in values]
+
+def test_mix_pedals_larger_pedal_wins():
+    assert mix_pedals(2000, 0) == 1000
+    assert mix_pedals(500, 1500) == -750
+    assert mix_pedals(0, 0) == 0
+
+@pytest.mark.parametrize("curves, message", [
+    ({"yaw": {}}, "unknown"),
+    ({"steering": {"gain": 2}}, "unknown settings"),
+    ({"steering": {"deadzone": 0.5, "saturation": 0.4}}, "deadzone < saturation"),
+    ({"throttle": {"expo": 1.5}}, "expo"),
+    ({"brake": {"points": [[0, 0]]}}, "two"),
+    ({"brake": {"points": [[0, 0], [0.5, 0.2], [0.4, 1]]}}, "increasing"),
+    ({"brake": {"points": [[0, 0], [1, 1.2]]}}, "within"),
+])
+def test_validate_curves_rejects(curves, message):
+    with pytest.raises(ValueError, match=message):
+        validate_curves(curves)
@@ -0,0 +1,46 @@
+from protocol import BinaryEncoder, TextEncoder
+from sketchmodel import (
+    FAST_WRITE_BYTES, I2C_ADDRESS_BYTES, SINGLE_WRITE_BYTES, DacBus, SketchEmulator,
+)
+
+FAST_WRITE = I2C_ADDRESS_BYTES + FAST_WRITE_BYTES        # One chip, all four channels
+SINGLE_WRITE = I2C_ADDRESS_BYTES + SINGLE_WRITE_BYTES    # One channel
+
+def test_batched_writes_only_changed_chips():
+    bus = DacBus()
+    assert bus.write([1, 2, 3, 4, 5, 6, 7, 8]) == 2 * FAST_WRITE
+    assert bus.write([1, 2, 3, 4, 5, 6, 7, 8]) == 0
+    assert bus.write([1, 2, 3, 9, 5, 6, 7, 8]) == FAST_WRITE
+    assert bus.write([1, 2, 3, 9, 5, 6, 7, 0]) == FAST_WRITE
+    assert bus.transactions == 4 and bus.bytes == 4 * FAST_WRITE
+
+def test_per_channel_writes_every_channel():
+    bus = DacBus(batched=False)
+    assert bus.write([1, 2, 3, 4, 5, 6, 7, 8]) == 8 * SINGLE_WRITE
+    assert bus.write([1, 2, 3, 4, 5, 6, 7, 8]) == 8 * SINGLE_WRITE
+
+def test_sketch_frame_i2c_bytes():
+    for encoder in (TextEncoder(), BinaryEncoder()):
+        sketch = SketchEmulator(echo=False)
+        channels = [0] * 12
+        sketch.feed(encoder.encode(channels), 0.0)        # Leaves failsafe: z moves, mcp only
+        assert sketch.dac_bus.frame_bytes == FAST_WRITE
+
+        channels[0] = 500                                 # x: mcp A
+        sketch.feed(encoder.encode(channels), 0.01)
+        assert sketch.dac_bus.frame_bytes == FAST_WRITE
+
+        channels[6] = -300                                # left_pot: mcp2
+        channels[1] = 200                                 # y: mcp
+        sketch.feed(encoder.encode(channels), 0.02)
+        assert sketch.dac_bus.frame_bytes == 2 * FAST_WRITE
+
+        sketch.feed(encoder.encode(channels), 0.03)       # Unchanged (a keyframe)
+        assert sketch.dac_bus.frame_bytes == 0
+
+def test_sketch_per_channel_i2c_bytes():
+    sketch = SketchEmulator(echo=False, batched_dac=False)
+    sketch.feed(BinaryEncoder().encode([0] * 12), 0.0)
+    assert sketch.dac_bus.frame_bytes == 8 * SINGLE_WRITE
+    sketch.feed(BinaryEncoder().encode([0] * 12), 0.01)
+    assert sketch.dac_bus.frame_bytes == 8 * SINGLE_WRITE
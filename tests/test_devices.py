@@ -0,0 +1,37 @@
+from devices import JoystickFinder
+
+class FakeJoystick:
+    def __init__(self, name, guid):
+        self.name = name
+        self.guid = guid
+
+    def get_name(self):
+        return self.name
+
+    def get_guid(self):
+        return self.guid
+
+def make_finder(*sticks):
+    finder = JoystickFinder.__new__(JoystickFinder)
+    finder.count = len(sticks)
+    finder.opened = dict(enumerate(sticks))
+    return finder
+
+def test_match_skips_taken_joysticks():
+    finder = make_finder(FakeJoystick("Logitech G29", "aa"), FakeJoystick("Logitech Pedals", "bb"))
+    assert finder.match("*logitech*") == 0
+    assert finder.match("*logitech*", {0}) == 1
+    assert finder.match("guid=aa", {0}) is None
+
+def test_match_by_index_respects_taken():
+    finder = make_finder(FakeJoystick("Wheel", "aa"), FakeJoystick("Pedals", "bb"))
+    assert finder.match("#1") == 1
+    assert finder.match("#1", {1}) is None
+    assert finder.match("#2") is None
+
+def test_find_prefers_old_index_when_free():
+    finder = make_finder(FakeJoystick("Pad", "aa"), FakeJoystick("Pad", "aa"))
+    identity = {"name": "Pad", "guid": "aa", "index": 1}
+    assert finder.find(identity) == 1
+    assert finder.find(identity, {1}) == 0
+    assert finder.find(identity, {0, 1}) is None
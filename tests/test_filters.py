@@ -0,0 +1,35 @@
+import pytest
+
+from filters import Ema, FilterChain, Median, OneEuro, SlewLimit
+
+def test_median_knocks_out_spikes():
+    median = Median(3)
+    assert [median.step(x, 0.01) for x in (10, 10, 900, 10, 10)][2:] == [10, 10, 10]
+
+def test_median_reset_to_value_holds_it():
+    median = Median(5)
+    for x in (100, 200, 300, 400, 500):
+        median.step(x, 0.01)
+    median.reset(0)
+    assert median.step(1000, 0.01) == 0
+    assert median.step(1000, 0.01) == 0
+    assert median.step(1000, 0.01) == 1000
+
+def test_median_reset_without_value_starts_empty():
+    median = Median(3)
+    for x in (100, 200, 300):
+        median.step(x, 0.01)
+    median.reset()
+    assert median.step(-50, 0.01) == -50
+
+@pytest.mark.parametrize("stage", [Ema(8.0), OneEuro(1.0, 0.01), SlewLimit(1000, 1000), Median(5)])
+def test_reset_value_is_the_next_output_for_a_steady_input(stage):
+    stage.reset(250)
+    assert stage.step(250, 0.01) == pytest.approx(250)
+
+def test_chain_reset_reaches_every_stage():
+    chain = FilterChain([Median(3), Ema(8.0)])
+    for x in (500, 600, 700):
+        chain.step(x, 0.01)
+    chain.reset(0)
+    assert chain.step(900, 0.01) == pytest.approx(0)
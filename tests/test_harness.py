@@ -0,0 +1,18 @@
+import pytest
+
+from harness import run_mode
+from modes import MODES
+
+@pytest.mark.parametrize("protocol", ["text", "binary"])
+@pytest.mark.parametrize("mode", MODES)
+def test_sketch_decodes_every_frame(mode, protocol):
+    result = run_mode(mode, ticks=2000, protocol=protocol)
+    assert result["frames"] == 2000
+    assert result["mismatches"] == 0
+    assert result["crc_errors"] == 0
+
+@pytest.mark.parametrize("mode", MODES)
+def test_changes_only_keeps_sketch_in_step(mode):
+    result = run_mode(mode, ticks=2000, protocol="binary", changes_only=True)
+    assert 0 < result["frames"] <= 2000
+    assert result["mismatches"] == 0
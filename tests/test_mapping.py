@@ -0,0 +1,70 @@
+import pytest
+
+from harness import VirtualJoystick
+from mapping import compile_profile, validate_profile
+
+PROFILE = {
+    "name": "test",
+    "devices": [{"role": "wheel"}, {"role": "pedals", "optional": True}],
+    "channels": [
+        {"name": "steer", "type": "axis", "device": "wheel", "index": 0},
+        {"name": "gas", "type": "axis", "device": "pedals", "index": 1, "scale": 500, "invert": True},
+        {"name": "horn", "type": "button", "device": "wheel", "index": 2},
+        {"name": "lights", "type": "button", "device": "wheel", "index": 3, "invert": True},
+        {"name": "mode", "type": "switch", "device": "wheel", "positions": [[4, -1], [5, 1]], "default": 0},
+        {"name": "trim", "type": "const", "value": 7},
+        {"name": "clutch", "type": "axis", "device": "wheel", "index": 9, "default": -1000},
+    ],
+}
+NAMES = ("steer", "gas", "horn", "lights", "mode", "trim", "clutch")
+
+def test_read_follows_names_order_and_options():
+    wheel = VirtualJoystick("wheel", 2, 6)
+    pedals = VirtualJoystick("pedals", 2, 0)
+    plan = compile_profile(PROFILE, {"wheel": wheel, "pedals": pedals}, NAMES)
+    assert plan.read() == [0, 0, 0, 1, 0, 7, -1000]
+    wheel.axes[0] = 0.5
+    pedals.axes[1] = 0.25
+    wheel.buttons[2] = wheel.buttons[3] = 1
+    wheel.buttons[5] = 1
+    assert plan.read() == [500, -125, 1, 0, 1, 7, -1000]
+    # The first pressed position wins
+    wheel.buttons[4] = 1
+    assert plan.read()[4] == -1
+
+def test_names_pick_and_order_the_slots():
+    wheel = VirtualJoystick("wheel", 1, 0)
+    wheel.axes[0] = -1.0
+    plan = compile_profile(PROFILE, {"wheel": wheel, "pedals": None}, ("trim", "steer"))
+    assert plan.read() == [7, -1000]
+
+def test_missing_device_reads_defaults():
+    wheel = VirtualJoystick("wheel", 1, 6)
+    plan = compile_profile(PROFILE, {"wheel": wheel, "pedals": None}, NAMES)
+    assert not any(op[0] == 1 for op in plan.axis_ops)
+    assert plan.read()[1] == 0
+
+def test_short_device_drops_ops_up_front():
+    wheel = VirtualJoystick("wheel", 1, 5)       # No button 5, no axis 9
+    plan = compile_profile(PROFILE, {"wheel": wheel, "pedals": None}, NAMES)
+    assert [op[0] for op in plan.axis_ops] == [0]
+    assert plan.switch_ops[0][2] == ((4, -1),)
+    assert plan.read()[6] == -1000
+
+def test_missing_channel_is_an_error():
+    with pytest.raises(ValueError, match="brake"):
+        compile_profile(PROFILE, {"wheel": None}, ("steer", "brake"))
+
+@pytest.mark.parametrize("channel, message", [
+    ({"type": "axis", "device": "wheel", "index": 0}, "without a name"),
+    ({"name": "steer", "type": "axis", "device": "wheel", "index": 1}, "duplicate"),
+    ({"name": "x", "type": "knob", "device": "wheel"}, "unknown type"),
+    ({"name": "x", "type": "axis", "device": "hat", "index": 0}, "unknown device"),
+    ({"name": "x", "type": "axis", "device": "wheel"}, "integer index"),
+    ({"name": "x", "type": "switch", "device": "wheel"}, "positions"),
+    ({"name": "x", "type": "const"}, "value"),
+])
+def test_validate_profile_rejects(channel, message):
+    profile = dict(PROFILE, channels=PROFILE["channels"] + [channel])
+    with pytest.raises(ValueError, match=message):
+        validate_profile(profile)
@@ -0,0 +1,27 @@
+import pytest
+
+from curves import ResponseCurves
+from mapping import load_profile, validate_profile
+from modes import MODES, load_mode, make_processor
+
+def with_curves(mode):
+    module = load_mode(mode)
+    profile = dict(load_profile(module.PROFILE), curves={"steering": {"expo": 0.3}})
+    validate_profile(profile)
+    return module, profile
+
+@pytest.mark.parametrize("mode", ["drive", "abs", "paddleshift"])
+def test_pedal_modes_take_curves(mode):
+    module, profile = with_curves(mode)
+    processor = make_processor(module, profile)
+    assert processor.curves.steering.map(500) != ResponseCurves().steering.map(500)
+
+def test_fly_rejects_curves():
+    module, profile = with_curves("fly")
+    with pytest.raises(ValueError, match="response curves"):
+        make_processor(module, profile)
+
+@pytest.mark.parametrize("mode", MODES)
+def test_default_profiles_build(mode):
+    module = load_mode(mode)
+    assert make_processor(module, load_profile(module.PROFILE)) is not None
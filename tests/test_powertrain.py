@@ -0,0 +1,23 @@
+from curves import mix_pedals
+from powertrain import Powertrain
+
+def make_powertrain():
+    return Powertrain((1.0, 0.8), (0.1, 0.2), launch_control=True, launch_time=0.5)
+
+def test_launch_ramps_on_launch_table():
+    pt = make_powertrain()
+    assert pt.update(0.0, mix_pedals(2000, 1000), 2000, 1000, False, False) == 0    # Armed
+    pt.update(0.01, mix_pedals(2000, 0), 2000, 0, False, False)                      # Launch
+    assert pt.table is pt.launch_table
+    # Halfway through the 0.5 s launch ramp
+    assert 400 <= pt.update(0.26, 1000, 2000, 0, False, False) <= 600
+
+def test_ramp_after_braking_uses_gear_table():
+    pt = make_powertrain()
+    pt.update(0.0, mix_pedals(2000, 1000), 2000, 1000, False, False)
+    pt.update(0.01, mix_pedals(2000, 0), 2000, 0, False, False)
+    # Brake mid-launch, then back on the throttle: 1st gear's 0.1 s ramp, not the launch one
+    assert pt.update(0.05, -500, 0, 1000, False, False) == -500
+    pt.update(0.1, 1000, 2000, 0, False, False)
+    assert pt.table is pt.tables[1]
+    assert pt.update(0.21, 1000, 2000, 0, False, False) == 1000
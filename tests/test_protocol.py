@@ -0,0 +1,85 @@
+import pytest
+
+from protocol import (
+    ANALOG_MAX, ANALOG_MIN, FRAME_SIZE, FRAME_SIZE_STAMPED, BinaryEncoder, TextEncoder,
+    decode_frame, encode_failsafe_frame, to_micros,
+)
+from sketchmodel import SketchEmulator
+
+FRAMES = [
+    (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    (-1000, 1000, -1, 1, 1, 0, 999, -999, -1, 0, 1, 0),
+    (1000, -1000, 500, -500, 0, 1, -1000, 1000, 1, 1, -1, -1),
+    (ANALOG_MIN, ANALOG_MAX, 7, -7, 1, 1, 3, -3, 0, -1, 0, 1),
+]
+
+@pytest.mark.parametrize("channels", FRAMES)
+def test_round_trip(channels):
+    seq, decoded, stamp = decode_frame(bytes(BinaryEncoder().encode(channels)))
+    assert decoded == channels
+    assert stamp is None
+
+def test_round_trip_stamped():
+    encoder = BinaryEncoder(stamped=True)
+    frame = bytes(encoder.encode(FRAMES[1], stamp=12.345678))
+    assert len(frame) == FRAME_SIZE_STAMPED
+    assert decode_frame(frame) == (0, FRAMES[1], to_micros(12.345678))
+    # Without a stamp the same encoder sends a plain frame
+    assert len(encoder.encode(FRAMES[1])) == FRAME_SIZE
+
+def test_sequence_wraps():
+    encoder = BinaryEncoder()
+    seqs = [decode_frame(bytes(encoder.encode(FRAMES[0])))[0] for _ in range(258)]
+    assert seqs[:2] == [0, 1] and seqs[255:] == [255, 0, 1]
+
+def test_out_of_range_values_clamp():
+    channels = (5000, -5000, 1024, -1025, 0, 0, 12.7, -12.7, 0, 0, 0, 0)
+    _, decoded, _ = decode_frame(bytes(BinaryEncoder().encode(channels)))
+    assert decoded[:4] == (ANALOG_MAX, ANALOG_MIN, ANALOG_MAX, ANALOG_MIN)
+    assert decoded[6:8] == (12, -12)
+
+def test_missing_switches_hold():
+    # Paddle-shift frames have 9 channels; switch code 3 ("hold") decodes as 2
+    _, decoded, _ = decode_frame(bytes(BinaryEncoder().encode((10, 20, 0, 0, 1, 0, 30, 40, 3))))
+    assert decoded == (10, 20, 0, 0, 1, 0, 30, 40, 2, 2, 2, 2)
+
+@pytest.mark.parametrize("stamped", [False, True])
+def test_every_single_bit_error_is_rejected(stamped):
+    frame = bytes(BinaryEncoder(stamped).encode(FRAMES[2], stamp=1.0 if stamped else None))
+    for i in range(1, len(frame)):
+        for bit in range(8):
+            corrupt = bytearray(frame)
+            corrupt[i] ^= 1 << bit
+            with pytest.raises(ValueError):
+                decode_frame(bytes(corrupt))
+
+def test_bad_sync_and_length_are_rejected():
+    frame = bytes(BinaryEncoder().encode(FRAMES[1]))
+    with pytest.raises(ValueError, match="sync"):
+        decode_frame(b"\x00" + frame[1:])
+    with pytest.raises(ValueError, match="bytes"):
+        decode_frame(frame[:-1])
+
+def test_sketch_decodes_like_the_reference():
+    sketch = SketchEmulator(echo=False)
+    encoder = BinaryEncoder()
+    for channels in FRAMES:
+        sketch.feed(encoder.encode(channels), 0.0)
+        assert sketch.inputs == decode_frame(bytes(BinaryEncoder().encode(channels)))[1]
+    assert sketch.frames == len(FRAMES) and sketch.crc_errors == 0
+
+def test_sketch_drops_corrupt_frame_and_resyncs():
+    sketch = SketchEmulator(echo=False)
+    encoder = BinaryEncoder()
+    bad = bytearray(encoder.encode(FRAMES[1]))
+    bad[5] ^= 0x10
+    sketch.feed(bytes(bad) + bytes(encoder.encode(FRAMES[2])), 0.0)
+    assert sketch.crc_errors == 1
+    assert sketch.frames == 1 and sketch.inputs == FRAMES[2]
+
+def test_failsafe_values_frame():
+    sketch = SketchEmulator(echo=False)
+    values = (0, 0, -1000, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+    sketch.feed(encode_failsafe_frame(values[:9]) + TextEncoder().encode(FRAMES[1]), 0.0)
+    assert sketch.failsafe_values == values
+    assert not sketch.binary_mode and sketch.inputs == FRAMES[1]
@@ -0,0 +1,79 @@
+import pytest
+
+from ratecontrol import (
+    BACKOFF, BITS_PER_BYTE, CONTROL_INTERVAL, HOLD, LINK_UTILIZATION, MIN_RATE_HZ, RECOVERY, SEND,
+    SEND_FAST, RateController, simulate,
+)
+
+BAUD = 57600
+FRAME = 36
+CEILING = BAUD / BITS_PER_BYTE / FRAME * LINK_UTILIZATION
+
+def start(rate):
+    """Send the first frame and run the first update, which sets the ceiling."""
+    assert rate.check(0.0) == SEND
+    rate.sent(0.0, FRAME)
+    rate.check(0.0)
+    assert rate.ceiling == pytest.approx(CEILING)
+    return rate
+
+def test_first_update_starts_at_the_ceiling():
+    rate = start(RateController(BAUD))
+    assert rate.rate == pytest.approx(CEILING)
+    assert rate.interval == pytest.approx(1 / CEILING)
+    assert rate.check(0.5 / CEILING) == HOLD
+    assert rate.check(1.0 / CEILING) == SEND
+
+def test_backlog_cuts_rate_multiplicatively():
+    backlog = [0]
+    rate = start(RateController(BAUD, out_waiting=lambda: backlog[0]))
+    # Well over QUEUE_TARGET of bytes waiting behind the frame going out
+    backlog[0] = FRAME + 100
+    rate.update(CONTROL_INTERVAL)
+    assert rate.rate == pytest.approx(CEILING * BACKOFF)
+    rate.update(2 * CONTROL_INTERVAL)
+    assert rate.rate == pytest.approx(CEILING * BACKOFF * BACKOFF)
+    assert rate.backoffs == 2
+    # A frame still being written is not a backlog
+    backlog[0] = FRAME
+    rate.update(3 * CONTROL_INTERVAL)
+    assert rate.rate == pytest.approx(CEILING * BACKOFF * BACKOFF + CEILING * RECOVERY)
+
+def test_recovery_is_additive_and_capped():
+    backlog = [FRAME + 100]
+    rate = start(RateController(BAUD, out_waiting=lambda: backlog[0]))
+    backlog[0] = 0
+    steps = []
+    for n in range(1, 30):
+        rate.update(n * CONTROL_INTERVAL)
+        steps.append(rate.rate)
+    assert steps[1] - steps[0] == pytest.approx(CEILING * RECOVERY)
+    assert steps[-1] == pytest.approx(CEILING)
+
+def test_writer_drops_back_off_and_floor_holds():
+    dropped = [0]
+    rate = start(RateController(BAUD, dropped=lambda: dropped[0]))
+    for n in range(1, 30):
+        dropped[0] += 1
+        rate.update(n * CONTROL_INTERVAL)
+    assert rate.rate == MIN_RATE_HZ
+    assert rate.min_rate == MIN_RATE_HZ
+
+def test_slow_changes_wait_while_constrained():
+    rate = start(RateController(BAUD, slow_share=0.25))
+    interval = rate.interval
+    rate.check(0.1 * interval)                   # Held: the link is constrained next update
+    rate.update(CONTROL_INTERVAL)
+    assert rate.constrained
+    rate.sent(CONTROL_INTERVAL, FRAME)
+    interval = rate.interval
+    assert rate.check(CONTROL_INTERVAL + 0.5 * interval) == HOLD
+    assert rate.check(CONTROL_INTERVAL + 2 * interval) == SEND_FAST
+    assert rate.check(CONTROL_INTERVAL + 4.1 * interval) == SEND
+
+def test_rate_limit_holds_the_os_queue_and_favours_fast_channels():
+    fixed_line, _, _, _ = simulate("text", BAUD, 250, 5, adaptive=False)
+    line, sender, fast, slow = simulate("text", BAUD, 250, 5, adaptive=True)
+    assert max(line.delays) < max(fixed_line.delays) / 10
+    assert sender.held > 0
+    assert fast < slow
@@ -0,0 +1,70 @@
+import pytest
+
+from scheduler import MAX_CATCHUP, POLICY_CATCHUP, LoopScheduler
+
+class FakeClock:
+    """Clock that sleep() advances; every read moves it on 1 us, so spins end."""
+
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        self.t += 1e-6
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += seconds
+
+def make_scheduler(policy="skip"):
+    clock = FakeClock()
+    return clock, LoopScheduler(100, policy, clock=clock, sleep=clock.sleep)
+
+def test_ticks_on_grid_without_drift():
+    clock, sched = make_scheduler()
+    start = sched.wait()
+    for n in range(1, 101):
+        clock.t += 0.004                        # Work done per tick
+        assert sched.wait() == pytest.approx(start + n * 0.01, abs=1e-5)
+    assert sched.late_ticks == 0 and sched.missed == 0
+    assert sched.ticks == 101
+
+def test_skip_drops_missed_periods():
+    clock, sched = make_scheduler()
+    start = sched.wait()
+    clock.t += 0.035                            # Overran 3.5 periods past start
+    sched.wait()
+    assert sched.late_ticks == 1
+    assert sched.missed == 2
+    assert sched.max_late == pytest.approx(0.025, abs=1e-5)
+    # Realigned to the grid: the next tick is the 4th period
+    assert sched.wait() == pytest.approx(start + 0.04, abs=1e-5)
+
+def test_catchup_runs_missed_ticks_back_to_back():
+    clock, sched = make_scheduler(POLICY_CATCHUP)
+    start = sched.wait()
+    clock.t += 0.035
+    times = [sched.wait() for _ in range(4)]
+    assert sched.missed == 0
+    # Three ticks run at once, then the loop is back on the grid
+    assert times[2] - times[0] < 1e-4
+    assert times[3] == pytest.approx(start + 0.04, abs=1e-5)
+
+def test_catchup_falls_back_to_skip_when_far_behind():
+    clock, sched = make_scheduler(POLICY_CATCHUP)
+    sched.wait()
+    clock.t += (MAX_CATCHUP + 1.5) * 0.01
+    sched.wait()
+    assert sched.missed == MAX_CATCHUP
+
+def test_sleep_until_leaves_deadline_alone():
+    clock, sched = make_scheduler()
+    start = sched.wait()
+    assert sched.sleep_until(start + 0.005) >= start + 0.005
+    assert sched.ticks == 1
+    assert sched.wait() == pytest.approx(start + 0.01, abs=1e-5)
+
+def test_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        LoopScheduler(0)
+    with pytest.raises(ValueError):
+        LoopScheduler(100, "bogus")
@@ -0,0 +1,128 @@
+import threading
+import time
+
+from protocol import TextEncoder
+from serial_link import FrameSender, SerialWriter
+
+def make_sender(**kwargs):
+    frames = []
+    return frames, FrameSender(frames.append, TextEncoder(), keyframe_interval=0.1, **kwargs)
+
+def test_unchanged_frames_are_suppressed_until_a_keyframe():
+    frames, sender = make_sender()
+    channels = (1, 2, 3)
+    assert sender.send(channels, 0.0)
+    assert not sender.send(channels, 0.05)
+    assert not sender.send(channels, 0.09)
+    assert sender.send(channels, 0.1)           # Keyframe
+    assert not sender.send(channels, 0.15)
+    assert len(frames) == 2
+    assert (sender.sent, sender.suppressed, sender.keyframes) == (2, 3, 1)
+    assert sender.bytes_sent == sum(len(f) for f in frames)
+
+def test_change_resets_keyframe_timer():
+    frames, sender = make_sender()
+    sender.send((1, 2, 3), 0.0)
+    assert sender.send((1, 2, 4), 0.08)
+    assert not sender.send((1, 2, 4), 0.15)
+    assert sender.send((1, 2, 4), 0.2)
+    assert sender.keyframes == 1
+
+def test_deadband_ignores_small_moves():
+    frames, sender = make_sender(deadband=2)
+    sender.send((100, 0), 0.0)
+    assert not sender.send((102, -2), 0.01)
+    assert sender.send((103, 0), 0.02)
+    # Moves are measured against the last frame sent, not the last one seen
+    assert not sender.send((105, 0), 0.03)
+    assert sender.send((106, 0), 0.04)
+
+def test_per_channel_deadband():
+    frames, sender = make_sender(deadband=(0, 10))
+    sender.send((0, 0), 0.0)
+    assert not sender.send((0, 10), 0.01)
+    assert sender.send((1, 10), 0.02)
+    assert sender.changed((1, 21))
+    assert not sender.changed((1, 21), indices=[0])
+
+def test_changes_only_off_sends_every_frame():
+    frames, sender = make_sender(changes_only=False)
+    for n in range(5):
+        assert sender.send((1, 2, 3), n * 0.01)
+    assert len(frames) == 5 and sender.suppressed == 0
+
+def test_different_length_counts_as_changed():
+    frames, sender = make_sender()
+    sender.send((1, 2, 3), 0.0)
+    assert sender.send((1, 2, 3, 4), 0.01)
+
+class BlockingPort:
+    """Port whose write() waits for release(), so frames pile up in the mailbox."""
+
+    def __init__(self):
+        self.written = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def write(self, data):
+        self.started.set()
+        self.gate.wait(2.0)
+        self.written.append(data)
+
+    def release(self):
+        self.gate.set()
+
+class BrokenPort:
+    def write(self, data):
+        raise OSError("unplugged")
+
+def wait_for(predicate):
+    deadline = time.monotonic() + 2.0
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+def test_writer_keeps_only_the_latest_frame():
+    port = BlockingPort()
+    writer = SerialWriter(port).start()
+    writer.put(b"A")
+    assert port.started.wait(2.0)                # A is being written
+    writer.put(b"B")
+    writer.put(b"C")                             # Replaces B
+    port.release()
+    wait_for(lambda: writer.written == 2)
+    writer.stop()
+    assert port.written == [b"A", b"C"]
+    assert writer.dropped == 1
+    assert writer.bytes_written == 2
+
+def test_writer_copies_reused_buffers():
+    port = BlockingPort()
+    port.release()
+    writer = SerialWriter(port).start()
+    buf = bytearray(b"one")
+    writer.put(buf)
+    buf[:] = b"two"
+    wait_for(lambda: writer.written == 1)
+    writer.stop()
+    assert port.written == [b"one"]
+
+def test_control_frame_goes_first_and_is_not_counted():
+    port = BlockingPort()
+    writer = SerialWriter(port).start()
+    writer.put(b"A")
+    assert port.started.wait(2.0)
+    writer.put(b"B")
+    writer.put_control(b"F")
+    port.release()
+    wait_for(lambda: writer.written == 2)
+    writer.stop()
+    assert port.written == [b"A", b"F", b"B"]
+    assert writer.dropped == 0
+
+def test_failed_writes_count_as_errors():
+    writer = SerialWriter(BrokenPort()).start()
+    writer.put(b"A")
+    wait_for(lambda: writer.errors == 1)
+    writer.stop()
+    assert writer.written == 0 and writer.failed_at is not None
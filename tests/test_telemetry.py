@@ -0,0 +1,57 @@
+import pytest
+
+from protocol import (
+    MSG_ECHO, MSG_TELEMETRY, TELEMETRY_BODY, DeviceFrameParser, crc8, encode_device_frame,
+)
+from telemetry import TelemetryCollector
+
+def report(frames=0, crc_errors=0, bad_lines=0, loop_us=100, loop_max_us=200, failsafes=0, failsafe=0):
+    return TELEMETRY_BODY.pack(frames, crc_errors, bad_lines, loop_us, loop_max_us,
+                               failsafes, failsafe, *range(8))
+
+def test_crc8_check_value():
+    # CRC-8 (poly 0x07, init 0) of the standard check string
+    assert crc8(b"123456789") == 0xF4
+    assert crc8(b"x123456789x", 1, -1) == 0xF4
+
+def test_parser_yields_frames_and_skips_noise():
+    parser = DeviceFrameParser()
+    data = b"RCSim ready\n" + encode_device_frame(MSG_TELEMETRY, report(5)) + encode_device_frame(MSG_ECHO, b"\x01" * 9)
+    frames = []
+    for i in range(len(data)):                   # One byte at a time
+        frames += parser.feed(data[i:i + 1])
+    assert frames == [(MSG_TELEMETRY, report(5)), (MSG_ECHO, b"\x01" * 9)]
+    assert parser.skipped == len(b"RCSim ready\n") and parser.crc_errors == 0
+
+def test_parser_drops_corrupt_frame_and_resyncs():
+    parser = DeviceFrameParser()
+    bad = bytearray(encode_device_frame(MSG_TELEMETRY, report(5)))
+    bad[6] ^= 0x01
+    good = encode_device_frame(MSG_TELEMETRY, report(6))
+    assert list(parser.feed(bytes(bad) + good)) == [(MSG_TELEMETRY, report(6))]
+    assert parser.crc_errors >= 1
+
+def test_totals_follow_counter_wrap():
+    tc = TelemetryCollector()
+    tc.on_telemetry(report(frames=0xFFFFFFF0, crc_errors=0xFFFE, failsafes=0xFF), 1.0)
+    tc.on_telemetry(report(frames=0xFFFFFFFA, crc_errors=3, failsafes=1), 1.1)
+    assert tc.totals["crc_errors"] == 0xFFFE + 5
+    assert tc.totals["failsafes"] == 0xFF + 2
+    assert tc.totals["frames"] == 0xFFFFFFFA
+    assert tc.rx_fps == pytest.approx(10 / 0.1)
+    assert tc.resets == 0
+
+def test_sketch_restart_carries_totals_on():
+    tc = TelemetryCollector()
+    tc.on_telemetry(report(frames=500, crc_errors=2), 1.0)
+    tc.on_telemetry(report(frames=40, crc_errors=1), 2.0)     # Sketch reset, counters from 0
+    assert tc.resets == 1
+    assert tc.totals["frames"] == 540 and tc.totals["crc_errors"] == 3
+
+def test_status_goes_stale():
+    tc = TelemetryCollector()
+    assert tc.status(0.0) == "fw -"
+    tc.on_telemetry(report(frames=10, failsafe=1), 1.0)
+    assert tc.status(1.5).endswith("FAILSAFE")
+    assert tc.status(3.0) == "fw -"
+    assert tc.dac() == tuple(range(8))